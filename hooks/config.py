@@ -92,6 +92,33 @@ def _make_pattern_compiler(
         return [re.compile(p, flags) for p in raw_patterns]
     return compile_patterns
 
+
+def _make_combined_compiler(
+    raw_patterns: Sequence,
+    flags: int = re.IGNORECASE,
+    with_value: bool = False
+):
+    """Create a cached compiler for one alternation of all patterns.
+
+    The combined regex answers "does anything match?" in a single scan; it
+    does not say which pattern matched, so callers still walk the individual
+    list (in order) on a hit.
+
+    Returns:
+        A cached function returning the combined pattern, or None if the
+        patterns cannot be combined (callers then scan the list directly)
+    """
+    @lru_cache(maxsize=1)
+    def compile_combined():
+        bodies = [p for p, _ in raw_patterns] if with_value else list(raw_patterns)
+        if not bodies:
+            return None
+        try:
+            return re.compile("|".join(f"(?:{p})" for p in bodies), flags)
+        except re.error:
+            return None
+    return compile_combined
+
 # =============================================================================
 # Paths
 # =============================================================================
@@ -152,8 +179,8 @@ class TimeoutConfig:
     # Tool success tracker
     tool_tracker_max_age: int = 3600  # Clear tool tracker state after 1 hour
 
-    # Daily stats cache
-    daily_stats_cache_ttl: int = 300  # 5 minutes
+    # Daily stats
+    stats_flush_secs: float = 2.0  # Min seconds between daily stats writes
 
     # Token cache (context monitor)
     token_cache_ttl: float = 60.0  # 1 minute
@@ -189,6 +216,9 @@ class ThresholdConfig:
     token_critical: int = 80000  # Strong warning at 80K
     daily_token_warning: int = 500000  # Warn at 500K tokens/day
     chars_per_token: int = 4  # Rough estimate
+    transcript_estimate_bytes: int = 160 * 1024  # Estimate smaller transcripts from file size
+    transcript_estimate_calibrated_bytes: int = 512 * 1024  # ...once bytes/token is learned
+    transcript_bytes_per_message: int = 500  # Default bytes per message estimate
 
     # File monitoring
     max_reads_tracked: int = 100
@@ -218,9 +248,6 @@ class ThresholdConfig:
     # Notifications
     min_notify_duration: int = 30  # Seconds
 
-    # Stats flushing
-    stats_flush_interval: int = 10  # Flush to disk every N tool calls
-
     # Smart permissions
     permission_approval_threshold: int = 3  # Auto-approve after N approvals
 
@@ -362,6 +389,14 @@ class DangerousCommands:
     def get_warnings():
         return _compile_warning_patterns()
 
+    @staticmethod
+    def get_blocked_combined():
+        return _compile_blocked_combined()
+
+    @staticmethod
+    def get_warnings_combined():
+        return _compile_warning_combined()
+
 
 # =============================================================================
 # State Saver Patterns
@@ -805,14 +840,15 @@ class LimitConfig:
     max_messages_joined: int = 3
     patterns_cache_maxsize: int = 1  # Single entry for learned patterns cache
     hierarchy_cache_maxsize: int = 256  # LRU cache for hierarchy lookups
+    hierarchy_index_maxsize: int = 1024  # Directories kept in the on-disk rule index
     content_truncate_summary: int = 500
     content_truncate_cache: int = 2000
     content_truncate_full: int = 10000
     prompt_truncate: int = 100
     command_truncate: int = 500
     url_truncate: int = 80
-    daily_stats_cache_maxsize: int = 1  # Single entry for daily stats cache
     token_cache_maxsize: int = 10  # Token cache (context monitor)
+    journal_compact_ratio: int = 4  # Compact state journals past 4x the live entries
 
     def __getattr__(self, name: str):
         """Support UPPER_CASE aliases for backwards compatibility."""
@@ -859,6 +895,10 @@ _compile_blocked_patterns = _make_pattern_compiler(
     DangerousCommands.BLOCKED_PATTERNS_RAW, with_value=True)
 _compile_warning_patterns = _make_pattern_compiler(
     DangerousCommands.WARNING_PATTERNS_RAW, with_value=True)
+_compile_blocked_combined = _make_combined_compiler(
+    DangerousCommands.BLOCKED_PATTERNS_RAW, with_value=True)
+_compile_warning_combined = _make_combined_compiler(
+    DangerousCommands.WARNING_PATTERNS_RAW, with_value=True)
 
 # Simple pattern lists (IGNORECASE is default)
 _compile_state_saver_patterns = _make_pattern_compiler(StateSaver.RISKY_PATTERNS_RAW)
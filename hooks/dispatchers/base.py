@@ -22,7 +22,6 @@ Subclasses override:
 """
 import atexit
 import importlib
-import json
 import os
 import signal
 import sys
@@ -72,7 +71,7 @@ atexit.register(_executor.shutdown, wait=False)
 # Import shared utilities
 from hooks.hook_utils import graceful_main, log_event, is_hook_disabled, flush_pending_writes
 from hooks.config import fast_json_loads
-from hooks.hook_sdk import Response
+from hooks.hook_sdk import Response, write_response
 
 
 @dataclass
@@ -339,6 +338,7 @@ class BaseDispatcher(ABC):
         self._handler_registry = HandlerRegistry()
         self._result_strategy: ResultStrategy | None = None
         self._discovered_tool_handlers: dict[str, list[str]] | None = None
+        self._tool_needles: tuple[bytes, ...] | None = None
 
     @abstractmethod
     def _create_result_strategy(self) -> ResultStrategy:
@@ -433,6 +433,23 @@ class BaseDispatcher(ABC):
             return self._discover_tool_handlers()
         return {}
 
+    def routes_payload(self, data: bytes) -> bool:
+        """Cheap pre-parse check whether raw stdin could route to any handler.
+
+        Returns False only when the payload names a tool and none of the routed
+        tool names appear in it as a JSON string, in which case dispatch() would
+        return None anyway. Payloads without a tool_name (including malformed
+        input) always return True so they still go through the full parse.
+        """
+        tool_handlers = self.get_tool_handlers()
+        if not tool_handlers:
+            return True
+        if self._tool_needles is None:
+            self._tool_needles = tuple(f'"{tool}"'.encode() for tool in tool_handlers)
+        if b'"tool_name"' not in data:
+            return True
+        return any(needle in data for needle in self._tool_needles)
+
     def _execute_handler(self, name: str, handler: Any, ctx: dict) -> dict | None:
         """Execute handler logic. Override for special cases.
 
@@ -611,7 +628,10 @@ class BaseDispatcher(ABC):
             self._validated = True
 
         try:
-            stdin_data = sys.stdin.read()
+            # Raw bytes straight to msgspec, skipping the text decoder
+            stdin_data = sys.stdin.buffer.read()
+            if not self.routes_payload(stdin_data):
+                sys.exit(0)
             ctx = fast_json_loads(stdin_data) if stdin_data else {}
         except Exception as e:
             # Log parse errors (always, not just in profile mode) and exit with error code
@@ -622,7 +642,7 @@ class BaseDispatcher(ABC):
 
         result = self.dispatch(ctx)
         if result:
-            print(json.dumps(result))
+            write_response(result)
 
         sys.exit(0)
 
@@ -689,7 +709,7 @@ class SimpleDispatcher(ABC):
     def read_context(self) -> dict:
         """Read and parse context from stdin."""
         try:
-            stdin_data = sys.stdin.read()
+            stdin_data = sys.stdin.buffer.read()
             return fast_json_loads(stdin_data) if stdin_data else {}
         except Exception as e:
             if _PROFILE_MODE:
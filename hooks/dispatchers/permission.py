@@ -11,18 +11,18 @@ Runs on PermissionRequest event to auto-approve known-safe operations.
 Note: Uses JSON output format (not SimpleDispatcher's string format)
 because PermissionRequest requires hookSpecificOutput response.
 """
-import json
 import sys
 
 from hooks.hook_utils import graceful_main, log_event
 from hooks.config import fast_json_loads
+from hooks.hook_sdk import write_response
 from hooks.handlers.smart_permissions import handle_permission_request
 
 
 @graceful_main("permission_dispatcher")
 def main():
     try:
-        raw = fast_json_loads(sys.stdin.read())
+        raw = fast_json_loads(sys.stdin.buffer.read())
     except Exception as e:
         log_event("permission_dispatcher", "parse_error", {"error": str(e)})
         sys.exit(1)
@@ -30,7 +30,7 @@ def main():
     result = handle_permission_request(raw)
 
     if result:
-        print(json.dumps(result))
+        write_response(result)
 
     sys.exit(0)
 
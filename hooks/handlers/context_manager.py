@@ -13,15 +13,19 @@ Runs on:
 # Handler metadata for dispatcher auto-discovery
 APPLIES_TO_PRE = ["Edit", "Write"]
 APPLIES_TO_POST = ["Bash"]
-import heapq
-import json
+import mmap
+import os
+import re
 import sys
 import time
 from collections import defaultdict
 from pathlib import Path
 from datetime import datetime
+from typing import Any
 
-from hooks.config import Thresholds, Timeouts, Limits, StateSaver, DATA_DIR, CACHE_DIR
+import msgspec
+
+from hooks.config import Thresholds, Timeouts, Limits, StateSaver, DATA_DIR, CACHE_DIR, fast_json_loads
 from hooks.hook_utils import (
     graceful_main,
     log_event,
@@ -30,11 +34,11 @@ from hooks.hook_utils import (
     get_session_id,
     safe_save_json,
     safe_load_json,
-    count_tokens_accurate,
+    count_tokens_batch,
     create_ttl_cache,
-    iter_jsonl,
+    iter_lines_bytes,
 )
-from hooks.hook_sdk import PreToolUseContext, PostToolUseContext, Response, HookState
+from hooks.hook_sdk import PreToolUseContext, PostToolUseContext, Response, HookState, write_response
 
 # Configuration
 TOKEN_WARNING_THRESHOLD = Thresholds.TOKEN_WARNING
@@ -209,7 +213,11 @@ def get_cached_count(transcript_path):
 
 
 def update_cache(transcript_path, tokens, messages, offset):
-    """Update cache with new token count and file offset."""
+    """Update cache with new token count and file offset.
+
+    Each count over a large scan also recalibrates the bytes-per-token and
+    bytes-per-message coefficients used to estimate small transcripts.
+    """
     try:
         stat = Path(transcript_path).stat()
         cache = {
@@ -222,23 +230,124 @@ def update_cache(transcript_path, tokens, messages, offset):
                 "offset": offset
             }
         }
+        coefficients = load_cache().get("coefficients")
+        if offset >= Thresholds.TRANSCRIPT_ESTIMATE_BYTES and tokens and messages:
+            coefficients = {
+                "bytes_per_token": offset / tokens,
+                "bytes_per_message": offset / messages,
+            }
+        if coefficients:
+            cache["coefficients"] = coefficients
         save_cache(cache)
     except OSError:
         pass
 
 
+def estimate_transcript_size(file_size: int) -> tuple[int, int] | None:
+    """Estimate (tokens, messages) from file size, or None if a scan is needed.
+
+    Uses coefficients learned from the last large scan, which also raises the
+    size limit for estimating. Without them falls back to ~4 bytes/token and
+    ~500 bytes/message under the default limit.
+    """
+    coefficients = load_cache().get("coefficients")
+    if coefficients:
+        limit = Thresholds.TRANSCRIPT_ESTIMATE_CALIBRATED_BYTES
+        if file_size >= limit:
+            return None
+        return (int(file_size / coefficients["bytes_per_token"]),
+                int(file_size / coefficients["bytes_per_message"]))
+    if file_size >= Thresholds.TRANSCRIPT_ESTIMATE_BYTES:
+        return None
+    return file_size // Thresholds.CHARS_PER_TOKEN, file_size // Thresholds.TRANSCRIPT_BYTES_PER_MESSAGE
+
+
+class _ContentEntry(msgspec.Struct):
+    """Transcript line projection - only the field token counting reads."""
+    content: Any = None
+
+
+# Reused typed decoder: skips building dicts for fields we never look at
+_content_decoder = msgspec.json.Decoder(_ContentEntry)
+
+
+# Text is tokenized in batches of about this many characters
+TOKENIZE_BATCH_CHARS = 1024 * 1024
+
+
+def _content_texts(content: Any, texts: list[str]) -> int:
+    """Append a content value's text payloads to texts; return their length."""
+    if isinstance(content, str):
+        texts.append(content)
+        return len(content)
+    size = 0
+    if isinstance(content, list):
+        for item in content:
+            if isinstance(item, dict):
+                text = item.get('text')
+                if isinstance(text, str):
+                    texts.append(text)
+                    size += len(text)
+    return size
+
+
+def _count_tokens_in_content(content: Any) -> int:
+    """Count tokens in a transcript entry's content value."""
+    texts = []
+    _content_texts(content, texts)
+    return count_tokens_batch(texts)
+
+
 def _count_tokens_in_entry(entry: dict) -> int:
     """Count tokens in a transcript entry."""
-    tokens = 0
     if 'content' in entry:
-        content = entry['content']
-        if isinstance(content, str):
-            tokens += count_tokens_accurate(content)
-        elif isinstance(content, list):
-            for item in content:
-                if isinstance(item, dict) and 'text' in item:
-                    tokens += count_tokens_accurate(item['text'])
-    return tokens
+        return _count_tokens_in_content(entry['content'])
+    return 0
+
+
+def _scan_transcript(transcript_path, offset: int = 0) -> tuple[int, int, int]:
+    """Count tokens and messages in complete transcript lines after offset.
+
+    Memory-maps the file and walks newline offsets; only lines that carry a
+    "content" key are JSON-parsed, and their text is tokenized in batches.
+    A trailing partial line is left for the next scan.
+
+    Returns:
+        (tokens, messages, end_offset) where end_offset follows the last newline
+    """
+    tokens = 0
+    messages = 0
+    texts = []
+    pending = 0
+    with open(transcript_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size <= offset:
+            return 0, 0, offset
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            end = mm.rfind(b'\n', offset) + 1
+            pos = offset
+            while pos < end:
+                nl = mm.find(b'\n', pos, end)
+                line = mm[pos:nl]
+                pos = nl + 1
+                if b'"content"' not in line:
+                    # Cheap stand-in for parsing: count only lines that look
+                    # like a whole JSON object, not truncated writes
+                    line = line.strip()
+                    if line[:1] == b'{' and line[-1:] == b'}':
+                        messages += 1
+                    continue
+                try:
+                    entry = _content_decoder.decode(line)
+                except ValueError:
+                    continue
+                pending += _content_texts(entry.content, texts)
+                messages += 1
+                if pending >= TOKENIZE_BATCH_CHARS:
+                    tokens += count_tokens_batch(texts)
+                    texts.clear()
+                    pending = 0
+    tokens += count_tokens_batch(texts)
+    return tokens, messages, max(end, offset)
 
 
 def get_transcript_size(transcript_path):
@@ -256,52 +365,26 @@ def get_transcript_size(transcript_path):
 
         # Incremental scan from last offset
         try:
-            with open(transcript_path, 'r') as f:
-                f.seek(offset)
-                new_tokens = 0
-                new_messages = 0
-                for line in f:
-                    try:
-                        entry = json.loads(line.strip())
-                        new_tokens += _count_tokens_in_entry(entry)
-                        new_messages += 1
-                    except json.JSONDecodeError:
-                        continue
-                new_offset = f.tell()
-
+            new_tokens, new_messages, new_offset = _scan_transcript(transcript_path, offset)
             total_tokens = tokens + new_tokens
             total_messages = messages + new_messages
             update_cache(transcript_path, total_tokens, total_messages, new_offset)
             return total_tokens, total_messages
-        except (OSError, PermissionError):
+        except (OSError, ValueError):
             pass  # Fall through to full scan
 
-    # Fast path: check file size first (avoid full scan for small files)
-    # ~4 bytes per token on average, 40K tokens ≈ 160KB
+    # Fast path: estimate small files from their size (avoid full scan)
     try:
-        file_size = Path(transcript_path).stat().st_size
-        if file_size < 160 * 1024:  # Under 160KB, estimate without full scan
-            estimated_tokens = file_size // 4
-            estimated_messages = file_size // 500
-            return estimated_tokens, estimated_messages
-    except OSError:
+        estimate = estimate_transcript_size(Path(transcript_path).stat().st_size)
+        if estimate is not None:
+            return estimate
+    except (OSError, KeyError, TypeError, ZeroDivisionError):
         pass
 
     # Full scan with accurate token counting for large files
-    total_tokens = 0
-    message_count = 0
-
     try:
-        with open(transcript_path, 'r') as f:
-            for line in f:
-                try:
-                    entry = json.loads(line.strip())
-                    total_tokens += _count_tokens_in_entry(entry)
-                    message_count += 1
-                except json.JSONDecodeError:
-                    continue
-            final_offset = f.tell()
-    except (OSError, PermissionError):
+        total_tokens, message_count, final_offset = _scan_transcript(transcript_path)
+    except (OSError, ValueError):
         return 0, 0
 
     # Cache the result with file offset for incremental updates
@@ -356,6 +439,12 @@ def _update_summary_cache(transcript_path, state, offset):
         pass
 
 
+# Raw-line prefilter for error counting; most lines never mention either word,
+# so the str()/lower() content check only runs on candidate lines.
+_SUMMARY_ERROR_RE = re.compile(rb"error|failed", re.IGNORECASE)
+_SUMMARY_TOOL_KEY = b'"tool_name"'
+
+
 def _process_summary_entry(entry: dict, files_edited: set, files_written: set, tool_counts: dict):
     """Process a single transcript entry for summary extraction."""
     tool = entry.get("tool_name", "")
@@ -401,34 +490,30 @@ def get_session_summary(transcript_path):
             error_count = state.get("error_count", 0)
             start_offset = offset
 
-    # Process transcript (from start or incrementally)
-    # Note: incremental processing requires file offset tracking which iter_jsonl
-    # doesn't support directly. For now, we do a full scan when cache is invalid.
-    # TODO: Consider adding offset support to iter_jsonl for large transcripts.
+    # Process transcript (from start or incrementally from cached offset)
     try:
-        if start_offset > 0:
-            # Incremental: read from offset manually
-            with open(transcript_path, 'r') as f:
-                f.seek(start_offset)
-                for line in f:
-                    try:
-                        entry = json.loads(line.strip())
-                        _process_summary_entry(entry, files_edited, files_written, tool_counts)
-                        content = str(entry.get("content", ""))
-                        if "error" in content.lower() or "failed" in content.lower():
-                            error_count += 1
-                    except json.JSONDecodeError:
-                        continue
-                final_offset = f.tell()
-        else:
-            # Full scan using iter_jsonl
-            for entry in iter_jsonl(transcript_path):
+        with open(transcript_path, 'rb') as f:
+            f.seek(start_offset)
+            for line in iter_lines_bytes(f):
+                # Entries are JSON objects; skip blank/truncated lines without
+                # paying for a decode error
+                if line[:1] != b"{":
+                    continue
+                # Only tool entries and error candidates contribute; skip
+                # decoding plain message lines entirely
+                error_hit = _SUMMARY_ERROR_RE.search(line)
+                if not error_hit and _SUMMARY_TOOL_KEY not in line:
+                    continue
+                try:
+                    entry = fast_json_loads(line)
+                except ValueError:
+                    continue
                 _process_summary_entry(entry, files_edited, files_written, tool_counts)
-                content = str(entry.get("content", ""))
-                if "error" in content.lower() or "failed" in content.lower():
-                    error_count += 1
-            # Get final offset
-            final_offset = Path(transcript_path).stat().st_size
+                if error_hit:
+                    content = str(entry.get("content", "")).lower()
+                    if "error" in content or "failed" in content:
+                        error_count += 1
+            final_offset = f.tell()
     except (OSError, PermissionError):
         return ""
 
@@ -451,7 +536,7 @@ def get_session_summary(transcript_path):
         parts.append(f"Errors: {error_count}")
 
     # Top 3 tools
-    top_tools = heapq.nlargest(3, tool_counts.items(), key=lambda x: x[1])
+    top_tools = sorted(tool_counts.items(), key=lambda x: x[1], reverse=True)[:3]
     if top_tools:
         tools_str = ", ".join(f"{t}:{c}" for t, c in top_tools)
         parts.append(f"Tools: {tools_str}")
@@ -671,8 +756,8 @@ def check_context(raw: dict) -> dict | None:
 @graceful_main("context_manager")
 def main():
     try:
-        ctx = json.load(sys.stdin)
-    except json.JSONDecodeError:
+        ctx = fast_json_loads(sys.stdin.buffer.read())
+    except ValueError:
         sys.exit(0)
 
     tool_name = ctx.get("tool_name", "")
@@ -682,12 +767,12 @@ def main():
         # PreCompact event
         result = handle_pre_compact(ctx)
         if result:
-            print(json.dumps(result))
+            write_response(result)
     elif tool_name in ("Edit", "Write"):
         # PreToolUse event
         result = handle_pre_tool_use(ctx)
         if result:
-            print(json.dumps(result))
+            write_response(result)
 
     sys.exit(0)
 
@@ -29,15 +29,19 @@ def check_command(command: str) -> tuple[str, str | None]:
     """
     cmd = command.strip()
 
-    # Check blocked patterns
-    for compiled, reason in DangerousCommands.get_blocked():
-        if compiled.search(cmd):
-            return ('block', reason)
-
-    # Check warning patterns
-    for compiled, reason in DangerousCommands.get_warnings():
-        if compiled.search(cmd):
-            return ('warn', reason)
+    # Each list is pre-screened with one combined regex; only a hit pays for
+    # the ordered walk that picks the reason of the first matching pattern
+    blocked_any = DangerousCommands.get_blocked_combined()
+    if blocked_any is None or blocked_any.search(cmd):
+        for compiled, reason in DangerousCommands.get_blocked():
+            if compiled.search(cmd):
+                return ('block', reason)
+
+    warnings_any = DangerousCommands.get_warnings_combined()
+    if warnings_any is None or warnings_any.search(cmd):
+        for compiled, reason in DangerousCommands.get_warnings():
+            if compiled.search(cmd):
+                return ('warn', reason)
 
     return ('allow', None)
 
@@ -24,16 +24,60 @@ Uses cachetools TTLCache for automatic expiration and LRU eviction.
 """
 # Handler metadata for dispatcher auto-discovery
 APPLIES_TO = ["Read", "Write", "Edit"]
+import atexit
 import os
-from pathlib import Path
+import re
+from itertools import islice
+from typing import Iterator
 
-from hooks.hook_utils import log_event, TTLCachedLoader
+from hooks.hook_utils import log_event, create_ttl_cache, safe_load_json, atomic_write_json
 from hooks.hook_sdk import Response, Patterns
-from hooks.config import Timeouts, Limits
-
-# Module-level loaders for directory hierarchy caching
-# (automatic TTL expiration and LRU eviction)
-_hierarchy_loaders: dict = {}
+from hooks.config import Timeouts, Limits, CACHE_DIR
+
+# Rule files found per (start_dir, stop_at), with TTL expiration and LRU
+# eviction. Read without a lock: a hit is a single dict lookup, and misses
+# only repopulate the same key.
+_hierarchy_cache = create_ttl_cache(
+    maxsize=Limits.HIERARCHY_CACHE_MAXSIZE, ttl=Timeouts.HIERARCHY_CACHE_TTL
+)
+
+# Per-file rule data: full content, and the `paths` pattern peeked from the
+# head of the file ("" when none was found there). Kept separately so rules
+# whose pattern rejects the target file are never read in full. Entries are
+# (st_mtime_ns, value) and are only used while the file's mtime matches, so
+# edits show up immediately rather than after the TTL.
+_rule_contents = create_ttl_cache(
+    maxsize=Limits.HIERARCHY_CACHE_MAXSIZE, ttl=Timeouts.HIERARCHY_CACHE_TTL
+)
+_rule_paths = create_ttl_cache(
+    maxsize=Limits.HIERARCHY_CACHE_MAXSIZE, ttl=Timeouts.HIERARCHY_CACHE_TTL
+)
+
+# Bytes read when peeking at a rule file's frontmatter
+FRONTMATTER_PEEK_BYTES = 1024
+
+# Rule sources included in one message; the search stops once this many match
+MAX_RULES_SHOWN = 3
+
+# Per-directory rule file listing (CLAUDE.md, then .claude/rules/*.md).
+# Empty tuples are cached too, so rule-less parents cost no syscalls on
+# later walks. Read without a lock: racing misses rescan the same directory
+# and store equal tuples.
+_dir_rule_files = create_ttl_cache(
+    maxsize=Limits.HIERARCHY_CACHE_MAXSIZE, ttl=Timeouts.HIERARCHY_CACHE_TTL
+)
+
+# On-disk index of rule file listings, shared across hook processes (every
+# event starts a fresh process, so the in-memory caches above start empty).
+# directory -> [[dir, .claude, .claude/rules mtime_ns], [rule files]]; an
+# entry is reused while those mtimes match, costing stats instead of scans.
+HIERARCHY_INDEX_FILE = CACHE_DIR / "hierarchy_index.json"
+_dir_index: dict | None = None  # Loaded on first use
+_dir_index_dirty = False
+
+
+# "key: value" lines in a frontmatter block (key is up to the first colon)
+_FM_KV_RE = re.compile(r"^([^:\n]*):(.*)$", re.MULTILINE)
 
 
 def parse_frontmatter(content: str) -> tuple[dict, str]:
@@ -46,26 +90,32 @@ def parse_frontmatter(content: str) -> tuple[dict, str]:
     if not content.startswith("---"):
         return {}, content
 
-    lines = content.split("\n")
-    end_idx = -1
+    # Locate the closing "---" line with str.find rather than splitting the
+    # whole file into lines (body can be many KB; frontmatter is a few lines)
+    body_start = content.find("\n") + 1
+    if not body_start:
+        return {}, content
 
-    for i, line in enumerate(lines[1:], 1):
-        if line.strip() == "---":
-            end_idx = i
+    search = body_start
+    while True:
+        idx = content.find("---", search)
+        if idx == -1:
+            return {}, content
+        line_start = content.rfind("\n", 0, idx) + 1
+        line_end = content.find("\n", idx)
+        if line_end == -1:
+            line_end = len(content)
+        if content[line_start:line_end].strip() == "---":
             break
+        search = line_end + 1
 
-    if end_idx == -1:
-        return {}, content
-
-    frontmatter_lines = lines[1:end_idx]
-    remaining = "\n".join(lines[end_idx + 1:])
+    remaining = content[line_end + 1:]
 
-    # Simple YAML parsing (key: value)
-    frontmatter = {}
-    for line in frontmatter_lines:
-        if ":" in line:
-            key, _, value = line.partition(":")
-            frontmatter[key.strip()] = value.strip().strip('"').strip("'")
+    # Simple YAML parsing (key: value), one regex scan over the block
+    frontmatter = {
+        key.strip(): value.strip().strip('"').strip("'")
+        for key, value in _FM_KV_RE.findall(content, body_start, line_start)
+    }
 
     return frontmatter, remaining
 
@@ -78,112 +128,302 @@ def find_claude_files(start_dir: str, stop_at: str = None) -> list[tuple[str, st
 
     Returns:
         List of (directory, content) tuples, closest first
+    """
+    results = []
+    for directory, rule_file in _iter_rule_files(start_dir, stop_at):
+        content = _read_rule_file(rule_file, _rule_mtime(rule_file))
+        if content is not None:
+            results.append((directory, content))
+    return results
 
-    Uses TTLCachedLoader for automatic expiration and thread-safe caching.
+
+def _iter_rule_files(start_dir: str, stop_at: str = None) -> Iterator[tuple[str, str]]:
+    """Cached _walk_rule_files: (directory, rule_file) pairs, closest first.
+
+    On a miss the walk is consumed lazily, so a caller that stops early never
+    scans the remaining parents; only a completed walk is cached.
     """
-    cache_key = f"{start_dir}:{stop_at or '/'}"
+    cache_key = (start_dir, stop_at or "/")
+
+    cached = _hierarchy_cache.get(cache_key)
+    if cached is not None:
+        yield from cached
+        return
+
+    results = []
+    for item in _walk_rule_files(start_dir, stop_at):
+        results.append(item)
+        yield item
+    _hierarchy_cache[cache_key] = results
+
+
+def _rule_mtime(rule_file: str) -> int | None:
+    """Get a rule file's st_mtime_ns, or None if it can't be stat'd."""
+    try:
+        return os.stat(rule_file).st_mtime_ns
+    except OSError:
+        return None
 
-    # Get or create loader for this cache key
-    # (cachetools TTLCache is thread-safe internally)
-    if cache_key not in _hierarchy_loaders:
-        _hierarchy_loaders[cache_key] = TTLCachedLoader(
-            load_func=lambda: _load_hierarchy(start_dir, stop_at),
-            cache_key=cache_key,
-            ttl=Timeouts.HIERARCHY_CACHE_TTL,
-            maxsize=Limits.HIERARCHY_CACHE_MAXSIZE
-        )
-    loader = _hierarchy_loaders[cache_key]
 
-    # Use loader to get cached or fresh data
-    return loader.get()
+def _read_rule_file(rule_file: str, mtime_ns: int | None) -> str | None:
+    """Read a rule file's content (cached while mtime_ns matches).
 
+    Returns None if unreadable.
+    """
+    if mtime_ns is None:
+        return None
+    cached = _rule_contents.get(rule_file)
+    if cached is not None and cached[0] == mtime_ns:
+        return cached[1]
+
+    try:
+        with open(rule_file, encoding="utf-8") as f:
+            content = f.read()
+    except (OSError, UnicodeDecodeError):
+        return None
+    _rule_contents[rule_file] = (mtime_ns, content)
+    return content
 
-def _load_hierarchy(start_dir: str, stop_at: str = None) -> list[tuple[str, str]]:
+
+def _peek_paths_pattern(rule_file: str, mtime_ns: int | None) -> str:
+    """Get a rule file's `paths` pattern from its first few hundred bytes.
+
+    Only whole lines of the head are parsed, so a pattern found here is the
+    one the full file declares. Returns "" when the head has none (no
+    frontmatter, no `paths` key, or frontmatter longer than the peek); the
+    caller then falls back to parsing the full content.
+    """
+    if mtime_ns is None:
+        return ""
+    cached = _rule_paths.get(rule_file)
+    if cached is not None and cached[0] == mtime_ns:
+        return cached[1]
+
+    try:
+        with open(rule_file, "rb") as f:
+            head = f.read(FRONTMATTER_PEEK_BYTES)
+    except OSError:
+        return ""
+    if len(head) == FRONTMATTER_PEEK_BYTES:
+        head = head[:head.rfind(b"\n") + 1]
+
+    frontmatter, _ = parse_frontmatter(head.decode("utf-8", errors="replace"))
+    pattern = frontmatter.get("paths", "")
+    _rule_paths[rule_file] = (mtime_ns, pattern)
+    return pattern
+
+
+def _rule_applies(source_dir: str, paths_pattern: str, file_path: str) -> bool:
+    """Check a rule's `paths` pattern against file_path (relative to source_dir)."""
+    if not paths_pattern:
+        return True
+    # Lexical relative path, as Path.relative_to would give for these
+    # already-resolved strings
+    prefix = source_dir if source_dir.endswith(os.sep) else source_dir + os.sep
+    if file_path == source_dir:
+        rel_path = "."
+    elif file_path.startswith(prefix):
+        rel_path = file_path[len(prefix):]
+    else:
+        return False
+    return Patterns.matches_path_pattern(rel_path, paths_pattern)
+
+
+def _scan_rule_files(directory: str) -> tuple[str, ...]:
+    """List rule files in a directory: CLAUDE.md first, then .claude/rules/*.md.
+
+    Results are cached per directory, including empty ones: in memory for
+    this process, and in the on-disk index (validated by mtimes) for later
+    ones.
+    """
+    global _dir_index_dirty
+    cached = _dir_rule_files.get(directory)
+    if cached is not None:
+        return cached
+
+    index = _get_dir_index()
+    # Stamp before scanning, so a change mid-scan fails the next validation
+    stamp = _dir_stamp(directory)
+    entry = index.get(directory)
+    if stamp is not None and isinstance(entry, list) and len(entry) == 2 and entry[0] == stamp:
+        result = tuple(entry[1])
+    else:
+        result = _list_rule_files(directory)
+        if stamp is not None:
+            index.pop(directory, None)  # Re-insert as newest
+            index[directory] = [stamp, list(result)]
+            _dir_index_dirty = True
+
+    _dir_rule_files[directory] = result
+    return result
+
+
+def _list_rule_files(directory: str) -> tuple[str, ...]:
+    """Scan a directory for rule files (uncached).
+
+    One scandir of the directory finds both CLAUDE.md and .claude; the rules
+    directory is only scanned when .claude exists.
+    """
+    files = []
+    has_dot_claude = False
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.name == "CLAUDE.md" and entry.is_file():
+                    files.append(entry.path)
+                elif entry.name == ".claude" and entry.is_dir():
+                    has_dot_claude = True
+    except OSError:
+        pass
+
+    if has_dot_claude:
+        try:
+            with os.scandir(os.path.join(directory, ".claude", "rules")) as it:
+                files.extend(sorted(
+                    entry.path for entry in it
+                    if entry.name.endswith(".md") and not entry.name.startswith(".")
+                    and entry.is_file()
+                ))
+        except OSError:
+            pass
+
+    return tuple(files)
+
+
+def _dir_stamp(directory: str) -> list[int] | None:
+    """mtimes (ns) of directory, .claude and .claude/rules; 0 when missing.
+
+    Adding or removing CLAUDE.md, .claude, rules/ or a rule file changes one
+    of these. Returns None if the directory itself can't be stat'd.
     """
-    Load CLAUDE.md files from filesystem (called on cache miss).
+    try:
+        dir_mtime = os.stat(directory).st_mtime_ns
+    except OSError:
+        return None
+    dot_claude = os.path.join(directory, ".claude")
+    try:
+        dot_mtime = os.stat(dot_claude).st_mtime_ns
+    except OSError:
+        return [dir_mtime, 0, 0]
+    try:
+        rules_mtime = os.stat(os.path.join(dot_claude, "rules")).st_mtime_ns
+    except OSError:
+        rules_mtime = 0
+    return [dir_mtime, dot_mtime, rules_mtime]
+
+
+def _get_dir_index() -> dict:
+    """Load the on-disk rule index once per process."""
+    global _dir_index
+    if _dir_index is None:
+        data = safe_load_json(HIERARCHY_INDEX_FILE, {})
+        _dir_index = data if isinstance(data, dict) else {}
+    return _dir_index
+
+
+def flush_dir_index() -> None:
+    """Write the rule index back if this process changed it.
+
+    Keeps the most recently scanned HIERARCHY_INDEX_MAXSIZE directories.
+    Written atomically (temp file + rename); concurrent hooks may drop each
+    other's new entries, which only costs a rescan later.
+    """
+    global _dir_index_dirty
+    if not _dir_index_dirty or _dir_index is None:
+        return
+    excess = len(_dir_index) - Limits.HIERARCHY_INDEX_MAXSIZE
+    for directory in list(_dir_index)[:max(excess, 0)]:
+        del _dir_index[directory]
+    atomic_write_json(HIERARCHY_INDEX_FILE, _dir_index)
+    _dir_index_dirty = False
+
+
+atexit.register(flush_dir_index)
+
+
+def _walk_rule_files(start_dir: str, stop_at: str = None) -> Iterator[tuple[str, str]]:
+    """
+    Walk up from start_dir yielding rule files (called on cache miss).
 
     Args:
         start_dir: Directory to start walking up from
         stop_at: Directory to stop at (or root if None)
 
-    Returns:
-        List of (directory, content) tuples, closest first
+    Yields:
+        (directory, rule_file) tuples, closest first
     """
-    results = []
-    current = Path(start_dir).resolve()
-    stop = Path(stop_at).resolve() if stop_at else Path("/")
-
-    while current >= stop:
-        claude_file = current / "CLAUDE.md"
-        if claude_file.exists():
-            try:
-                content = claude_file.read_text()
-                results.append((str(current), content))
-            except (OSError, PermissionError):
-                pass
-
-        # Also check .claude/rules/ directory
-        rules_dir = current / ".claude" / "rules"
-        if rules_dir.exists():
-            for rule_file in sorted(rules_dir.glob("*.md")):
-                try:
-                    content = rule_file.read_text()
-                    results.append((str(current), content))
-                except (OSError, PermissionError):
-                    pass
-
-        if current == current.parent:
+    current = os.path.realpath(start_dir)
+    stop = os.path.realpath(stop_at) if stop_at else os.sep
+    # Ancestry as a string-prefix test; "/" already ends with the separator
+    stop_prefix = stop if stop.endswith(os.sep) else stop + os.sep
+
+    while current == stop or current.startswith(stop_prefix):
+        # CLAUDE.md and .claude/rules/*.md, from one cached directory scan
+        for rule_file in _scan_rule_files(current):
+            yield current, rule_file
+
+        parent = os.path.dirname(current)
+        if parent == current:
             break
-        current = current.parent
-
-    return results
+        current = parent
 
 
-def get_applicable_rules(file_path: str, cwd: str) -> list[dict]:
+def iter_applicable_rules(file_path: str, cwd: str) -> Iterator[dict]:
     """
-    Get all rules applicable to a file path.
+    Yield rules applicable to a file path, closest first.
 
-    Returns:
-        List of rule dicts: {source, frontmatter, content}
+    Rules are filtered as the walk climbs, so stopping early (e.g. with
+    islice) leaves the remaining parent directories unscanned and unread.
+
+    Yields:
+        Rule dicts: {source, frontmatter, content}
     """
     if not file_path:
-        return []
+        return
 
-    # Resolve file path
-    path = Path(file_path)
-    if not path.is_absolute():
-        path = Path(cwd) / file_path
-    file_path = str(path.resolve())
+    # Resolve file path (os.path on strings; no Path objects per call)
+    path = os.path.normpath(os.path.join(cwd, file_path))
+    file_path = os.path.realpath(path)
 
     # Get directory of the file
-    file_dir = str(path.parent)
-
-    # Find CLAUDE.md files
-    claude_files = find_claude_files(file_dir, cwd)
-
-    applicable = []
-    for source_dir, content in claude_files:
+    file_dir = os.path.dirname(path)
+
+    for source_dir, rule_file in _iter_rule_files(file_dir, cwd):
+        mtime_ns = _rule_mtime(rule_file)
+        # Cheap pre-filter: a pattern in the file's head that rejects the
+        # target means the rest of the file is never read
+        if not _rule_applies(source_dir, _peek_paths_pattern(rule_file, mtime_ns), file_path):
+            continue
+
+        content = _read_rule_file(rule_file, mtime_ns)
+        if content is None:
+            continue
         frontmatter, body = parse_frontmatter(content)
 
         # Check if this rule applies to our file
-        paths_pattern = frontmatter.get("paths", "")
-        if paths_pattern:
-            # Make file path relative to source dir for matching
-            try:
-                rel_path = str(Path(file_path).relative_to(source_dir))
-            except ValueError:
-                continue
-
-            if not Patterns.matches_path_pattern(rel_path, paths_pattern):
-                continue
-
-        applicable.append({
+        if not _rule_applies(source_dir, frontmatter.get("paths", ""), file_path):
+            continue
+
+        yield {
             "source": source_dir,
             "frontmatter": frontmatter,
             "content": body[:2000],  # Truncate for context
-        })
+        }
+
+
+def get_applicable_rules(file_path: str, cwd: str) -> list[dict]:
+    """
+    Get all rules applicable to a file path.
+
+    Returns:
+        List of rule dicts: {source, frontmatter, content}
+    """
+    return list(iter_applicable_rules(file_path, cwd))
+
 
-    return applicable
+# Key lines in rule content: headers/bullets, or the first numbered items.
+# Leading whitespace is any but newline, matching per-line str.strip().
+_KEY_LINE_RE = re.compile(r"^[^\S\n]*(?:[#*-]|[123]\.)[^\n]*", re.MULTILINE)
 
 
 def format_rules_message(rules: list[dict]) -> str:
@@ -192,17 +432,14 @@ def format_rules_message(rules: list[dict]) -> str:
         return ""
 
     parts = []
-    for rule in rules[:3]:  # Max 3 rule sources
+    for rule in rules[:MAX_RULES_SHOWN]:
         source = rule["source"]
         # Extract key points from content (first few lines with bullets/headers)
         content = rule["content"]
-        key_lines = []
-        for line in content.split("\n"):
-            line = line.strip()
-            if line.startswith(("#", "-", "*", "1.", "2.", "3.")):
-                key_lines.append(line)
-                if len(key_lines) >= 3:
-                    break
+        key_lines = [
+            match.group().strip()
+            for match in islice(_KEY_LINE_RE.finditer(content), 3)
+        ]
 
         if key_lines:
             parts.append(f"[{source}] {'; '.join(key_lines)}")
@@ -227,8 +464,8 @@ def check_hierarchical_rules(raw: dict) -> dict | None:
     if not file_path:
         return None
 
-    # Get applicable rules
-    rules = get_applicable_rules(file_path, cwd)
+    # Get applicable rules (format_rules_message uses at most MAX_RULES_SHOWN)
+    rules = list(islice(iter_applicable_rules(file_path, cwd), MAX_RULES_SHOWN))
 
     if not rules:
         return None
@@ -240,7 +477,8 @@ def check_hierarchical_rules(raw: dict) -> dict | None:
 
     log_event("hierarchical_rules", "applied", {
         "file": file_path,
-        "rule_count": len(rules),
+        # Capped at MAX_RULES_SHOWN, not the total number of applicable rules
+        "rules_shown": len(rules),
         "sources": [r["source"] for r in rules]
     })
 
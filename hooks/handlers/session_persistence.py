@@ -4,7 +4,6 @@ Session persistence handler - transcript parsing and memory suggestions.
 Provides project info extraction, memory MCP suggestions, and session metadata
 for session_end dispatcher.
 """
-import heapq
 import json
 import subprocess
 import time
@@ -108,7 +107,7 @@ def generate_memory_suggestions(info: dict) -> dict[str, list]:
             f"Files created this session: {', '.join(Path(f).name for f in list(info['files_created'])[:5])}"
         )
 
-    top_tools = heapq.nlargest(3, info.get("tools_used", {}).items(), key=lambda x: x[1])
+    top_tools = sorted(info.get("tools_used", {}).items(), key=lambda x: x[1], reverse=True)[:3]
     if top_tools:
         tool_summary = ", ".join(f"{t}:{c}" for t, c in top_tools)
         observations.append(f"Common operations: {tool_summary}")
@@ -132,20 +132,26 @@ def extract_lessons(raw: dict, outcome: str) -> list:
     lessons = []
     output = raw.get("tool_output", "") or raw.get("output", "") or raw.get("result", "")
 
+    if outcome not in ("failure", "success"):
+        return lessons
+
+    # Lowercase once; output can be a large agent transcript
+    output_lower = output.lower()
+
     # For failures, try to extract what went wrong
     if outcome == "failure":
-        if "timeout" in output.lower():
+        if "timeout" in output_lower:
             lessons.append("Task timed out - consider breaking into smaller parts")
-        if "not found" in output.lower():
+        if "not found" in output_lower:
             lessons.append("File or resource not found - verify paths before dispatching")
-        if "permission" in output.lower():
+        if "permission" in output_lower:
             lessons.append("Permission issue - check access rights")
 
     # For successes, note patterns
     if outcome == "success":
-        if "test" in output.lower() and "pass" in output.lower():
+        if "test" in output_lower and "pass" in output_lower:
             lessons.append("Tests passed - approach validated")
-        if "refactor" in output.lower():
+        if "refactor" in output_lower:
             lessons.append("Refactoring completed successfully")
 
     return lessons
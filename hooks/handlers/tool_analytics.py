@@ -14,12 +14,16 @@ All share token estimation logic and PostToolUse context processing.
 # Runs on all tools for PostToolUse (token tracking, failure detection, output size)
 # Special handling for Bash (build analyzer), Edit/Write (batch detection)
 APPLIES_TO = ["Bash", "Grep", "Glob", "Read", "Edit", "Write", "Task", "LSP"]
-import heapq
+import atexit
+import bisect
 import os
 import re
+import struct
 import time
-from datetime import datetime
+from collections import Counter, deque
+from datetime import datetime, timedelta
 from pathlib import Path
+from typing import NamedTuple
 
 from hooks.hook_utils import (
     log_event,
@@ -31,6 +35,7 @@ from hooks.hook_utils import (
     estimate_tokens,
     get_content_size,
     cleanup_old_sessions,
+    stable_hash,
 )
 from hooks.hook_sdk import PostToolUseContext, Response, HookState
 from hooks.config import Thresholds, FilePatterns, Timeouts, Limits, TRACKER_DIR, ToolAnalytics, Build
@@ -47,6 +52,7 @@ LARGE_OUTPUT_TOOLS = FilePatterns.LARGE_OUTPUT_TOOLS
 FAILURE_THRESHOLD = Thresholds.TOOL_FAILURE_THRESHOLD
 TOOL_TRACKER_MAX_AGE = Timeouts.TOOL_TRACKER_MAX_AGE
 STATE_NAMESPACE = "tool_tracker"
+RECENT_ERRORS_MAX = 10
 
 # =============================================================================
 # Tool Success Tracker
@@ -73,12 +79,21 @@ def load_tracker_state(session_id: str) -> dict:
     state = read_session_state(STATE_NAMESPACE, session_id, default)
     if now - state.get("last_update", 0) > TOOL_TRACKER_MAX_AGE:
         return default
+    # Ring buffer in memory; persisted as a plain list
+    for tool_failures in state.get("failures", {}).values():
+        tool_failures["recent_errors"] = deque(
+            tool_failures.get("recent_errors", ()), maxlen=RECENT_ERRORS_MAX
+        )
     return state
 
 
 def save_tracker_state(session_id: str, state: dict):
     """Save failure history state."""
     state["last_update"] = time.time()
+    for tool_failures in state.get("failures", {}).values():
+        recent = tool_failures.get("recent_errors")
+        if isinstance(recent, deque):
+            tool_failures["recent_errors"] = list(recent)
     write_session_state(STATE_NAMESPACE, state, session_id)
 
 
@@ -112,10 +127,45 @@ def match_error_pattern(error_msg: str) -> dict | None:
     return None
 
 
-def track_success(ctx: PostToolUseContext) -> list[str]:
+class ResultSummary(NamedTuple):
+    """Everything the analytics handlers need from a tool result."""
+    is_error: bool
+    error_msg: str
+    content_size: int
+    estimated_tokens: int
+    output: str
+    exit_code: int | None
+
+
+def _analyze_result_once(tool_result) -> ResultSummary:
+    """Inspect a raw tool result once and share the findings across handlers."""
+    is_error, error_msg = extract_error_info(tool_result)
+    content_size = get_content_size(tool_result)
+
+    output = ""
+    exit_code = None
+    if isinstance(tool_result, dict):
+        stdout = str(tool_result.get("stdout", ""))
+        stderr = str(tool_result.get("stderr", ""))
+        output = stdout + ("\n" + stderr if stderr else "")
+        code = tool_result.get("exit_code")
+        if code is None:
+            code = tool_result.get("exitCode")
+        exit_code = int(code) if code is not None else None
+
+    return ResultSummary(
+        is_error=is_error,
+        error_msg=error_msg,
+        content_size=content_size,
+        estimated_tokens=content_size // CHARS_PER_TOKEN,
+        output=output,
+        exit_code=exit_code,
+    )
+
+
+def track_success(ctx: PostToolUseContext, result: ResultSummary | None = None) -> list[str]:
     """Track tool success/failure. Returns list of messages."""
     tool_name = ctx.tool_name
-    tool_result = ctx.tool_result.raw
     session_id = get_session_id(ctx.raw)
 
     if not tool_name:
@@ -126,23 +176,28 @@ def track_success(ctx: PostToolUseContext) -> list[str]:
     if tool_name not in state["failures"]:
         state["failures"][tool_name] = {
             "count": 0,
-            "recent_errors": [],
+            "recent_errors": deque(maxlen=RECENT_ERRORS_MAX),
             "last_success": time.time()
         }
 
-    is_error, error_msg = extract_error_info(tool_result)
+    if result is None:
+        result = _analyze_result_once(ctx.tool_result.raw)
+    is_error, error_msg = result.is_error, result.error_msg
+    pattern_match = match_error_pattern(error_msg) if error_msg else None
     messages = []
 
-    if is_error or (error_msg and match_error_pattern(error_msg)):
+    if is_error or pattern_match:
         tool_failures = state["failures"][tool_name]
         tool_failures["count"] += 1
-        tool_failures["recent_errors"].append({
+        recent_errors = tool_failures.get("recent_errors")
+        if not isinstance(recent_errors, deque):
+            recent_errors = deque(recent_errors or (), maxlen=RECENT_ERRORS_MAX)
+            tool_failures["recent_errors"] = recent_errors
+        recent_errors.append({
             "msg": error_msg[:200],
             "time": time.time()
         })
-        tool_failures["recent_errors"] = tool_failures["recent_errors"][-10:]
 
-        pattern_match = match_error_pattern(error_msg)
         if pattern_match:
             messages.append(f"[Tool Tracker] {tool_name} error detected")
             messages.append(f"  Suggestion: {pattern_match['suggestion']}")
@@ -165,15 +220,45 @@ def track_success(ctx: PostToolUseContext) -> list[str]:
 # Token Tracker & Output Size Monitor
 # =============================================================================
 
-# Use cache abstraction with centralized config
-from hooks.hook_utils import create_ttl_cache
-_daily_stats_cache = create_ttl_cache(maxsize=Limits.DAILY_STATS_CACHE_MAXSIZE, ttl=Timeouts.DAILY_STATS_CACHE_TTL)
-_DAILY_STATS_KEY = "daily_stats"
+# Today's stats, resident for the process lifetime. This process's updates
+# are authoritative, so the copy is only replaced when the date changes.
+_daily_stats: dict | None = None
 
 # Token snapshots for load average calculation (like Linux 1m, 5m, 15m)
-TOKEN_SNAPSHOTS_FILE = Path.home() / ".claude" / "data" / "token-snapshots.jsonl"
+# Fixed-width little-endian records: (ts, total tokens, output tokens), 24 bytes each.
+# scripts/diagnostics/statusline.sh decodes them with od.
+TOKEN_SNAPSHOTS_FILE = Path.home() / ".claude" / "data" / "token-snapshots.bin"
+_SNAPSHOT_RECORD = struct.Struct("<QQQ")
+_SNAPSHOT_TS = struct.Struct("<Q")
 _last_snapshot_time = 0
 SNAPSHOT_INTERVAL = 10  # Minimum seconds between snapshots
+SNAPSHOT_BUFFER_SIZE = 64 * 1024
+
+# Append handle kept open for the process lifetime; flushed on prune and at exit
+_snapshot_fp = None
+
+
+def _get_snapshot_fp():
+    """Lazily open the snapshot file for buffered appends."""
+    global _snapshot_fp
+    if _snapshot_fp is None:
+        TOKEN_SNAPSHOTS_FILE.parent.mkdir(parents=True, exist_ok=True)
+        _snapshot_fp = open(TOKEN_SNAPSHOTS_FILE, "ab", buffering=SNAPSHOT_BUFFER_SIZE)
+    return _snapshot_fp
+
+
+def _close_snapshot_fp():
+    """Flush and close the snapshot handle (next write reopens it)."""
+    global _snapshot_fp
+    fp, _snapshot_fp = _snapshot_fp, None
+    if fp is not None:
+        try:
+            fp.close()
+        except OSError:
+            pass
+
+
+atexit.register(_close_snapshot_fp)
 
 
 def record_token_snapshot(total_input: int, total_output: int):
@@ -187,13 +272,13 @@ def record_token_snapshot(total_input: int, total_output: int):
     _last_snapshot_time = now
 
     try:
-        # Append snapshot
-        TOKEN_SNAPSHOTS_FILE.parent.mkdir(parents=True, exist_ok=True)
-        with open(TOKEN_SNAPSHOTS_FILE, "a") as f:
-            f.write(f'{{"ts":{now},"in":{total_input},"out":{total_output}}}\n')
+        # Append snapshot (buffered - no flush per record)
+        _get_snapshot_fp().write(_SNAPSHOT_RECORD.pack(now, total_input, total_output))
 
         # Prune old entries (keep last 20 minutes) - do this occasionally
         if now % 60 < SNAPSHOT_INTERVAL:  # ~once per minute
+            # Flush pending lines first; the prune rewrites the file
+            _close_snapshot_fp()
             prune_token_snapshots(now - 1200)
     except Exception as e:
         # Log first occurrence, suppress duplicates
@@ -202,45 +287,72 @@ def record_token_snapshot(total_input: int, total_output: int):
 
 
 def prune_token_snapshots(cutoff: int):
-    """Remove snapshots older than cutoff timestamp."""
+    """Remove snapshots older than cutoff timestamp.
+
+    Records are fixed-width and appended in time order, so the first record
+    at or after cutoff is found by binary search and only the tail is copied
+    forward. A trailing partial record is dropped.
+    """
     try:
         if not TOKEN_SNAPSHOTS_FILE.exists():
             return
-        lines = TOKEN_SNAPSHOTS_FILE.read_text().strip().split("\n")
-        # Keep lines where ts >= cutoff
-        recent = []
-        for line in lines:
-            if line:
-                try:
-                    # Quick parse - find ts value
-                    ts_start = line.find('"ts":') + 5
-                    ts_end = line.find(",", ts_start)
-                    ts = int(line[ts_start:ts_end])
-                    if ts >= cutoff:
-                        recent.append(line)
-                except (ValueError, IndexError):
-                    pass
-        TOKEN_SNAPSHOTS_FILE.write_text("\n".join(recent) + "\n" if recent else "")
+        with open(TOKEN_SNAPSHOTS_FILE, "rb") as src:
+            size = os.fstat(src.fileno()).st_size
+            record_size = _SNAPSHOT_RECORD.size
+            count = size // record_size
+            lo, hi = 0, count
+            while lo < hi:
+                mid = (lo + hi) // 2
+                src.seek(mid * record_size)
+                if _SNAPSHOT_TS.unpack(src.read(_SNAPSHOT_TS.size))[0] < cutoff:
+                    lo = mid + 1
+                else:
+                    hi = mid
+
+            offset = lo * record_size
+            end = count * record_size
+            if offset == 0 and end == size:
+                return  # Nothing to prune
+
+            tmp_path = TOKEN_SNAPSHOTS_FILE.with_suffix(".tmp")
+            src.seek(offset)
+            with open(tmp_path, "wb") as dst:
+                dst.write(src.read(end - offset))
+        os.replace(tmp_path, TOKEN_SNAPSHOTS_FILE)
     except Exception as e:
         from hooks.hook_utils import _log_once
         _log_once.warning("tool_analytics", "prune_error", str(e))
 
 
-def get_daily_log_path() -> Path:
-    """Get path to today's token log."""
-    today = datetime.now().strftime("%Y-%m-%d")
-    return TRACKER_DIR / f"tokens-{today}.json"
+# Today's date string, valid until the next local midnight
+_today_cache = {"until": 0.0, "str": ""}
+
+
+def _today_str() -> str:
+    """Return today's YYYY-MM-DD, re-running strftime only after midnight."""
+    if time.time() >= _today_cache["until"]:
+        now = datetime.now()
+        midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+        _today_cache["str"] = now.strftime("%Y-%m-%d")
+        _today_cache["until"] = midnight.timestamp()
+    return _today_cache["str"]
+
+
+def get_daily_log_path(date: str | None = None) -> Path:
+    """Get path to the token log for date (default: today)."""
+    return TRACKER_DIR / f"tokens-{date or _today_str()}.json"
 
 
 def load_daily_stats() -> dict:
-    """Load today's statistics with caching."""
-    today = datetime.now().strftime("%Y-%m-%d")
+    """Load today's statistics, reading the log only once per day."""
+    global _daily_stats
+    today = _today_str()
 
-    # Check cache - but invalidate if date changed
-    if _DAILY_STATS_KEY in _daily_stats_cache:
-        cached = _daily_stats_cache[_DAILY_STATS_KEY]
-        if cached.get("date") == today:
-            return cached
+    if _daily_stats is not None:
+        if _daily_stats.get("date") == today:
+            return _daily_stats
+        # Date rolled over: write out yesterday's pending stats first
+        flush_daily_stats()
 
     log_path = get_daily_log_path()
     default = {
@@ -251,35 +363,64 @@ def load_daily_stats() -> dict:
         "sessions": 0,
     }
     data = safe_load_json(log_path, default)
+    data["by_tool"] = Counter(data.get("by_tool") or {})
 
-    _daily_stats_cache[_DAILY_STATS_KEY] = data
+    _daily_stats = data
     return data
 
 
+# Debounced daily stats writes: latest unsaved stats + time of last write
+_stats_pending: dict | None = None
+_stats_last_flush = 0.0
+
+
+def flush_daily_stats():
+    """Write pending daily statistics to disk, if any."""
+    global _stats_pending, _stats_last_flush
+    stats, _stats_pending = _stats_pending, None
+    _stats_last_flush = time.time()
+    if stats is None:
+        return
+    TRACKER_DIR.mkdir(parents=True, exist_ok=True)
+    safe_save_json(get_daily_log_path(stats.get("date")), stats)
+
+
+atexit.register(flush_daily_stats)
+
+
 def save_daily_stats(stats: dict, force: bool = False):
-    """Save today's statistics with batching."""
-    _daily_stats_cache[_DAILY_STATS_KEY] = stats
+    """Save today's statistics, writing at most once per STATS_FLUSH_SECS.
+
+    Unwritten updates are kept in memory and flushed on the next due save
+    or at interpreter exit.
+    """
+    global _daily_stats, _stats_pending
+    _daily_stats = stats
+    _stats_pending = stats
 
-    if force or stats.get("tool_calls", 0) % Thresholds.STATS_FLUSH_INTERVAL == 0:
-        TRACKER_DIR.mkdir(parents=True, exist_ok=True)
-        log_path = get_daily_log_path()
-        safe_save_json(log_path, stats)
+    if force or time.time() - _stats_last_flush >= Timeouts.STATS_FLUSH_SECS:
+        flush_daily_stats()
 
 
-def track_tokens(ctx: PostToolUseContext) -> list[str]:
+def track_tokens(ctx: PostToolUseContext, result: ResultSummary | None = None) -> list[str]:
     """Track token usage. Returns list of messages if warning threshold reached."""
     tool_name = ctx.tool_name or "unknown"
     tool_input = ctx.tool_input.raw
-    tool_result = ctx.tool_result.raw
 
-    input_tokens = estimate_tokens(tool_input)
-    output_tokens = estimate_tokens(tool_result)
+    # Empty inputs skip serialization; output is estimated from its raw size
+    input_tokens = estimate_tokens(tool_input) if tool_input else 0
+    if result is None:
+        result = _analyze_result_once(ctx.tool_result.raw)
+    output_tokens = result.estimated_tokens
     total_tokens = input_tokens + output_tokens
 
     stats = load_daily_stats()
     stats["total_tokens"] += total_tokens
     stats["tool_calls"] += 1
-    stats["by_tool"][tool_name] = stats["by_tool"].get(tool_name, 0) + total_tokens
+    by_tool = stats["by_tool"]
+    if not isinstance(by_tool, Counter):
+        by_tool = stats["by_tool"] = Counter(by_tool)
+    by_tool[tool_name] += total_tokens
     save_daily_stats(stats)
 
     # Record snapshot for load average calculation
@@ -290,7 +431,7 @@ def track_tokens(ctx: PostToolUseContext) -> list[str]:
     if stats["total_tokens"] >= DAILY_WARNING_THRESHOLD:
         if stats["tool_calls"] % 50 == 0:
             messages.append(f"[Token Tracker] Daily usage: ~{stats['total_tokens']:,} tokens")
-            top_tools = heapq.nlargest(3, stats["by_tool"].items(), key=lambda x: x[1])
+            top_tools = by_tool.most_common(3)
             if top_tools:
                 tools_str = ", ".join(f"{t}: {c:,}" for t, c in top_tools)
                 messages.append(f"  Top tools: {tools_str}")
@@ -298,16 +439,17 @@ def track_tokens(ctx: PostToolUseContext) -> list[str]:
     return messages
 
 
-def check_output_size(ctx: PostToolUseContext) -> list[str]:
+def check_output_size(ctx: PostToolUseContext, result: ResultSummary | None = None) -> list[str]:
     """Check output size. Returns list of messages if too large."""
     tool_name = ctx.tool_name
-    tool_result = ctx.tool_result.raw
 
-    output_size = get_content_size(tool_result)
+    if result is None:
+        result = _analyze_result_once(ctx.tool_result.raw)
+    output_size = result.content_size
     if output_size == 0:
         return []
 
-    estimated_tokens = estimate_tokens(tool_result)
+    estimated_tokens = result.estimated_tokens
 
     warning_threshold = OUTPUT_WARNING_THRESHOLD
     critical_threshold = OUTPUT_CRITICAL_THRESHOLD
@@ -350,24 +492,34 @@ def is_build_command(command: str) -> bool:
     return False
 
 
+# Command substrings -> build tool, with tools listed in detection priority.
+# The lookahead reports every (possibly overlapping) occurrence in one scan.
+_BUILD_TOOL_PRIORITY = ('rust', 'npm', 'typescript', 'go', 'python', 'gcc_clang', 'java')
+_BUILD_TOOL_RANK = {tool: rank for rank, tool in enumerate(_BUILD_TOOL_PRIORITY)}
+_TOOL_TOKENS = {
+    'cargo': 'rust', 'rustc': 'rust',
+    'npm': 'npm', 'yarn': 'npm', 'pnpm': 'npm',
+    'tsc': 'typescript',
+    'go ': 'go',
+    'python': 'python', 'pip': 'python',
+    'gcc': 'gcc_clang', 'g++': 'gcc_clang', 'clang': 'gcc_clang',
+    'make': 'gcc_clang', 'cmake': 'gcc_clang', 'ninja': 'gcc_clang',
+    'gradle': 'java', 'mvn': 'java',
+}
+_TOOL_RE = re.compile('(?=(' + '|'.join(map(re.escape, _TOOL_TOKENS)) + '))')
+_TYPESCRIPT_RANK = _BUILD_TOOL_RANK['typescript']
+
+
 def detect_build_tool(command: str, output: str) -> str:
     """Detect which build tool was used."""
-    cmd_lower = command.lower()
-
-    if 'cargo' in cmd_lower or 'rustc' in cmd_lower:
-        return 'rust'
-    if 'npm' in cmd_lower or 'yarn' in cmd_lower or 'pnpm' in cmd_lower:
-        return 'npm'
-    if 'tsc' in cmd_lower or 'typescript' in output.lower():
+    best = min((_BUILD_TOOL_RANK[_TOOL_TOKENS[m]] for m in _TOOL_RE.findall(command.lower())),
+               default=len(_BUILD_TOOL_PRIORITY))
+    if best < _TYPESCRIPT_RANK:
+        return _BUILD_TOOL_PRIORITY[best]
+    if best == _TYPESCRIPT_RANK or 'typescript' in output.lower():
         return 'typescript'
-    if 'go ' in cmd_lower:
-        return 'go'
-    if 'python' in cmd_lower or 'pip' in cmd_lower:
-        return 'python'
-    if any(x in cmd_lower for x in ['gcc', 'g++', 'clang', 'make', 'cmake', 'ninja']):
-        return 'gcc_clang'
-    if 'gradle' in cmd_lower or 'mvn' in cmd_lower:
-        return 'java'
+    if best < len(_BUILD_TOOL_PRIORITY):
+        return _BUILD_TOOL_PRIORITY[best]
 
     # Detect from output
     if 'error[E' in output:
@@ -380,30 +532,77 @@ def detect_build_tool(command: str, output: str) -> str:
     return 'make'  # Default fallback
 
 
+def _combine_patterns(patterns: list) -> re.Pattern | None:
+    """Join a tool's error patterns into one alternation used as a line prefilter."""
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{pattern.pattern})" for pattern, _ in patterns))
+
+
+# One combined scan per line; per-pattern search only runs on lines that hit
+_BUILD_ERROR_PREFILTER = {
+    tool: _combine_patterns(patterns) for tool, patterns in BUILD_ERROR_PATTERNS.items()
+}
+
+# Lines worth looking at: a tool pattern hit or any case of "error"
+_ERROR_WORD_RE = re.compile("(?i:error)")
+_BUILD_ERROR_CANDIDATES = {
+    tool: re.compile(f"{prefilter.pattern}|{_ERROR_WORD_RE.pattern}") if prefilter is not None else _ERROR_WORD_RE
+    for tool, prefilter in _BUILD_ERROR_PREFILTER.items()
+}
+BUILD_ERRORS_MAX = 15
+
+
 def extract_build_errors(output: str, tool: str) -> list:
-    """Extract error messages from build output."""
-    errors = []
-    patterns = BUILD_ERROR_PATTERNS.get(tool, BUILD_ERROR_PATTERNS.get('make', []))
+    """Extract error messages from build output.
 
-    for line in output.split('\n'):
-        line = line.strip()
+    Candidate lines are located by searching the whole buffer, so lines that
+    can't yield an error are never split out or stripped.
+    """
+    errors = []
+    seen = set()
+    if tool not in BUILD_ERROR_PATTERNS:
+        tool = 'make'
+    patterns = BUILD_ERROR_PATTERNS.get(tool, [])
+    prefilter = _BUILD_ERROR_PREFILTER.get(tool)
+    candidates = _BUILD_ERROR_CANDIDATES.get(tool, _ERROR_WORD_RE)
+
+    pos = 0
+    while len(errors) < BUILD_ERRORS_MAX:
+        hit = candidates.search(output, pos)
+        if hit is None:
+            break
+        # Expand the hit to its line; the next search starts on the line after
+        nl = output.rfind('\n', pos, hit.start())
+        start = nl + 1 if nl != -1 else pos
+        end = output.find('\n', hit.start())
+        if end == -1:
+            end = len(output)
+        pos = end + 1
+
+        line = output[start:end].strip()
         if not line:
             continue
 
-        for pattern, category in patterns:
-            match = pattern.search(line)
-            if match:
-                errors.append({
-                    'line': line[:200],
-                    'match': match.group(0)[:150],
-                })
-                break
+        if prefilter is not None and prefilter.search(line):
+            for pattern, category in patterns:
+                match = pattern.search(line)
+                if match:
+                    errors.append({
+                        'line': line[:200],
+                        'match': match.group(0)[:150],
+                    })
+                    seen.add(line[:200])
+                    break
 
-        if len(errors) < 20 and 'error' in line.lower() and line not in [e['line'] for e in errors]:
-            if not any(skip in line.lower() for skip in ['warning', 'note:', 'help:']):
-                errors.append({'line': line[:200], 'match': None})
+        if len(errors) < 20:
+            line_lower = line.lower()
+            if 'error' in line_lower and line not in seen:
+                if not any(skip in line_lower for skip in ['warning', 'note:', 'help:']):
+                    errors.append({'line': line[:200], 'match': None})
+                    seen.add(line[:200])
 
-    return errors[:15]
+    return errors[:BUILD_ERRORS_MAX]
 
 
 def get_build_suggestions(errors: list, output: str) -> list:
@@ -418,29 +617,47 @@ def get_build_suggestions(errors: list, output: str) -> list:
     return list(suggestions)[:5]
 
 
+# One pass for error/warning markers and the first "N errors" summary
+_ERROR_WARNING_RE = re.compile(
+    r'\b(?P<e>error[:\[])|\b(?P<w>warning[:\[])|(?P<n>\d+)(?=\s+error)',
+    re.IGNORECASE,
+)
+
+
 def count_errors_warnings(output: str) -> tuple:
     """Count errors and warnings in output."""
-    error_count = len(re.findall(r'\berror[:\[]', output, re.IGNORECASE))
-    warning_count = len(re.findall(r'\bwarning[:\[]', output, re.IGNORECASE))
-
-    # Also check for "X errors" pattern
-    match = re.search(r'(\d+)\s+error', output, re.IGNORECASE)
-    if match:
-        error_count = max(error_count, int(match.group(1)))
+    error_count = 0
+    warning_count = 0
+    summary_count = None
+
+    for match in _ERROR_WARNING_RE.finditer(output):
+        kind = match.lastgroup
+        if kind == 'e':
+            error_count += 1
+        elif kind == 'w':
+            warning_count += 1
+        elif summary_count is None:
+            # Also honor an "X errors" summary line (first one wins)
+            summary_count = int(match.group('n'))
+
+    if summary_count is not None:
+        error_count = max(error_count, summary_count)
 
     return error_count, warning_count
 
 
-def analyze_build(ctx: PostToolUseContext) -> list[str]:
+def analyze_build(ctx: PostToolUseContext, result: ResultSummary | None = None) -> list[str]:
     """Analyze build output and return summary messages."""
     if ctx.tool_name != 'Bash':
         return []
 
+    if result is None:
+        result = _analyze_result_once(ctx.tool_result.raw)
     command = ctx.tool_input.command
-    output = ctx.tool_result.output
+    output = result.output
 
     # Get exit code
-    exit_code = ctx.tool_result.exit_code
+    exit_code = result.exit_code
     if exit_code is None:
         # Try to detect from output
         if 'error' in output.lower() and ('make: ***' in output or 'FAILED' in output):
@@ -484,9 +701,6 @@ BATCH_SIMILARITY_THRESHOLD = Thresholds.BATCH_SIMILARITY_THRESHOLD
 BATCH_CLEANUP_INTERVAL = Timeouts.CLEANUP_INTERVAL
 BATCH_MAX_AGE = Timeouts.STATE_MAX_AGE
 
-# Pre-compiled regex for normalize_content
-_BATCH_WHITESPACE_RE = re.compile(r'\s+')
-
 # Rate limiting for cleanup
 _batch_last_cleanup_time = 0
 
@@ -495,13 +709,16 @@ _batch_state = HookState("batch_detector", use_session=True, max_age_secs=BATCH_
 
 
 def _batch_load_state(session_id: str) -> dict:
-    """Load edit history state for session using HookState."""
-    return _batch_state.load(session_id, default={"edits": [], "writes": [], "last_update": time.time()})
+    """Load edit history state for session (snapshot + journaled deltas)."""
+    return _batch_state.load_journal(
+        session_id, default={"edits": [], "writes": [], "last_update": time.time()}, apply=_batch_apply_delta
+    )
 
 
-def _batch_save_state(session_id: str, state: dict):
-    """Save edit history state using HookState."""
-    _batch_state.save(state, session_id)
+def _batch_record(session_id: str, state: dict, delta: dict):
+    """Apply an edit/write delta and append it to the session journal."""
+    _batch_apply_delta(state, delta)
+    _batch_state.append_delta(session_id, delta, live_entries=len(state["edits"]) + len(state["writes"]))
 
 
 def _batch_maybe_cleanup():
@@ -516,7 +733,7 @@ def _batch_maybe_cleanup():
 
 def _batch_normalize_content(content: str) -> str:
     """Normalize content for comparison (remove whitespace variations)."""
-    return _BATCH_WHITESPACE_RE.sub(' ', content.strip().lower())
+    return " ".join(content.lower().split())
 
 
 def _batch_extract_pattern(old_string: str, new_string: str) -> dict:
@@ -530,42 +747,196 @@ def _batch_extract_pattern(old_string: str, new_string: str) -> dict:
     }
 
 
-def _batch_find_similar_edits(current: dict, history: list) -> list:
-    """Find edits with similar patterns."""
-    similar = []
-    curr_pattern = current.get("pattern", {})
+def _batch_is_similar_edit(curr_pattern: dict, hist_pattern: dict) -> bool:
+    """Check whether two edit patterns describe the same transformation."""
     curr_old_norm = curr_pattern.get("old_normalized", "")
-    curr_new_norm = curr_pattern.get("new_normalized", "")
-    curr_old_len = curr_pattern.get("old_len", 0)
-    curr_new_len = curr_pattern.get("new_len", 0)
-    curr_is_rename = curr_pattern.get("is_rename")
-
-    for edit in history:
-        hist_pattern = edit.get("pattern", {})
-        if curr_old_norm == hist_pattern.get("old_normalized") or curr_new_norm == hist_pattern.get("new_normalized"):
-            similar.append(edit)
-            continue
-        hist_old_len = hist_pattern.get("old_len", 0)
-        hist_new_len = hist_pattern.get("new_len", 0)
-        hist_is_rename = hist_pattern.get("is_rename")
-        if (abs(curr_old_len - hist_old_len) < 20 and
-            abs(curr_new_len - hist_new_len) < 20 and
-            curr_is_rename == hist_is_rename and
-            curr_old_norm[:30] == hist_pattern.get("old_normalized", "")[:30]):
-            similar.append(edit)
+    if (curr_old_norm == hist_pattern.get("old_normalized") or
+            curr_pattern.get("new_normalized", "") == hist_pattern.get("new_normalized")):
+        return True
+    return (abs(curr_pattern.get("old_len", 0) - hist_pattern.get("old_len", 0)) < 20 and
+            abs(curr_pattern.get("new_len", 0) - hist_pattern.get("new_len", 0)) < 20 and
+            curr_pattern.get("is_rename") == hist_pattern.get("is_rename") and
+            curr_old_norm[:30] == hist_pattern.get("old_normalized", "")[:30])
+
+
+def _batch_text_keys(pattern: dict) -> tuple[str, str]:
+    """Index keys for exact old/new normalized text matches."""
+    return ("o" + stable_hash(pattern.get("old_normalized", "")),
+            "n" + stable_hash(pattern.get("new_normalized", "")))
+
+
+def _batch_len_key(pattern: dict, seq: int) -> list:
+    """Sort key for the length index: (is_rename, old_len, seq)."""
+    return [1 if pattern.get("is_rename") else 0, pattern.get("old_len", 0), seq]
+
+
+def _batch_index_edit(index: dict, pattern: dict, seq: int):
+    """Add an edit to the length and exact-text indexes."""
+    bisect.insort(index["by_len"], _batch_len_key(pattern, seq))
+    for key in _batch_text_keys(pattern):
+        index["by_text"].setdefault(key, []).append(seq)
+
+
+def _batch_unindex_edit(index: dict, pattern: dict, seq: int):
+    """Remove an edit from the length and exact-text indexes."""
+    by_len = index["by_len"]
+    entry = _batch_len_key(pattern, seq)
+    i = bisect.bisect_left(by_len, entry)
+    if i < len(by_len) and by_len[i] == entry:
+        del by_len[i]
+    for key in _batch_text_keys(pattern):
+        seqs = index["by_text"].get(key)
+        if seqs and seq in seqs:
+            seqs.remove(seq)
+            if not seqs:
+                del index["by_text"][key]
+
+
+def _batch_build_edit_index(edits: list) -> dict:
+    """Build edit indexes from scratch (legacy state or ad-hoc history)."""
+    index = {"by_len": [], "by_text": {}}
+    for i, edit in enumerate(edits):
+        _batch_index_edit(index, edit.get("pattern", {}), edit.get("seq", i))
+    return index
+
+
+def _batch_find_similar_edits(current: dict, history: list, index: dict | None = None) -> list:
+    """Find edits with similar patterns.
+
+    Candidates come from a range scan of the (is_rename, old_len) index plus
+    exact-text lookups, so only neighbouring edits are compared. Without an
+    index one is built from ``history`` for the call.
+    """
+    if not history:
+        return []
+    if index is None:
+        index = _batch_build_edit_index(history)
+    curr_pattern = current.get("pattern", {})
+    base = history[0].get("seq", 0)
+
+    candidates = set()
+    for key in _batch_text_keys(curr_pattern):
+        candidates.update(index["by_text"].get(key, ()))
+    rename, old_len, _ = _batch_len_key(curr_pattern, 0)
+    by_len = index["by_len"]
+    lo = bisect.bisect_left(by_len, [rename, old_len - 19])
+    hi = bisect.bisect_left(by_len, [rename, old_len + 20])
+    candidates.update(entry[2] for entry in by_len[lo:hi])
+
+    similar = []
+    for seq in sorted(candidates):
+        pos = seq - base
+        if 0 <= pos < len(history):
+            edit = history[pos]
+            if _batch_is_similar_edit(curr_pattern, edit.get("pattern", {})):
+                similar.append(edit)
+    return similar
 
+
+def _batch_write_bucket(extension: str, size: int) -> str:
+    """Bucket key for writes: same extension, 500-char size band."""
+    return f"{extension}|{size // 500}"
+
+
+def _batch_find_similar_writes(current: dict, history: list, buckets: dict) -> list:
+    """Find writes with the same extension and a size within 500 chars.
+
+    Any match lies in the current size band or one of its two neighbours.
+    """
+    if not history:
+        return []
+    base = history[0]["seq"]
+    ext, size = current["extension"], current["size"]
+    band = size // 500
+    seqs = []
+    for b in (band - 1, band, band + 1):
+        seqs.extend(buckets.get(f"{ext}|{b}", ()))
+    similar = []
+    for seq in sorted(seqs):
+        pos = seq - base
+        if 0 <= pos < len(history):
+            w = history[pos]
+            if w["extension"] == ext and abs(w["size"] - size) < 500:
+                similar.append(w)
     return similar
 
 
+def _batch_ensure_indexes(state: dict):
+    """Attach sequence numbers and indexes to state saved by older versions."""
+    if "edit_index" not in state:
+        edits = state.setdefault("edits", [])
+        for i, edit in enumerate(edits):
+            edit["seq"] = i
+        state["edit_seq"] = len(edits)
+        state["edit_index"] = _batch_build_edit_index(edits)
+    if "write_buckets" not in state:
+        buckets = {}
+        writes = state.setdefault("writes", [])
+        for i, w in enumerate(writes):
+            w["seq"] = i
+            buckets.setdefault(_batch_write_bucket(w["extension"], w["size"]), []).append(i)
+        state["write_seq"] = len(writes)
+        state["write_buckets"] = buckets
+
+
+def _batch_apply_delta(state: dict, delta: dict):
+    """Append a recorded edit or write to state, keeping the newest 50 of each."""
+    _batch_ensure_indexes(state)
+    if delta.get("op") == "edit":
+        edit = delta["e"]
+        seq = edit["seq"] = state["edit_seq"]
+        state["edit_seq"] = seq + 1
+        state["edits"].append(edit)
+        _batch_index_edit(state["edit_index"], edit.get("pattern", {}), seq)
+        while len(state["edits"]) > 50:
+            oldest = state["edits"].pop(0)
+            _batch_unindex_edit(state["edit_index"], oldest.get("pattern", {}), oldest["seq"])
+    elif delta.get("op") == "write":
+        write = delta["w"]
+        seq = write["seq"] = state["write_seq"]
+        state["write_seq"] = seq + 1
+        state["writes"].append(write)
+        buckets = state["write_buckets"]
+        buckets.setdefault(_batch_write_bucket(write["extension"], write["size"]), []).append(seq)
+        while len(state["writes"]) > 50:
+            oldest = state["writes"].pop(0)
+            key = _batch_write_bucket(oldest["extension"], oldest["size"])
+            seqs = buckets.get(key)
+            if seqs and oldest["seq"] in seqs:
+                seqs.remove(oldest["seq"])
+                if not seqs:
+                    del buckets[key]
+
+
+def _batch_suffix(path: str) -> str:
+    """Lowercased file extension, matching Path(path).suffix without a Path."""
+    ext = os.path.splitext(path)[1]
+    return "" if ext == "." else ext.lower()
+
+
+def _batch_common_dir(paths: list) -> str:
+    """os.path.commonpath of paths, folded over a running prefix.
+
+    Paths already under the prefix are skipped with a startswith check, so
+    commonpath only reparses paths that shorten it.
+    """
+    prefix = os.path.commonpath(paths[:1])
+    for path in paths[1:]:
+        if prefix and (path == prefix or path.startswith(prefix + os.sep)):
+            continue
+        # os.path.commonpath has no pathlib equivalent
+        prefix = os.path.commonpath([prefix, path])
+    return prefix
+
+
 def _batch_suggest_command(edits: list, current_edit: dict) -> str:
     """Generate a suggestion for batching similar edits."""
     all_edits = edits + [current_edit]
     files = [e["file"] for e in all_edits]
-    extensions = set(Path(f).suffix.lower() for f in files)
+    extensions = {e["extension"] if "extension" in e else _batch_suffix(e["file"]) for e in all_edits}
 
     try:
-        # os.path.commonpath has no pathlib equivalent
-        common_dir = os.path.commonpath(files)
+        common_dir = _batch_common_dir(files)
     except ValueError:
         common_dir = "."
 
@@ -583,14 +954,18 @@ def _batch_suggest_command(edits: list, current_edit: dict) -> str:
     return f"code-mode batch edit across {glob_pattern}"
 
 
-def detect_batch(ctx: PostToolUseContext) -> list[str]:
-    """Detect repetitive edit patterns. Returns list of messages."""
+def detect_batch(ctx: PostToolUseContext, result: ResultSummary | None = None) -> list[str]:
+    """Detect repetitive edit patterns. Returns list of messages.
+
+    result is accepted for a uniform analysis signature; edits don't need it.
+    """
     if ctx.tool_name not in ("Edit", "Write"):
         return []
 
     session_id = get_session_id(ctx.raw)
     _batch_maybe_cleanup()
     state = _batch_load_state(session_id)
+    _batch_ensure_indexes(state)
     messages = []
 
     if ctx.tool_name == "Edit":
@@ -603,15 +978,16 @@ def detect_batch(ctx: PostToolUseContext) -> list[str]:
                 "file": file_path,
                 "old_string": old_string,
                 "new_string": new_string,
+                "extension": _batch_suffix(file_path),
                 "pattern": _batch_extract_pattern(old_string, new_string),
                 "time": time.time()
             }
-            similar = _batch_find_similar_edits(current_edit, state["edits"])
+            similar = _batch_find_similar_edits(current_edit, state["edits"], state["edit_index"])
 
             if len(similar) >= BATCH_SIMILARITY_THRESHOLD - 1:
                 suggestion = _batch_suggest_command(similar, current_edit)
                 affected_files = [e["file"] for e in similar] + [file_path]
-                unique_files = list(set(Path(f).name for f in affected_files))
+                unique_files = list({os.path.basename(f) for f in affected_files})
 
                 msg = f"[Batch Detector] {len(similar) + 1} similar edits detected"
                 msg += f"\n  Files: {', '.join(unique_files[:5])}"
@@ -623,8 +999,7 @@ def detect_batch(ctx: PostToolUseContext) -> list[str]:
 
                 log_event("tool_analytics", "batch_suggestion", {"count": len(similar) + 1, "files": len(unique_files)})
 
-            state["edits"].append(current_edit)
-            state["edits"] = state["edits"][-50:]
+            _batch_record(session_id, state, {"op": "edit", "e": current_edit})
 
     elif ctx.tool_name == "Write":
         file_path = ctx.tool_input.file_path
@@ -633,20 +1008,16 @@ def detect_batch(ctx: PostToolUseContext) -> list[str]:
         if file_path and content:
             current_write = {
                 "file": file_path,
-                "content_hash": hash(content[:200]),
-                "extension": Path(file_path).suffix.lower(),
+                "content_hash": stable_hash(content[:200]),
+                "extension": _batch_suffix(file_path),
                 "size": len(content),
                 "time": time.time()
             }
-            similar_writes = [
-                w for w in state["writes"]
-                if w["extension"] == current_write["extension"]
-                and abs(w["size"] - current_write["size"]) < 500
-            ]
+            similar_writes = _batch_find_similar_writes(current_write, state["writes"], state["write_buckets"])
 
             if len(similar_writes) >= BATCH_SIMILARITY_THRESHOLD - 1:
                 files = [w["file"] for w in similar_writes] + [file_path]
-                unique_files = list(set(Path(f).name for f in files))
+                unique_files = list({os.path.basename(f) for f in files})
 
                 msg = f"[Batch Detector] {len(similar_writes) + 1} similar file creations"
                 msg += f"\n  Files: {', '.join(unique_files[:5])}"
@@ -655,10 +1026,8 @@ def detect_batch(ctx: PostToolUseContext) -> list[str]:
 
                 log_event("tool_analytics", "batch_write_suggestion", {"count": len(similar_writes) + 1, "files": len(unique_files)})
 
-            state["writes"].append(current_write)
-            state["writes"] = state["writes"][-50:]
+            _batch_record(session_id, state, {"op": "write", "w": current_write})
 
-    _batch_save_state(session_id, state)
     return messages
 
 
@@ -666,30 +1035,26 @@ def detect_batch(ctx: PostToolUseContext) -> list[str]:
 # Combined Handler
 # =============================================================================
 
+# Per-tool analyses, in message order; build analysis only applies to Bash and
+# batch detection only to Edit/Write, so other tools skip those calls entirely
+_DEFAULT_ANALYTICS = (track_success, track_tokens, check_output_size)
+_ANALYTICS_BY_TOOL = {
+    "Bash": _DEFAULT_ANALYTICS + (analyze_build,),
+    "Edit": _DEFAULT_ANALYTICS + (detect_batch,),
+    "Write": _DEFAULT_ANALYTICS + (detect_batch,),
+}
+
+
 def track_tool_analytics(raw: dict) -> dict | None:
     """Combined handler for tool success tracking, token tracking, output monitoring, build analysis, and batch detection."""
     ctx = PostToolUseContext(raw)
     all_messages = []
 
-    # Track tool success/failure
-    success_messages = track_success(ctx)
-    all_messages.extend(success_messages)
-
-    # Track tokens (always runs, updates stats)
-    token_messages = track_tokens(ctx)
-    all_messages.extend(token_messages)
-
-    # Check output size
-    size_messages = check_output_size(ctx)
-    all_messages.extend(size_messages)
-
-    # Analyze build failures (for Bash commands)
-    build_messages = analyze_build(ctx)
-    all_messages.extend(build_messages)
+    # Walk the tool result once; every analysis below reads the summary
+    result = _analyze_result_once(ctx.tool_result.raw)
 
-    # Detect batch operations (for Edit/Write)
-    batch_messages = detect_batch(ctx)
-    all_messages.extend(batch_messages)
+    for analyze in _ANALYTICS_BY_TOOL.get(ctx.tool_name, _DEFAULT_ANALYTICS):
+        all_messages.extend(analyze(ctx, result))
 
     if all_messages:
         return Response.message(" | ".join(all_messages[:3]), event="PostToolUse")
@@ -1,17 +1,59 @@
 """
-Transcript converter handler - JSONL to JSON transcript conversion.
+Transcript converter handler - raw transcript to normalized NDJSON conversion.
 
 Provides transcript file discovery, parsing, and conversion
 for session_end dispatcher.
 """
-import json
+import multiprocessing
 import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator
 
+import msgspec
+
+from hooks.config import fast_json_loads
 from hooks.hook_utils import log_event
-from hooks.hook_utils.io import iter_jsonl
+from hooks.hook_utils.logging import flush_log_queue
+from hooks.hook_utils.io import iter_jsonl, iter_lines_bytes
+
+# Unknown types (datetime, Path, ...) serialize via str(), like json's default=str
+_output_encoder = msgspec.json.Encoder(enc_hook=str)
+
+
+class _TimestampOnly(msgspec.Struct):
+    """Converted message decoded for dedup; other fields are skipped."""
+    timestamp: Any = None
+
+
+_timestamp_decoder = msgspec.json.Decoder(_TimestampOnly)
+
+
+TRANSCRIPT_FILENAME = "transcript.jsonl"
+TRANSCRIPT_MAX_DEPTH = 3
+
+
+def _find_transcripts(base: Path, max_depth: int = TRANSCRIPT_MAX_DEPTH) -> Iterator[Path]:
+    """Yield transcript files under base, descending at most max_depth levels.
+
+    Uses os.scandir so directory entries are classified from the cached
+    d_type, without building a Path or calling stat per entry.
+    Symlinked directories are not followed.
+    """
+    stack = [(str(base), 0)]
+    while stack:
+        dir_path, depth = stack.pop()
+        try:
+            with os.scandir(dir_path) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        if depth < max_depth:
+                            stack.append((entry.path, depth + 1))
+                    elif entry.name == TRANSCRIPT_FILENAME:
+                        yield Path(entry.path)
+        except OSError:
+            continue
 
 
 def find_transcript_files() -> list[Path]:
@@ -26,13 +68,12 @@ def find_transcript_files() -> list[Path]:
         Path("/tmp") / "claude-code",
     ]
 
-    transcript_files = []
-    for base_path in paths_to_check:
-        if base_path.exists():
-            for transcript in base_path.rglob("transcript.jsonl"):
-                transcript_files.append(transcript)
-
-    return transcript_files
+    return [
+        transcript
+        for base_path in paths_to_check
+        if base_path.exists()
+        for transcript in _find_transcripts(base_path)
+    ]
 
 
 def parse_jsonl(file_path: Path) -> list[dict[str, Any]]:
@@ -99,62 +140,167 @@ def extract_messages(entries: list[dict[str, Any]]) -> list[dict[str, Any]]:
     return messages
 
 
+def _parse_jsonl_from(file_path: Path, offset: int) -> tuple[list[dict[str, Any]], int]:
+    """Parse JSONL entries appended after a byte offset.
+
+    An unterminated final line that does not parse yet (still being written)
+    is left for the next run.
+
+    Returns:
+        Tuple of (parsed entries, offset just past the last consumed line).
+    """
+    with open(file_path, "rb") as f:
+        f.seek(offset)
+        data = f.read()
+
+    entries = []
+    *lines, partial = data.split(b"\n")
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            entries.append(fast_json_loads(line))
+        except ValueError:
+            continue
+
+    consumed = len(data) - len(partial)
+    if partial.strip():
+        try:
+            entries.append(fast_json_loads(partial))
+            consumed = len(data)
+        except ValueError:
+            pass
+
+    return entries, offset + consumed
+
+
+def _read_timestamps(messages_file: Path) -> set:
+    """Collect timestamps of already-converted messages from NDJSON output."""
+    timestamps = set()
+    with open(messages_file, "rb") as f:
+        for line in iter_lines_bytes(f):
+            if not line:
+                continue
+            try:
+                timestamps.add(_timestamp_decoder.decode(line).timestamp)
+            except ValueError:
+                continue
+    return timestamps
+
+
 def convert_transcript(transcript_path: Path, output_dir: Path, mode: str = "append") -> Path:
-    """Convert a single transcript file to JSON.
+    """Convert a single transcript file to NDJSON messages.
+
+    Writes one message per line to ``<session_id>.jsonl`` plus a
+    ``<session_id>.meta.json`` sidecar (session_id, converted_at, source,
+    message_count, last_offset). Append mode only writes new messages, and
+    the recorded transcript byte offset lets later runs parse only lines
+    appended since then.
 
     Args:
         transcript_path: Path to source transcript.jsonl
-        output_dir: Directory to write output JSON
+        output_dir: Directory to write output files
         mode: "append" to merge with existing, "overwrite" to replace
 
     Returns:
-        Path to the output JSON file.
+        Path to the output NDJSON messages file.
     """
-    entries = parse_jsonl(transcript_path)
-    messages = extract_messages(entries)
-
     session_id = transcript_path.parent.name
     if not session_id or session_id == "projects":
         session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
 
-    output_file = output_dir / f"{session_id}.json"
+    messages_file = output_dir / f"{session_id}.jsonl"
+    meta_file = output_dir / f"{session_id}.meta.json"
 
-    existing_messages = []
-    if mode == "append" and output_file.exists():
+    existing_meta = None
+    start_offset = 0
+    if mode == "append" and meta_file.exists() and messages_file.exists():
         try:
-            with open(output_file, "r", encoding="utf-8") as f:
-                existing = json.load(f)
-                existing_messages = existing.get("messages", [])
-        except (json.JSONDecodeError, ValueError) as e:
+            with open(meta_file, "rb") as f:
+                existing_meta = fast_json_loads(f.read())
+            # Resume only if the same transcript has grown (not been rewritten)
+            last_offset = existing_meta.get("last_offset", 0)
+            if (existing_meta.get("source") == str(transcript_path)
+                    and 0 < last_offset <= transcript_path.stat().st_size):
+                start_offset = last_offset
+        except ValueError as e:
             log_event("transcript_converter", "corrupt_json", {
-                "file": str(output_file),
+                "file": str(meta_file),
                 "error": str(e)
             }, "warning")
             # Fall back to overwrite mode on corruption
+            existing_meta = None
 
-    existing_timestamps = {m.get("timestamp") for m in existing_messages}
-    new_messages = [m for m in messages if m.get("timestamp") not in existing_timestamps]
-    all_messages = existing_messages + new_messages
+    entries, last_offset = _parse_jsonl_from(transcript_path, start_offset)
+    messages = extract_messages(entries)
+
+    if existing_meta is not None:
+        # Already-converted messages win; only new timestamps are appended
+        existing_timestamps = _read_timestamps(messages_file)
+        new_messages = [m for m in messages if m.get("timestamp") not in existing_timestamps]
+        message_count = existing_meta.get("message_count", 0) + len(new_messages)
+        write_mode = "ab"
+    else:
+        new_messages = messages
+        message_count = len(messages)
+        write_mode = "wb"
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    with open(messages_file, write_mode) as f:
+        f.write(b"".join(_output_encoder.encode(m) + b"\n" for m in new_messages))
 
-    output = {
+    meta = {
         "session_id": session_id,
         "converted_at": datetime.now().isoformat(),
         "source": str(transcript_path),
-        "message_count": len(all_messages),
-        "messages": all_messages,
+        "message_count": message_count,
+        "last_offset": last_offset,
     }
+    with open(meta_file, "wb") as f:
+        f.write(msgspec.json.format(_output_encoder.encode(meta), indent=2))
 
-    output_dir.mkdir(parents=True, exist_ok=True)
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(output, f, indent=2, default=str)
+    return messages_file
+
+
+# Upper bound on worker processes for converting many sessions at once
+TRANSCRIPT_CONVERT_WORKERS = 8
+
+
+def _convert_group(transcripts: list[Path], output_dir: Path, mode: str) -> list[tuple[str, str | None, str | None]]:
+    """Convert transcripts that share an output file, one after another.
+
+    Results are returned (not logged) so the parent logs them in one place.
 
-    return output_file
+    Returns:
+        List of (source, output or None, error or None) tuples.
+    """
+    results = []
+    for transcript in transcripts:
+        try:
+            results.append((str(transcript), str(convert_transcript(transcript, output_dir, mode)), None))
+        except Exception as e:
+            results.append((str(transcript), None, str(e)))
+    return results
+
+
+def _convert_group_worker(transcripts: list[Path], output_dir: Path, mode: str) -> list[tuple[str, str | None, str | None]]:
+    """Process-pool entry point for _convert_group.
+
+    Pool workers exit without running atexit hooks, so queued log events
+    (e.g. corrupt_json warnings) are flushed explicitly.
+    """
+    try:
+        return _convert_group(transcripts, output_dir, mode)
+    finally:
+        flush_log_queue()
 
 
 def run_converter() -> list[str]:
     """Run transcript conversion if enabled.
 
-    Checks CLAUDE_TRANSCRIPT_CONVERT environment variable.
+    Checks CLAUDE_TRANSCRIPT_CONVERT environment variable. Sessions are
+    independent, so when several need converting they are spread across a
+    process pool; transcripts mapping to the same output stay in one worker.
 
     Returns:
         List of converted file paths (as strings).
@@ -165,21 +311,38 @@ def run_converter() -> list[str]:
     mode = os.environ.get("CLAUDE_TRANSCRIPT_MODE", "append")
     output_dir = Path.home() / ".claude" / "data" / "transcripts"
 
-    transcript_files = find_transcript_files()
-    converted = []
+    # Group by session directory (the output file name) so no two workers
+    # ever write the same output
+    groups: dict[str, list[Path]] = {}
+    for transcript in find_transcript_files():
+        groups.setdefault(transcript.parent.name, []).append(transcript)
+
+    if len(groups) <= 1:
+        results = [r for group in groups.values() for r in _convert_group(group, output_dir, mode)]
+    else:
+        # spawn, not fork: the dispatcher and log worker threads are running
+        workers = min(TRANSCRIPT_CONVERT_WORKERS, os.cpu_count() or 1, len(groups))
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            futures = [executor.submit(_convert_group_worker, group, output_dir, mode) for group in groups.values()]
+            results = []
+            for future, group in zip(futures, groups.values()):
+                try:
+                    results.extend(future.result())
+                except Exception as e:
+                    results.extend((str(t), None, str(e)) for t in group)
 
-    for transcript in transcript_files:
-        try:
-            output = convert_transcript(transcript, output_dir, mode)
-            converted.append(str(output))
+    converted = []
+    for source, output, error in results:
+        if output is not None:
+            converted.append(output)
             log_event("transcript_converter", "converted", {
-                "source": str(transcript),
-                "output": str(output)
+                "source": source,
+                "output": output
             })
-        except Exception as e:
+        else:
             log_event("transcript_converter", "error", {
-                "file": str(transcript),
-                "error": str(e)
+                "file": source,
+                "error": error
             }, level="error")
 
     return converted
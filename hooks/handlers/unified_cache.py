@@ -11,22 +11,49 @@ Runs on:
 # Handler metadata for dispatcher auto-discovery
 APPLIES_TO_PRE = ["Task", "WebFetch"]
 APPLIES_TO_POST = ["Task", "WebFetch"]
+import atexit
 import hashlib
+import os
+import threading
 import time
+from collections import defaultdict
 from dataclasses import dataclass
 
-from diskcache import Cache
 from rapidfuzz import fuzz, process
 
 from hooks.config import Timeouts, Thresholds, Limits, CACHE_DIR
-from hooks.hook_utils import log_event
+from hooks.hook_utils import log_event, file_lock
 from hooks.hook_sdk import PreToolUseContext, PostToolUseContext, Response
 
+
+def _load_cache_backend() -> tuple[type, dict]:
+    """Pick the Cache class and the extra options to construct it with.
+
+    The Rust backend (diskcache-rs, same Cache API) is for slow or network
+    filesystems; opt-in via CLAUDE_CACHE_BACKEND=rs, falls back to diskcache.
+    Hook processes share the cache, so its file locking is turned on.
+    """
+    if os.environ.get("CLAUDE_CACHE_BACKEND", "").lower() == "rs":
+        try:
+            from diskcache_rs import Cache as RsCache
+            return RsCache, {"use_file_locking": True}
+        except ImportError:
+            pass
+    from diskcache import Cache as DiskCache
+    return DiskCache, {}
+
+
+Cache, _CACHE_OPTIONS = _load_cache_backend()
+
 # Cache directories
 EXPLORATION_CACHE_DIR = CACHE_DIR / "exploration"
 RESEARCH_CACHE_DIR = CACHE_DIR / "research"
 STATS_CACHE_DIR = CACHE_DIR / "stats"
 
+# Research cache: skip pages larger than this; store only a prefix as summary
+RESEARCH_MAX_CONTENT_CHARS = 50000
+RESEARCH_SUMMARY_CHARS = 2000
+
 
 @dataclass
 class CacheConfig:
@@ -56,56 +83,99 @@ CACHE_CONFIGS = {
 # Lazy-initialized caches
 _caches: dict[str, Cache] = {}
 
-# In-memory index: cwd -> set of cache keys (for O(1) lookup in find_fuzzy_match)
-_cwd_index: dict[str, set[str]] = {}
+# In-memory index: cwd -> {cache_key: (lowercased prompt, timestamp)}
+# Lets find_fuzzy_match filter and score without reading entries from disk.
+_cwd_index: dict[str, dict[str, tuple[str, float]]] = {}
+# The index is also persisted under this key so later processes load it
+# with one read instead of touching every entry
+CWD_INDEX_KEY = "__cwd_index__"
+# Whether _cwd_index has been warm-started from the persisted index
+_index_built = False
+_index_lock = threading.Lock()
 
 
 def _get_cache(name: str) -> Cache:
-    """Get or create a cache instance."""
-    if name not in _caches:
+    """Get or create a cache instance (single dict lookup once created)."""
+    cache = _caches.get(name)
+    if cache is None:
         cfg = CACHE_CONFIGS[name]
         cache_dir = EXPLORATION_CACHE_DIR if name == "exploration" else RESEARCH_CACHE_DIR
-        _caches[name] = Cache(
+        cache = _caches[name] = Cache(
             str(cache_dir),
             size_limit=cfg.max_entries * 10000,  # ~10KB per entry estimate
             eviction_policy="least-recently-used",
+            **_CACHE_OPTIONS,
         )
-    return _caches[name]
+    return cache
 
 
 def _get_stats_cache() -> Cache:
     """Get stats cache."""
-    if "stats" not in _caches:
-        _caches["stats"] = Cache(str(STATS_CACHE_DIR))
-    return _caches["stats"]
+    cache = _caches.get("stats")
+    if cache is None:
+        cache = _caches["stats"] = Cache(str(STATS_CACHE_DIR), **_CACHE_OPTIONS)
+    return cache
 
 
 def get_cache_key(content: str) -> str:
-    """Generate cache key from content."""
-    return hashlib.md5(content.lower().encode()).hexdigest()[:16]
+    """Generate case-insensitive cache key from content (16 hex chars)."""
+    return hashlib.blake2b(content.lower().encode(), digest_size=8).hexdigest()
 
 
-def _update_stat(cache_name: str, stat_name: str, increment: int = 1) -> None:
-    """Update stats in cache."""
+def get_url_key(url: str) -> str:
+    """Generate cache key for a URL (16 hex chars).
+
+    URL paths are case-sensitive, so unlike get_cache_key this skips lowercasing.
+    """
+    return hashlib.blake2b(url.encode(), digest_size=8).hexdigest()
+
+
+# Buffered stat increments ("cache:stat" -> delta), flushed in one batch
+STATS_FLUSH_EVERY = 32
+_pending_stats: defaultdict[str, int] = defaultdict(int)
+_pending_stat_count = 0
+
+
+def flush_stats() -> None:
+    """Write buffered stat increments to the stats cache."""
+    global _pending_stat_count
+    if not _pending_stats:
+        return
+    pending = dict(_pending_stats)
+    _pending_stats.clear()
+    _pending_stat_count = 0
     try:
         stats = _get_stats_cache()
-        key = f"{cache_name}:{stat_name}"
-        current = stats.get(key, 0)
-        stats.set(key, current + increment)
+        for key, delta in pending.items():
+            stats.incr(key, delta, default=0)
     except Exception as e:
         # Log first occurrence, suppress duplicates for 5 minutes
         from hooks.hook_utils import _log_once
         _log_once.warning("unified_cache", "stats_error", str(e))
 
 
-def get_exploration_entry(cache_key: str, cfg: CacheConfig) -> dict | None:
+atexit.register(flush_stats)
+
+
+def _update_stat(cache_name: str, stat_name: str, increment: int = 1) -> None:
+    """Buffer a stat increment; flushed every STATS_FLUSH_EVERY updates and at exit."""
+    global _pending_stat_count
+    _pending_stats[f"{cache_name}:{stat_name}"] += increment
+    _pending_stat_count += 1
+    if _pending_stat_count >= STATS_FLUSH_EVERY:
+        flush_stats()
+
+
+def get_exploration_entry(cache_key: str, cfg: CacheConfig, now: float | None = None) -> dict | None:
     """Get exploration cache entry by key."""
     cache = _get_cache("exploration")
     entry = cache.get(cache_key)
 
     if entry and isinstance(entry, dict):
+        if now is None:
+            now = time.time()
         # Check TTL manually since we want fine-grained control
-        if time.time() - entry.get("timestamp", 0) < cfg.ttl_seconds:
+        if now - entry.get("timestamp", 0) < cfg.ttl_seconds:
             return entry
         # Expired - delete it
         cache.delete(cache_key)
@@ -113,18 +183,60 @@ def get_exploration_entry(cache_key: str, cfg: CacheConfig) -> dict | None:
     return None
 
 
+def _index_entry(index: dict, cache_key: str, entry: dict) -> None:
+    """Add an exploration entry's prompt and timestamp to a cwd index."""
+    cwd = entry.get("cwd")
+    if cwd:
+        prompt_lower = (entry.get("prompt") or "").lower()
+        index.setdefault(cwd, {})[cache_key] = (prompt_lower, entry.get("timestamp", 0))
+
+
+def _build_cwd_index(cfg: CacheConfig) -> None:
+    """Warm-start the cwd index from the persisted index.
+
+    Runs once per process so fuzzy matching sees entries saved by earlier
+    hook processes, not just ones saved in this process.
+    """
+    global _index_built
+    with _index_lock:
+        if _index_built:
+            return
+        try:
+            stored = _get_cache("exploration").get(CWD_INDEX_KEY)
+            if isinstance(stored, dict):
+                cutoff = time.time() - cfg.ttl_seconds
+                for cwd, keys in stored.items():
+                    live = {key: item for key, item in keys.items() if item[1] >= cutoff}
+                    if live:
+                        _cwd_index.setdefault(cwd, {}).update(live)
+        except Exception as e:
+            log_event("unified_cache", "index_build_error", {"error": str(e)}, "warning")
+        _index_built = True
+
+
 def save_exploration_entry(cache_key: str, entry: dict, cfg: CacheConfig) -> None:
-    """Save exploration cache entry and update cwd index."""
+    """Save exploration cache entry and update the cwd index."""
     try:
         cache = _get_cache("exploration")
         cache.set(cache_key, entry, expire=cfg.ttl_seconds)
 
         # Update cwd index for O(1) fuzzy match lookup
-        cwd = entry.get("cwd")
-        if cwd:
-            if cwd not in _cwd_index:
-                _cwd_index[cwd] = set()
-            _cwd_index[cwd].add(cache_key)
+        _index_entry(_cwd_index, cache_key, entry)
+
+        # Persist the index, dropping expired keys so it stays bounded. The
+        # file lock makes the read-modify-write atomic across hook processes
+        # (diskcache-rs transact() only excludes other threads)
+        cutoff = time.time() - cfg.ttl_seconds
+        with file_lock(os.path.join(cache.directory, CWD_INDEX_KEY)), cache.transact():
+            stored = cache.get(CWD_INDEX_KEY)
+            if not isinstance(stored, dict):
+                stored = {}
+            _index_entry(stored, cache_key, entry)
+            stored = {
+                cwd: live for cwd, keys in stored.items()
+                if (live := {key: item for key, item in keys.items() if item[1] >= cutoff})
+            }
+            cache.set(CWD_INDEX_KEY, stored, expire=cfg.ttl_seconds)
     except Exception as e:
         log_event("unified_cache", "save_error", {"error": str(e)}, "warning")
 
@@ -151,62 +263,78 @@ def save_research_entry(cache_key: str, entry: dict, cfg: CacheConfig) -> None:
         log_event("unified_cache", "save_error", {"error": str(e)}, "warning")
 
 
-def find_fuzzy_match(prompt: str, cwd: str, cfg: CacheConfig) -> dict | None:
+def _length_can_match(len_a: int, len_b: int, threshold_pct: int) -> bool:
+    """Check whether two lengths allow a fuzz.ratio score >= threshold_pct.
+
+    fuzz.ratio is 100 * (1 - indel / (len_a + len_b)) and the indel distance
+    is at least |len_a - len_b|, so the best possible score is
+    200 * min(len_a, len_b) / (len_a + len_b).
+    """
+    return 200 * min(len_a, len_b) >= threshold_pct * (len_a + len_b)
+
+
+def find_fuzzy_match(prompt: str, cwd: str, cfg: CacheConfig, now: float | None = None) -> dict | None:
     """Find similar cached entry using fuzzy matching.
 
-    Uses cwd index for O(1) key lookup instead of iterating all cache keys.
+    Scores prompts held in the cwd index, so only the matched entry is read
+    from the cache. Candidates whose length rules out reaching the threshold
+    are skipped before scoring.
     """
-    cache = _get_cache("exploration")
-    now = time.time()
+    if now is None:
+        now = time.time()
     cutoff = now - cfg.ttl_seconds
+    prompt_lower = prompt.lower()
 
-    # Use cwd index for O(1) lookup instead of iterating all keys
-    indexed_keys = _cwd_index.get(cwd, set())
-    if not indexed_keys:
+    if not _index_built:
+        _build_cwd_index(cfg)
+    prompt_len = len(prompt_lower)
+    threshold_pct = int(cfg.similarity_threshold * 100)
+
+    indexed = _cwd_index.get(cwd)
+    if not indexed:
         return None
 
+    # Parallel lists: extractOne returns the winning index into candidates
     candidates = []
-    candidate_map = {}
+    candidate_keys = []
     expired_keys = []
 
-    for key in indexed_keys:
+    for key, (cached_prompt, timestamp) in indexed.items():
         if len(candidates) >= Limits.MAX_FUZZY_SEARCH_ENTRIES:
             break
 
-        entry = cache.get(key)
-        if not entry or not isinstance(entry, dict):
-            expired_keys.append(key)
-            continue
-
         # Check TTL
-        if entry.get("timestamp", 0) < cutoff:
+        if timestamp < cutoff:
             expired_keys.append(key)
             continue
 
-        cached_prompt = (entry.get("prompt") or "").lower()
-        if cached_prompt:
+        if cached_prompt and _length_can_match(prompt_len, len(cached_prompt), threshold_pct):
             candidates.append(cached_prompt)
-            candidate_map[cached_prompt] = entry
+            candidate_keys.append(key)
 
     # Clean up expired keys from index
-    if expired_keys and cwd in _cwd_index:
-        _cwd_index[cwd] -= set(expired_keys)
+    for key in expired_keys:
+        del indexed[key]
 
     if not candidates:
         return None
 
-    prompt_lower = prompt.lower()
-    threshold_pct = int(cfg.similarity_threshold * 100)
     result = process.extractOne(
         prompt_lower,
         candidates,
         scorer=fuzz.ratio,
+        processor=None,  # Both sides are already lowercased
         score_cutoff=threshold_pct
     )
 
     if result:
-        matched_prompt, score, _ = result
-        return candidate_map.get(matched_prompt)
+        _, score, index = result
+        matched_key = candidate_keys[index]
+        entry = _get_cache("exploration").get(matched_key)
+        if entry and isinstance(entry, dict):
+            return entry
+        # Evicted from disk since it was indexed
+        indexed.pop(matched_key, None)
 
     return None
 
@@ -224,9 +352,10 @@ def handle_exploration_pre(raw: dict) -> dict | None:
     cfg = CACHE_CONFIGS["exploration"]
 
     # Exact match
-    cache_key = get_cache_key(f"{cwd}:{prompt}")
-    entry = get_exploration_entry(cache_key, cfg)
+    # One clock read shared by the exact and fuzzy lookups
     now = time.time()
+    cache_key = get_cache_key(f"{cwd}:{prompt}")
+    entry = get_exploration_entry(cache_key, cfg, now)
 
     if entry:
         age_mins = int((now - entry["timestamp"]) / 60)
@@ -237,7 +366,7 @@ def handle_exploration_pre(raw: dict) -> dict | None:
 
     # Fuzzy match
     if cfg.fuzzy_match:
-        matched = find_fuzzy_match(prompt, cwd, cfg)
+        matched = find_fuzzy_match(prompt, cwd, cfg, now)
         if matched:
             age_mins = int((now - matched["timestamp"]) / 60)
             summary = (matched.get("summary") or "")[:200]
@@ -289,9 +418,8 @@ def handle_research_pre(raw: dict) -> dict | None:
         return None
 
     cfg = CACHE_CONFIGS["research"]
-    cache_key = get_cache_key(url)
+    cache_key = get_url_key(url)
     entry = get_research_entry(cache_key, cfg)
-    now = time.time()
 
     if entry:
         _update_stat(cfg.name, "hits")
@@ -315,20 +443,21 @@ def handle_research_post(raw: dict) -> dict | None:
         return None
 
     content = ctx.tool_result.content
+    size = len(content)
 
-    if not content:
+    if not size:
         log_event("unified_cache", "research_skip", {"reason": "no_content", "url": url[:80]})
         return None
-    if len(content) > 50000:
-        log_event("unified_cache", "research_skip", {"reason": "too_large", "size": len(content), "url": url[:80]})
+    if size > RESEARCH_MAX_CONTENT_CHARS:
+        log_event("unified_cache", "research_skip", {"reason": "too_large", "size": size, "url": url[:80]})
         return None
 
     cfg = CACHE_CONFIGS["research"]
-    cache_key = get_cache_key(url)
+    cache_key = get_url_key(url)
 
     entry = {
         "url": url,
-        "summary": content[:2000],
+        "summary": content[:RESEARCH_SUMMARY_CHARS],
         "timestamp": time.time()
     }
     save_research_entry(cache_key, entry, cfg)
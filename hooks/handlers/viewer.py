@@ -4,7 +4,6 @@ Viewer handler - session viewer daemon management.
 Provides viewer process checking and launching for session_start dispatcher.
 """
 import os
-import subprocess
 import time
 from pathlib import Path
 
@@ -13,41 +12,66 @@ VIEWER_SCRIPT = Path.home() / ".claude" / "scripts" / "diagnostics" / "session-v
 DATA_DIR = Path.home() / ".claude" / "data"
 PID_FILE = DATA_DIR / "session-viewer.pid"
 DEFAULT_PORT = 5111
+VIEWER_CHECK_INTERVAL = 60
 
+# Parsed PID keyed by PID_FILE mtime, so unchanged files are not re-read.
+# Replaced as a whole tuple, so readers never see an mtime/pid mix.
+_pid_cache: tuple[int, int] | None = None  # (st_mtime_ns, pid)
 
 def is_viewer_running() -> bool:
     """Check if viewer process is running.
 
+    The PID file is only re-read when its mtime changes.
+
     Returns:
         True if viewer is running, False otherwise.
     """
-    if PID_FILE.exists():
-        try:
-            pid = int(PID_FILE.read_text().strip())
-            os.kill(pid, 0)  # Check if process exists
-            return True
-        except (ValueError, ProcessLookupError, PermissionError):
-            PID_FILE.unlink(missing_ok=True)
+    global _pid_cache
+    try:
+        mtime_ns = os.stat(PID_FILE).st_mtime_ns
+    except OSError:
+        _pid_cache = None
+        return False
+    try:
+        if _pid_cache is not None and _pid_cache[0] == mtime_ns:
+            pid = _pid_cache[1]
+        else:
+            with open(PID_FILE, "rb") as f:
+                pid = int(f.read())
+            _pid_cache = (mtime_ns, pid)
+        os.kill(pid, 0)  # Check if process exists
+        return True
+    except (ValueError, OSError):
+        _pid_cache = None
+        PID_FILE.unlink(missing_ok=True)
     return False
 
 
 def start_viewer() -> str | None:
     """Start the session viewer in background.
 
+    Uses os.posix_spawn rather than subprocess.Popen so launching does not
+    fork (and copy the page tables of) the hook process.
+
     Returns:
         Status message with URL, or None on failure.
     """
     if not VIEWER_SCRIPT.exists():
         return None
 
+    script = str(VIEWER_SCRIPT)
     try:
-        subprocess.Popen(
-            [str(VIEWER_SCRIPT), "--daemon", "start"],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
+        os.posix_spawn(
+            script,
+            [script, "--daemon", "start"],
+            os.environ,
+            file_actions=[
+                (os.POSIX_SPAWN_OPEN, 1, os.devnull, os.O_WRONLY, 0),
+                (os.POSIX_SPAWN_OPEN, 2, os.devnull, os.O_WRONLY, 0),
+            ],
         )
         return f"Session viewer: http://localhost:{DEFAULT_PORT}"
-    except Exception:
+    except OSError:
         return None
 
 
@@ -62,18 +86,16 @@ def maybe_start_viewer() -> str | None:
     session_marker = DATA_DIR / ".viewer_checked"
     now = time.time()
 
-    # Rate limit: only check once per minute
-    if session_marker.exists():
+    # Rate limit: only check once per minute (marker mtime is the last check)
+    try:
+        if now - os.stat(session_marker).st_mtime < VIEWER_CHECK_INTERVAL:
+            return None
+        os.utime(session_marker, None)
+    except FileNotFoundError:
         try:
-            last_check = float(session_marker.read_text().strip())
-            if now - last_check < 60:
-                return None
-        except (ValueError, OSError):
+            session_marker.touch()
+        except OSError:
             pass
-
-    # Update check timestamp
-    try:
-        session_marker.write_text(str(now))
     except OSError:
         pass
 
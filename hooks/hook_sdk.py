@@ -21,8 +21,9 @@ Usage:
             return Response.deny("Not allowed")
         return None
 """
+import atexit
 import fnmatch
-import json
+import heapq
 import os
 import re
 import sys
@@ -39,13 +40,19 @@ from hooks.hook_utils import (
     log_event,
     read_state,
     write_state,
+    read_session_state,
+    write_session_state,
     get_session_id,
+    file_lock,
     # Event detection - canonical implementations in hook_utils
     detect_event,
     is_post_tool_use,
     is_pre_tool_use,
     get_tool_response,
 )
+# Module handle so SESSION_STATE_DIR is read at call time (tests redirect it)
+from hooks.hook_utils import session as _session
+from hooks.config import Limits, fast_json_dumps, fast_json_loads
 
 # Event types
 EventType = Literal[
@@ -66,24 +73,24 @@ EventType = Literal[
 # Context Dataclasses
 # =============================================================================
 
-@dataclass
+@dataclass(slots=True, init=False)
 class ToolInput:
     """Parsed tool input with typed accessors.
 
-    Supports attribute access via __getattr__ for dynamic fields.
-    Explicit properties below provide IDE autocomplete and type hints.
+    file_path and command, read by most handlers, are plain attributes set
+    at construction; other known fields are properties, and get() covers
+    anything else.
     """
-    raw: dict = field(default_factory=dict)
+    raw: dict
+    file_path: str = field(repr=False, compare=False)
+    command: str = field(repr=False, compare=False)
 
-    # Explicit properties for IDE autocomplete and type hints
-    @property
-    def file_path(self) -> str:
-        return self.raw.get("file_path", "")
-
-    @property
-    def command(self) -> str:
-        return self.raw.get("command", "")
+    def __init__(self, raw: dict | None = None):
+        self.raw = raw = {} if raw is None else raw
+        self.file_path = raw.get("file_path", "")
+        self.command = raw.get("command", "")
 
+    # Explicit properties for IDE autocomplete and type hints
     @property
     def content(self) -> str:
         return self.raw.get("content", "")
@@ -96,23 +103,48 @@ class ToolInput:
     def prompt(self) -> str:
         return self.raw.get("prompt", "")
 
-    def __getattr__(self, name: str) -> Any:
-        """Fallback for any attribute not explicitly defined."""
-        if name.startswith('_'):
-            raise AttributeError(name)
-        return self.raw.get(name)
+    @property
+    def path(self) -> str:
+        return self.raw.get("path", "")
+
+    @property
+    def old_string(self) -> str:
+        return self.raw.get("old_string", "")
+
+    @property
+    def new_string(self) -> str:
+        return self.raw.get("new_string", "")
+
+    @property
+    def url(self) -> str:
+        return self.raw.get("url", "")
+
+    @property
+    def subagent_type(self) -> str:
+        return self.raw.get("subagent_type", "")
+
+    @property
+    def output_mode(self) -> str:
+        return self.raw.get("output_mode", "")
+
+    @property
+    def head_limit(self) -> int | None:
+        return self.raw.get("head_limit")
 
     def get(self, key: str, default: Any = None) -> Any:
         return self.raw.get(key, default)
 
 
-@dataclass
+@dataclass(slots=True, init=False)
 class ToolResult:
     """Parsed tool result with typed accessors.
 
     Provides convenience properties for exit code, stdout/stderr, and success status.
     """
-    raw: dict = field(default_factory=dict)
+    raw: dict
+
+    def __init__(self, raw: dict | None = None):
+        self.raw = {} if raw is None else raw
 
     @property
     def exit_code(self) -> int | None:
@@ -156,20 +188,21 @@ class ToolResult:
     def success(self) -> bool:
         return self.exit_code == 0 if self.exit_code is not None else True
 
-    def __getattr__(self, name: str) -> Any:
-        """Fallback for any attribute not explicitly defined."""
-        if name.startswith('_'):
-            raise AttributeError(name)
-        return self.raw.get(name)
-
     def get(self, key: str, default: Any = None) -> Any:
         return self.raw.get(key, default)
 
 
-@dataclass
+# Contexts are built once per dispatched handler call, so they define a
+# plain __init__ instead of the generated one plus __post_init__; the
+# dataclass decorator still supplies __eq__ and __repr__ over raw.
+
+@dataclass(slots=True, init=False)
 class BaseContext:
     """Base context with common fields."""
-    raw: dict = field(default_factory=dict)
+    raw: dict
+
+    def __init__(self, raw: dict | None = None):
+        self.raw = {} if raw is None else raw
 
     @property
     def session_id(self) -> str:
@@ -183,27 +216,28 @@ class BaseContext:
     def transcript_path(self) -> str:
         return self.raw.get("transcript_path", "")
 
-    def __getattr__(self, name: str) -> Any:
-        """Fallback for any attribute not explicitly defined."""
-        if name.startswith('_'):
-            raise AttributeError(name)
-        return self.raw.get(name)
-
     def get(self, key: str, default: Any = None) -> Any:
         return self.raw.get(key, default)
 
 
-@dataclass
+@dataclass(slots=True, init=False)
 class PreToolUseContext(BaseContext):
-    """Context for PreToolUse hooks."""
+    """Context for PreToolUse hooks.
 
-    @property
-    def tool_name(self) -> str:
-        return self.raw.get("tool_name", "")
+    tool_name and the tool_input wrapper are set once at construction rather
+    than computed on every access.
+    """
+    tool_name: str = field(repr=False, compare=False)
+    tool_input: ToolInput = field(repr=False, compare=False)
+
+    def __init__(self, raw: dict | None = None):
+        self.raw = raw = {} if raw is None else raw
+        self.tool_name = raw.get("tool_name", "")
+        self.tool_input = ToolInput(raw.get("tool_input", {}))
 
     @property
-    def tool_input(self) -> ToolInput:
-        return ToolInput(self.raw.get("tool_input", {}))
+    def tool_use_id(self) -> str:
+        return self.raw.get("tool_use_id", "")
 
     # Convenience properties
     @property
@@ -231,22 +265,27 @@ class PreToolUseContext(BaseContext):
         return self.tool_name in ("Grep", "Glob")
 
 
-@dataclass
+@dataclass(slots=True, init=False)
 class PostToolUseContext(BaseContext):
-    """Context for PostToolUse hooks."""
-
-    @property
-    def tool_name(self) -> str:
-        return self.raw.get("tool_name", "")
+    """Context for PostToolUse hooks.
 
-    @property
-    def tool_input(self) -> ToolInput:
-        return ToolInput(self.raw.get("tool_input", {}))
+    tool_name and the tool_input/tool_result wrappers are set once at
+    construction rather than computed on every access.
+    """
+    tool_name: str = field(repr=False, compare=False)
+    tool_input: ToolInput = field(repr=False, compare=False)
+    tool_result: ToolResult = field(repr=False, compare=False)
+
+    def __init__(self, raw: dict | None = None):
+        self.raw = raw = {} if raw is None else raw
+        self.tool_name = raw.get("tool_name", "")
+        self.tool_input = ToolInput(raw.get("tool_input", {}))
+        # Claude Code uses "tool_response" for PostToolUse hooks
+        self.tool_result = ToolResult(raw.get("tool_response") or raw.get("tool_result", {}))
 
     @property
-    def tool_result(self) -> ToolResult:
-        # Claude Code uses "tool_response" for PostToolUse hooks
-        return ToolResult(self.raw.get("tool_response") or self.raw.get("tool_result", {}))
+    def tool_use_id(self) -> str:
+        return self.raw.get("tool_use_id", "")
 
     @property
     def duration_ms(self) -> int:
@@ -257,10 +296,26 @@ class PostToolUseContext(BaseContext):
         return self.duration_ms / 1000.0
 
 
+# Context class per event; anything else gets BaseContext
+_CONTEXT_BY_EVENT: dict[str, type[BaseContext]] = {
+    "PreToolUse": PreToolUseContext,
+    "PostToolUse": PostToolUseContext,
+}
+
+
 # =============================================================================
 # Response Builders
 # =============================================================================
 
+# Response.allow() serialized around its reason, so the common PreToolUse
+# allow result is emitted without encoding the nested dict
+_ALLOW_JSON_HEAD = (
+    b'{"hookSpecificOutput":{"hookEventName":"PreToolUse",'
+    b'"permissionDecision":"allow","permissionDecisionReason":'
+)
+_ALLOW_JSON_TAIL = b"}}"
+
+
 class Response:
     """Response builders for hook output."""
 
@@ -296,6 +351,27 @@ class Response:
             }
         }
 
+    @staticmethod
+    def to_json(result: dict) -> bytes:
+        """Serialize a hook result for stdout.
+
+        Results shaped like allow() only encode the reason string and splice
+        it into a pre-serialized template; anything else goes through msgspec.
+        """
+        hook_output = result.get("hookSpecificOutput")
+        if (
+            len(result) == 1
+            and type(hook_output) is dict
+            and len(hook_output) == 3
+            and hook_output.get("permissionDecision") == "allow"
+            and hook_output.get("hookEventName") == "PreToolUse"
+            and type(hook_output.get("permissionDecisionReason")) is str
+        ):
+            return (_ALLOW_JSON_HEAD
+                    + fast_json_dumps(hook_output["permissionDecisionReason"])
+                    + _ALLOW_JSON_TAIL)
+        return fast_json_dumps(result)
+
 
 # =============================================================================
 # HookState - Simplified State Management for Handlers
@@ -329,14 +405,23 @@ class HookState:
         self.namespace = namespace
         self.use_session = use_session
         self.max_age_secs = max_age_secs
+        # Journal path -> {"state", "offset", "entries"} replayed in this process
+        self._mirrors: dict[Path, dict] = {}
 
-    def load(self, session_id: str = None, default: dict = None, max_age_secs: int = None) -> dict:
+    def load(
+        self,
+        session_id: str = None,
+        default: dict = None,
+        max_age_secs: int = None,
+        now: float = None
+    ) -> dict:
         """Load state, returning default if missing or expired.
 
         Args:
             session_id: Session ID (required if use_session=True)
             default: Default value if state doesn't exist or is expired
             max_age_secs: Override instance max_age_secs for this load
+            now: Current time for the TTL check (read from the clock if None)
 
         Returns:
             State dict (loaded or default copy)
@@ -345,34 +430,35 @@ class HookState:
             default = {}
 
         if self.use_session:
-            from hooks.hook_utils.session import read_session_state
             state = read_session_state(self.namespace, session_id, default)
         else:
             state = read_state(self.namespace, default)
 
-        # Check TTL expiry
-        max_age = max_age_secs if max_age_secs is not None else self.max_age_secs
-        if max_age is not None:
-            last_update = state.get("_updated", 0)
-            if time.time() - last_update > max_age:
-                return default.copy()
+        # No TTL (the common case): nothing to check
+        max_age = self.max_age_secs if max_age_secs is None else max_age_secs
+        if max_age is None:
+            return state
 
+        if now is None:
+            now = time.time()
+        if now - state.get("_updated", 0) > max_age:
+            return default.copy()
         return state
 
-    def save(self, data: dict, session_id: str = None) -> bool:
+    def save(self, data: dict, session_id: str = None, now: float = None) -> bool:
         """Save state with automatic timestamp.
 
         Args:
             data: State dict to save
             session_id: Session ID (required if use_session=True)
+            now: Timestamp to record (read from the clock if None)
 
         Returns:
             True on success
         """
-        data["_updated"] = time.time()
+        data["_updated"] = time.time() if now is None else now
 
         if self.use_session:
-            from hooks.hook_utils.session import write_session_state
             return write_session_state(self.namespace, data, session_id)
         else:
             return write_state(self.namespace, data)
@@ -383,7 +469,8 @@ class HookState:
         session_id: str = None,
         max_entries: int = None,
         items_key: str = None,
-        time_key: str = "_time"
+        time_key: str = "_time",
+        now: float = None
     ) -> bool:
         """Save state with optional pruning of old entries.
 
@@ -396,6 +483,7 @@ class HookState:
             items_key: Key in state containing items to prune (e.g., "reads", "searches")
                       If None, no pruning is performed
             time_key: Key in each item containing timestamp (used for pruning order)
+            now: Timestamp to record (read from the clock if None)
 
         Returns:
             True on success
@@ -404,19 +492,19 @@ class HookState:
         if max_entries and items_key and items_key in data:
             items = data.get(items_key, {})
             if len(items) > max_entries:
-                sorted_items = sorted(
+                # Newest first; only max_entries items are ever kept in order
+                newest = heapq.nlargest(
+                    max_entries,
                     items.items(),
                     key=lambda x: x[1].get(time_key, 0),
-                    reverse=True
                 )
-                data[items_key] = dict(sorted_items[:max_entries])
+                data[items_key] = dict(newest)
 
         # Add timestamp
-        data["_updated"] = time.time()
+        data["_updated"] = time.time() if now is None else now
 
         # Save
         if self.use_session:
-            from hooks.hook_utils.session import write_session_state
             return write_session_state(self.namespace, data, session_id)
         else:
             return write_state(self.namespace, data)
@@ -436,6 +524,175 @@ class HookState:
         updated = updater(data)
         return self.save(updated, session_id)
 
+    # -------------------------------------------------------------------------
+    # Append-only journal (session state only)
+    #
+    # The session JSON holds a snapshot; each change is appended as one
+    # [timestamp, delta] line to <session>.<namespace>.jsonl and replayed on
+    # load. compact() folds the journal back into the snapshot.
+    # -------------------------------------------------------------------------
+
+    def _journal_path(self, session_id: str) -> Path | None:
+        """Journal file for a session, or None when state isn't persisted."""
+        if not self.use_session or not session_id or session_id == "default":
+            return None
+        return _session.SESSION_STATE_DIR / f"{session_id}.{self.namespace}.jsonl"
+
+    def load_journal(self, session_id: str, default: dict, apply: Callable[[dict, dict], None]) -> dict:
+        """Load snapshot plus journaled deltas.
+
+        The replayed state is mirrored in memory and reused while the journal
+        hasn't been changed by another process.
+
+        Args:
+            session_id: Session ID
+            default: Default state if missing or expired
+            apply: Function applying one delta to the state in place
+
+        Returns:
+            Live state dict (mutate it only through apply + append_delta)
+        """
+        path = self._journal_path(session_id)
+        if path is None:
+            return self.load(session_id, default)
+
+        try:
+            size = path.stat().st_size
+        except OSError:
+            size = 0
+        mirror = self._mirrors.get(path)
+        if mirror is not None and mirror["offset"] == size:
+            return mirror["state"]
+
+        # Round-trip to detach the nested containers from the session cache
+        state = fast_json_loads(fast_json_dumps(read_session_state(self.namespace, session_id, default)))
+        has_data = "_updated" in state
+        entries = 0
+        offset = 0
+        if size:
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+            except OSError:
+                data = b""
+            offset = data.rfind(b"\n") + 1
+            for line in data[:offset].splitlines():
+                try:
+                    ts, delta = fast_json_loads(line)
+                except (ValueError, TypeError):
+                    continue
+                apply(state, delta)
+                state["_updated"] = ts
+                entries += 1
+
+        if self.max_age_secs is not None and time.time() - state.get("_updated", 0) > self.max_age_secs:
+            state = fast_json_loads(fast_json_dumps(default))
+            if has_data or entries:
+                # Reset the snapshot too, or new deltas would replay onto it
+                self.compact(session_id, state, offset)
+                return state
+
+        self._mirrors[path] = {"state": state, "offset": offset, "entries": entries}
+        return state
+
+    def append_delta(self, session_id: str, delta: dict, live_entries: int = 0) -> bool:
+        """Append one delta to the journal, compacting when it's mostly dead.
+
+        Call after applying the delta to the state returned by load_journal.
+
+        Args:
+            session_id: Session ID
+            delta: JSON-serializable change record
+            live_entries: Current working-set size; the journal is compacted
+                once it holds more than Limits.JOURNAL_COMPACT_RATIO times this
+
+        Returns:
+            True on success
+        """
+        path = self._journal_path(session_id)
+        if path is None:
+            return False
+        mirror = self._mirrors.get(path)
+        now = time.time()
+        line = fast_json_dumps([now, delta]) + b"\n"
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            while True:
+                with open(path, "ab") as f:
+                    with file_lock(f):
+                        # compact() may have unlinked the file we opened
+                        # while we waited for the lock; reopen the new one
+                        if not _is_open_file(f, path):
+                            continue
+                        start = f.seek(0, os.SEEK_END)
+                        f.write(line)
+                        break
+        except OSError:
+            return False
+
+        if mirror is None:
+            return True
+        if mirror["offset"] != start:
+            # Another process appended or compacted; rebuild on next load
+            del self._mirrors[path]
+            return True
+        mirror["state"]["_updated"] = now
+        mirror["offset"] = start + len(line)
+        mirror["entries"] += 1
+        if mirror["entries"] > Limits.JOURNAL_COMPACT_RATIO * max(live_entries, 1):
+            self.compact(session_id, mirror["state"])
+        return True
+
+    def compact(self, session_id: str, state: dict, offset: int | None = None) -> bool:
+        """Write state as the new snapshot and drop the journal.
+
+        Holds the journal lock across the save and unlink, and gives up when
+        the journal has grown past offset: another process appended deltas
+        that state doesn't include, and dropping them would lose them.
+
+        Args:
+            session_id: Session ID
+            state: Live state to snapshot
+            offset: Journal size state was replayed up to (defaults to the
+                mirrored offset)
+
+        Returns:
+            True when the journal was folded into the snapshot
+        """
+        path = self._journal_path(session_id)
+        if path is None:
+            return self.save(state, session_id)
+        if offset is None:
+            mirror = self._mirrors.get(path)
+            offset = mirror["offset"] if mirror is not None else 0
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "ab") as f:
+                with file_lock(f):
+                    if not _is_open_file(f, path) or f.seek(0, os.SEEK_END) != offset:
+                        # Journal changed under us; rebuild on next load
+                        self._mirrors.pop(path, None)
+                        return False
+                    # Save a detached copy: the session cache keeps the saved
+                    # dict, and the live state keeps changing through apply()
+                    snapshot = fast_json_loads(fast_json_dumps(state))
+                    if not self.save(snapshot, session_id):
+                        return False
+                    state["_updated"] = snapshot["_updated"]
+                    path.unlink()
+        except OSError:
+            return False
+        self._mirrors[path] = {"state": state, "offset": 0, "entries": 0}
+        return True
+
+
+def _is_open_file(f, path: Path) -> bool:
+    """Whether path still names the file open as f (not unlinked/replaced)."""
+    try:
+        return os.stat(path).st_ino == os.fstat(f.fileno()).st_ino
+    except FileNotFoundError:
+        return False
+
 
 # =============================================================================
 # BlockingHook - Base Class for PreToolUse Denials
@@ -559,12 +816,7 @@ class HookHandler:
 
     def _create_context(self, raw: dict):
         """Create appropriate context object from raw dict."""
-        if self.event == "PreToolUse":
-            return PreToolUseContext(raw)
-        elif self.event == "PostToolUse":
-            return PostToolUseContext(raw)
-        else:
-            return BaseContext(raw)
+        return _CONTEXT_BY_EVENT.get(self.event, BaseContext)(raw)
 
     def __call__(self, raw: dict) -> dict | None:
         """Entry point - creates context, checks applies, calls handle.
@@ -639,6 +891,8 @@ class StatefulHandler(HookHandler):
     items_key: str | None = None  # Key containing items to prune
     time_key: str = "_time"  # Timestamp key in items (for pruning order)
 
+    _now: float | None = None  # Clock read shared by one handle() call
+
     def __init__(self):
         """Initialize stateful handler with HookState instance."""
         self._hook_state = HookState(
@@ -664,7 +918,8 @@ class StatefulHandler(HookHandler):
         """
         return self._hook_state.load(
             session_id=session_id,
-            default=self._get_default_state()
+            default=self._get_default_state(),
+            now=self._now
         )
 
     def save_state(self, session_id: str, state: dict) -> bool:
@@ -683,9 +938,10 @@ class StatefulHandler(HookHandler):
                 session_id=session_id,
                 max_entries=self.max_entries,
                 items_key=self.items_key,
-                time_key=self.time_key
+                time_key=self.time_key,
+                now=self._now
             )
-        return self._hook_state.save(state, session_id)
+        return self._hook_state.save(state, session_id, now=self._now)
 
     def handle(self, ctx) -> dict | None:
         """Handle with automatic state loading/saving.
@@ -693,11 +949,17 @@ class StatefulHandler(HookHandler):
         Loads state, calls process(), saves state.
         Override process() instead of this method.
         """
-        session_id = ctx.session_id
-        state = self.load_state(session_id)
-        result = self.process(ctx, state)
-        self.save_state(session_id, state)
-        return result
+        # One clock read per invocation: the TTL check and the saved
+        # _updated stamp agree
+        self._now = time.time()
+        try:
+            session_id = ctx.session_id
+            state = self.load_state(session_id)
+            result = self.process(ctx, state)
+            self.save_state(session_id, state)
+            return result
+        finally:
+            self._now = None
 
     def process(self, ctx, state: dict) -> dict | None:
         """Process the context with access to state.
@@ -718,6 +980,150 @@ class StatefulHandler(HookHandler):
 # Pattern Matching Utilities
 # =============================================================================
 
+# normpath is pure string work and matches_glob sees the same paths repeatedly
+_normpath = lru_cache(maxsize=4096)(os.path.normpath)
+
+# Glob tokens: **, *, ?, [class], literal run, lone special char.
+# Brace groups are split out by _translate_glob before tokenizing.
+_GLOB_TOKEN_RE = re.compile(r"\*\*|\*|\?|\[[^\]]*\]|[^*?\[{]+|.")
+
+
+def _glob_token_regex(match: re.Match) -> str:
+    """Regex for one glob token (re.sub callback for _translate_glob)."""
+    token = match.group(0)
+    if token == "**":
+        return ".*"
+    if token == "*":
+        return "[^/]*"
+    if token == "?":
+        return "[^/]"
+    if token[0] == "[" and len(token) > 2:
+        body = token[1:-1]
+        if body[0] == "!":
+            body = "^" + body[1:]
+        return "[" + body.replace("\\", "\\\\") + "]"
+    return re.escape(token)
+
+
+def _brace_group(pattern: str, start: int) -> tuple[list[str], int] | None:
+    """Split the brace group opening at start into its top-level options.
+
+    Returns (options, end) with end just past the closing brace, or None if
+    the brace is unbalanced or empty (it is then matched literally).
+    """
+    depth = 0
+    options = []
+    option_start = start + 1
+    for i in range(start, len(pattern)):
+        c = pattern[i]
+        if c == "{":
+            depth += 1
+        elif c == "}":
+            depth -= 1
+            if depth == 0:
+                if i == start + 1:
+                    return None
+                options.append(pattern[option_start:i])
+                return options, i + 1
+        elif c == "," and depth == 1:
+            options.append(pattern[option_start:i])
+            option_start = i + 1
+    return None
+
+
+def _translate_glob(pattern: str) -> str:
+    """Translate a path glob to a regex body (no anchors).
+
+    ** crosses directories, * and ? stay within one path segment, [!x] is a
+    negated class, and {a,b} becomes a single (?:a|b) alternation; groups may
+    nest ({src,lib/{a,b}}). All other characters are matched literally. Text
+    between brace groups is translated in one re.sub pass.
+    """
+    if "{" not in pattern:
+        return _GLOB_TOKEN_RE.sub(_glob_token_regex, pattern)
+
+    parts = []
+    segment_start = i = 0
+    n = len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c == "[":
+            # Character classes are opaque: a brace inside one is literal
+            close = pattern.find("]", i + 1)
+            i = close + 1 if close != -1 else i + 1
+            continue
+        if c == "{":
+            group = _brace_group(pattern, i)
+            if group is not None:
+                options, end = group
+                parts.append(_GLOB_TOKEN_RE.sub(_glob_token_regex, pattern[segment_start:i]))
+                parts.append("(?:" + "|".join(_translate_glob(o.strip()) for o in options) + ")")
+                segment_start = i = end
+                continue
+        i += 1
+    parts.append(_GLOB_TOKEN_RE.sub(_glob_token_regex, pattern[segment_start:]))
+    return "".join(parts)
+
+
+@dataclass(frozen=True, slots=True)
+class PatternSet:
+    """Glob patterns compiled once for repeated Patterns.matches_glob calls.
+
+    Every wildcard pattern is matched against the whole path; those without
+    a "/" are also matched against the filename (a filename never contains
+    "/", so that attempt is skipped for the rest). Each of those two groups
+    is compiled into one anchored alternation with a named group per pattern (p<index>),
+    so a single regex match finds the earliest matching pattern of the
+    group. Literal patterns (no wildcards) match iff they occur in the path;
+    literal_re finds whether any of them does in one scan. matches_glob
+    reports whichever pattern comes first in the original order. Build it at
+    import/config-load time, or let matches_glob build (and cache) it.
+
+    Usage:
+        PROTECTED = PatternSet.build(["*.env", "secrets/*"])
+        matched = Patterns.matches_glob(path, PROTECTED)
+    """
+    patterns: tuple[str, ...]
+    filename_re: re.Pattern | None = None
+    path_re: re.Pattern | None = None
+    literals: tuple[tuple[int, str], ...] = ()
+    literal_re: re.Pattern | None = None
+
+    @staticmethod
+    def build(patterns) -> "PatternSet":
+        """Build (or reuse) the PatternSet for an iterable of glob strings."""
+        return _build_pattern_set(tuple(patterns))
+
+
+def _glob_alternation(indexed: list[tuple[int, str]]) -> re.Pattern | None:
+    """Compile (index, glob) pairs into one alternation, tried in order."""
+    if not indexed:
+        return None
+    return re.compile("|".join(f"(?P<p{i}>{fnmatch.translate(p)})" for i, p in indexed))
+
+
+@lru_cache(maxsize=64)
+def _build_pattern_set(patterns: tuple[str, ...]) -> PatternSet:
+    filename_globs = []
+    path_globs = []
+    literals = []
+    for i, pattern in enumerate(patterns):
+        if any(c in pattern for c in "*?["):
+            path_globs.append((i, pattern))
+            if "/" not in pattern:
+                filename_globs.append((i, pattern))
+        else:
+            literals.append((i, pattern))
+    literal_re = re.compile("|".join(re.escape(p) for _, p in literals)) if literals else None
+    return PatternSet(
+        patterns,
+        _glob_alternation(filename_globs),
+        _glob_alternation(path_globs),
+        tuple(literals),
+        literal_re,
+    )
+
+
 class Patterns:
     """Centralized pattern matching utilities for all hooks.
 
@@ -729,25 +1135,48 @@ class Patterns:
     """
 
     @staticmethod
-    def matches_glob(path: str, patterns: list[str]) -> str | None:
+    def matches_glob(path: str, patterns: "list[str] | PatternSet") -> str | None:
         """
         Check if path matches any glob pattern.
         Returns matching pattern or None.
+
+        Wildcard patterns match the whole path or, for patterns without a
+        "/", the filename ("*.env"). fnmatch's "*" crosses "/", so "*build*"
+        also matches files under a build/ directory.
+
+        patterns may be a PatternSet; a plain list is converted through the
+        PatternSet.build cache.
         """
+        if not isinstance(patterns, PatternSet):
+            patterns = PatternSet.build(patterns)
+
         # os.path.normpath needed to collapse .. sequences (Path doesn't do this)
-        path = os.path.normpath(path)
-        filename = Path(path).name
-
-        for pattern in patterns:
-            if fnmatch.fnmatch(path, pattern):
-                return pattern
-            if fnmatch.fnmatch(filename, pattern):
-                return pattern
-            # Substring match for simple patterns
-            if not any(c in pattern for c in '*?['):
-                if pattern in path:
-                    return pattern
-        return None
+        path = _normpath(path)
+        filename = os.path.basename(path)
+
+        # Each alternation is anchored and every branch ends in \Z, so the
+        # branch that matches is the earliest matching pattern of its group
+        best = len(patterns.patterns)
+        if patterns.filename_re is not None:
+            m = patterns.filename_re.match(filename)
+            if m:
+                best = int(m.lastgroup[1:])
+        if patterns.path_re is not None:
+            m = patterns.path_re.match(path)
+            if m:
+                best = min(best, int(m.lastgroup[1:]))
+
+        # One scan tells whether any literal occurs at all; a literal equal to
+        # the path or filename also occurs in the path, so `in` covers it
+        if patterns.literal_re is not None and patterns.literal_re.search(path):
+            for i, literal in patterns.literals:
+                if i >= best:
+                    break
+                if literal in path:
+                    best = i
+                    break
+
+        return patterns.patterns[best] if best < len(patterns.patterns) else None
 
     @staticmethod
     def matches_compiled(value: str, compiled_patterns: list) -> bool:
@@ -802,7 +1231,11 @@ class Patterns:
         Supports:
         - ** : matches multiple directory levels
         - * : matches within single directory
-        - {a,b} : brace expansion
+        - ? : matches one character within a directory
+        - [abc], [!abc] : character classes
+        - {a,b} : brace expansion (compiled into one alternation)
+
+        Other regex metacharacters in the pattern are matched literally.
 
         Args:
             pattern: Glob pattern string
@@ -815,12 +1248,7 @@ class Patterns:
             if pat.match("src/api/users.ts"):
                 apply_rule()
         """
-        regex = pattern.replace(".", r"\.")
-        regex = regex.replace("**", "<<<DOUBLE>>>")
-        regex = regex.replace("*", "[^/]*")
-        regex = regex.replace("<<<DOUBLE>>>", ".*")
-        regex = "^" + regex + "$"
-        return re.compile(regex)
+        return re.compile("^" + _translate_glob(pattern) + r"\Z")
 
     @staticmethod
     def matches_path_pattern(path: str, pattern: str) -> bool:
@@ -839,20 +1267,7 @@ class Patterns:
         Returns:
             True if path matches pattern, False otherwise
         """
-        # Handle brace expansion {a,b}
-        if "{" in pattern and "}" in pattern:
-            match = re.match(r"(.*)\{([^}]+)\}(.*)", pattern)
-            if match:
-                prefix, options, suffix = match.groups()
-                for option in options.split(","):
-                    expanded = prefix + option.strip() + suffix
-                    if Patterns.matches_path_pattern(path, expanded):
-                        return True
-                return False
-
-        # Use cached compiled pattern
-        compiled = Patterns.compile_pattern(pattern)
-        return bool(compiled.match(path))
+        return Patterns.compile_pattern(pattern).match(path) is not None
 
 
 # =============================================================================
@@ -860,10 +1275,32 @@ class Patterns:
 # =============================================================================
 
 class RateLimiter:
-    """Thread-safe rate limiter for hook actions."""
+    """Thread-safe rate limiter for hook actions.
+
+    Uses a bucketed sliding window: the window is split into BUCKETS
+    sub-windows and state stores one count per sub-window, so state size and
+    per-call work are constant regardless of max_count. Expired sub-windows
+    are zeroed as time advances. The effective window is between
+    (BUCKETS-1)/BUCKETS and 1 times window_secs.
+    """
+
+    BUCKETS = 10
+    # Consumes are kept in memory and written every FLUSH_EVERY operations or
+    # FLUSH_INTERVAL seconds, plus once at exit (see flush())
+    FLUSH_EVERY = 8
+    FLUSH_INTERVAL = 1.0
 
-    # Class-level lock for all rate limiters
-    _lock = threading.Lock()
+    # Process-local window state: state_key -> {"buckets": [...], "epoch": n}
+    _windows: dict[str, dict] = {}
+    _dirty: set[str] = set()
+    _pending_ops = 0
+    _last_flush = time.time()
+    _flush_lock = threading.Lock()
+
+    # One lock per state_key: instances for the same key share it, unrelated
+    # keys never contend
+    _locks: dict[str, threading.Lock] = {}
+    _locks_guard = threading.Lock()
 
     def __init__(self, name: str, max_count: int, window_secs: int):
         """
@@ -876,35 +1313,103 @@ class RateLimiter:
         self.max_count = max_count
         self.window_secs = window_secs
         self.state_key = f"rate-limit-{name}"
+        self._bucket_secs = window_secs / self.BUCKETS
+        with RateLimiter._locks_guard:
+            self._lock = RateLimiter._locks.setdefault(self.state_key, threading.Lock())
+
+    def _current_window(self, state: dict, now: float) -> tuple[list[int], int]:
+        """Get (buckets, epoch) for now, with expired buckets zeroed.
+
+        epoch is the absolute sub-window number of now. Legacy
+        {"timestamps": [...]} state is folded into buckets.
+        """
+        n = self.BUCKETS
+        if self._bucket_secs <= 0:
+            # Zero-length window: every action has already expired
+            return [0] * n, 0
+        epoch = int(now / self._bucket_secs)
+        buckets = state.get("buckets")
+        if isinstance(buckets, list) and len(buckets) == n:
+            buckets = list(buckets)
+            gap = epoch - state.get("epoch", epoch)
+            if gap >= n or gap < 0:
+                buckets = [0] * n
+            else:
+                for b in range(epoch - gap + 1, epoch + 1):
+                    buckets[b % n] = 0
+            return buckets, epoch
+
+        buckets = [0] * n
+        for t in state.get("timestamps", ()):
+            b = int(t / self._bucket_secs)
+            if 0 <= epoch - b < n:
+                buckets[b % n] += 1
+        return buckets, epoch
+
+    def _load(self) -> dict:
+        """Get window state: in-memory copy if present, else from disk."""
+        state = RateLimiter._windows.get(self.state_key)
+        if state is None:
+            state = read_state(self.state_key, {})
+        return state
 
     def check(self) -> bool:
-        """Check if action is allowed (doesn't consume)."""
-        with self._lock:
-            state = read_state(self.state_key, {"timestamps": []})
-            now = time.time()
-            cutoff = now - self.window_secs
-            timestamps = [t for t in state.get("timestamps", []) if t > cutoff]
-            return len(timestamps) < self.max_count
+        """Check if action is allowed (doesn't consume).
+
+        Lock-free read, so the answer is advisory: a concurrent consume() may
+        use up the last slot first. consume() re-checks under the lock.
+        """
+        buckets, _ = self._current_window(self._load(), time.time())
+        return sum(buckets) < self.max_count
 
     def consume(self) -> bool:
         """Try to consume one action. Returns True if allowed."""
         with self._lock:
-            state = read_state(self.state_key, {"timestamps": []})
             now = time.time()
-            cutoff = now - self.window_secs
-            timestamps = [t for t in state.get("timestamps", []) if t > cutoff]
+            buckets, epoch = self._current_window(self._load(), now)
 
-            if len(timestamps) >= self.max_count:
+            if sum(buckets) >= self.max_count:
                 return False
 
-            timestamps.append(now)
-            write_state(self.state_key, {"timestamps": timestamps})
-            return True
+            buckets[epoch % self.BUCKETS] += 1
+            RateLimiter._windows[self.state_key] = {"buckets": buckets, "epoch": epoch}
+        RateLimiter._mark_dirty(self.state_key, now)
+        return True
 
     def reset(self):
-        """Reset the rate limiter."""
+        """Reset the rate limiter (written through immediately)."""
+        state = {"buckets": [0] * self.BUCKETS, "epoch": 0}
         with self._lock:
-            write_state(self.state_key, {"timestamps": []})
+            RateLimiter._windows[self.state_key] = state
+            with RateLimiter._flush_lock:
+                RateLimiter._dirty.discard(self.state_key)
+            write_state(self.state_key, state)
+
+    @classmethod
+    def _mark_dirty(cls, state_key: str, now: float) -> None:
+        """Record a pending write; flush when the batch is full or old."""
+        with cls._flush_lock:
+            cls._dirty.add(state_key)
+            cls._pending_ops += 1
+            due = (cls._pending_ops >= cls.FLUSH_EVERY
+                   or now - cls._last_flush > cls.FLUSH_INTERVAL)
+        if due:
+            cls.flush()
+
+    @classmethod
+    def flush(cls) -> int:
+        """Write pending window state to disk. Returns number of keys written."""
+        with cls._flush_lock:
+            dirty = list(cls._dirty)
+            cls._dirty.clear()
+            cls._pending_ops = 0
+            cls._last_flush = time.time()
+        for state_key in dirty:
+            write_state(state_key, cls._windows[state_key])
+        return len(dirty)
+
+
+atexit.register(RateLimiter.flush)
 
 
 # =============================================================================
@@ -921,19 +1426,14 @@ def dispatch_handler(name: str, event: EventType = "PreToolUse"):
         def check_protection(ctx: PreToolUseContext) -> dict | None:
             ...
     """
+    # event is fixed per handler, so pick the context class once
+    context_cls = _CONTEXT_BY_EVENT.get(event, BaseContext)
+
     def decorator(func: Callable):
         @wraps(func)
         def wrapper(raw: dict) -> dict | None:
             try:
-                # Create appropriate context
-                if event == "PreToolUse":
-                    ctx = PreToolUseContext(raw)
-                elif event == "PostToolUse":
-                    ctx = PostToolUseContext(raw)
-                else:
-                    ctx = BaseContext(raw)
-
-                return func(ctx)
+                return func(context_cls(raw))
             except Exception as e:
                 log_event(name, "error", {"error": str(e)}, "error")
                 return None
@@ -956,17 +1456,31 @@ def run_standalone(handler: Callable[[dict], dict | None]):
             run_standalone(my_handler)
     """
     try:
-        raw = json.load(sys.stdin)
-    except (json.JSONDecodeError, Exception):
+        raw = fast_json_loads(sys.stdin.buffer.read())
+    except Exception:
         sys.exit(0)
 
     result = handler(raw)
     if result:
-        print(json.dumps(result))
+        write_response(result)
 
     sys.exit(0)
 
 
+def write_response(result: dict) -> None:
+    """Write a hook result to stdout as one JSON line.
+
+    The encoded bytes go straight to the binary buffer instead of being
+    decoded for print() and re-encoded by the text layer, as a single
+    write that is flushed immediately rather than after exit handlers run.
+    """
+    # Anything already print()ed is still in the text layer's buffer
+    sys.stdout.flush()
+    out = sys.stdout.buffer
+    out.write(Response.to_json(result) + b"\n")
+    out.flush()
+
+
 # =============================================================================
 # Exports
 # =============================================================================
@@ -988,11 +1502,13 @@ __all__ = [
     "StatefulHandler",
     # Pattern matching
     "Patterns",
+    "PatternSet",
     # Rate limiting
     "RateLimiter",
     # Decorators and helpers
     "dispatch_handler",
     "run_standalone",
+    "write_response",
     # Event types
     "EventType",
     # Re-exports from hook_utils (commonly used)
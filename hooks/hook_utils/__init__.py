@@ -32,6 +32,7 @@ from .io import (
     safe_exists,
     normalize_path,
     expand_path,
+    iter_lines_bytes,
     iter_jsonl,
     count_jsonl_lines,
     stable_hash,
@@ -80,6 +81,7 @@ from .metrics import (
     estimate_tokens,
     get_content_size,
     count_tokens_accurate,
+    count_tokens_batch,
     get_timestamp,
 )
 
@@ -114,6 +116,13 @@ from .git import (
 
 # Event detection utilities - canonical implementations
 # These are also available in hook_sdk for the typed context approach
+# Events named explicitly by the "event" field
+_EXPLICIT_EVENTS = frozenset({
+    "SessionStart", "SessionEnd", "Stop", "PermissionRequest",
+    "SubagentStart", "SubagentStop",
+})
+
+
 def detect_event(ctx: dict) -> str:
     """
     Detect event type from context dictionary.
@@ -129,17 +138,14 @@ def detect_event(ctx: dict) -> str:
     # PreCompact has transcript_path but no tool_name
     if "transcript_path" in ctx and not ctx.get("tool_name"):
         return "PreCompact"
-    # Explicit event field
+    # Explicit event field (one set lookup; non-strings can't match)
     event = ctx.get("event")
-    if event in ("SessionStart", "SessionEnd", "Stop", "PermissionRequest",
-                 "SubagentStart", "SubagentStop"):
+    if type(event) is str and event in _EXPLICIT_EVENTS:
         return event
     # UserPromptSubmit has user_prompt
     if "user_prompt" in ctx:
         return "UserPromptSubmit"
-    # PreToolUse has tool_name without tool_response
-    if ctx.get("tool_name"):
-        return "PreToolUse"
+    # PreToolUse: tool_name without tool_response, and the default
     return "PreToolUse"
 
 
@@ -203,6 +209,7 @@ __all__ = [
     "safe_exists",
     "normalize_path",
     "expand_path",
+    "iter_lines_bytes",
     "iter_jsonl",
     "count_jsonl_lines",
     "stable_hash",
@@ -217,6 +224,7 @@ __all__ = [
     "estimate_tokens",
     "get_content_size",
     "count_tokens_accurate",
+    "count_tokens_batch",
     "get_timestamp",
     # State (includes TTLCachedLoader)
     "TTLCachedLoader",
@@ -44,6 +44,38 @@ def stable_hash(text: str, length: int = 12) -> str:
 # JSONL Utilities
 # =============================================================================
 
+def iter_lines_bytes(f, bufsize: int = 65536):
+    """Iterate over lines of a binary file using large chunked reads.
+
+    Reads ``bufsize`` bytes at a time and splits on ``b"\\n"``, avoiding
+    per-line readline overhead on large files. Lines are yielded without the
+    trailing newline; a final unterminated line is yielded as-is.
+
+    Args:
+        f: File object opened in binary mode (may be pre-seeked)
+        bufsize: Chunk size for each read (default 64KB)
+
+    Yields:
+        Raw bytes for each line
+    """
+    pending: list[bytes] = []
+    while chunk := f.read(bufsize):
+        parts = chunk.split(b"\n")
+        if len(parts) == 1:
+            pending.append(chunk)
+            continue
+        if pending:
+            pending.append(parts[0])
+            parts[0] = b"".join(pending)
+            pending = []
+        last = parts.pop()
+        yield from parts
+        if last:
+            pending.append(last)
+    if pending:
+        yield b"".join(pending)
+
+
 def iter_jsonl(
     path: PathLike,
     tail: int | None = None,
@@ -57,7 +89,8 @@ def iter_jsonl(
         path: Path to JSONL file
         tail: If set, only yield last N lines (like tail -n)
         skip_errors: If True (default), skip lines with JSON parse errors.
-                     If False, raises JSONDecodeError on invalid lines.
+                     If False, raises ValueError (msgspec.DecodeError) on
+                     invalid lines.
 
     Yields:
         Parsed dict for each valid line
@@ -72,21 +105,21 @@ def iter_jsonl(
         return
 
     try:
-        with open(path, 'r', encoding='utf-8') as f:
+        with open(path, 'rb') as f:
             if tail is not None:
                 # Read all lines and take last N
                 lines = f.readlines()
                 lines = lines[-tail:] if tail else lines
             else:
-                lines = f
+                lines = iter_lines_bytes(f)
 
             for line_num, line in enumerate(lines, 1):
-                line = line.strip()
-                if not line:
+                if not line.strip():
                     continue
                 try:
-                    yield json.loads(line)
-                except json.JSONDecodeError:
+                    # msgspec decodes raw bytes directly (no per-line UTF-8 decode)
+                    yield fast_json_loads(line)
+                except ValueError:
                     if not skip_errors:
                         raise
                     # Log first few errors, then suppress
@@ -4,9 +4,12 @@ Logging and graceful degradation utilities.
 Uses loguru for structured JSON logging with automatic rotation.
 Includes log-once pattern for suppressing duplicate errors.
 """
+import atexit
 import json
 import os
+import queue
 import sys
+import threading
 import time
 from functools import wraps
 from pathlib import Path
@@ -98,24 +101,102 @@ logger.add(
     rotation="10 MB",
     retention=3,
     compression="gz",
-    enqueue=True,  # Thread-safe
+    enqueue=False,  # Writes already happen on the log worker thread below
     catch=True,  # Never raise
 )
 
 
+def _emit(hook_name: str, event_type: str, data: dict | None, level: str):
+    """Hand one event to loguru (runs on the log worker thread)."""
+    try:
+        log_func = getattr(logger, level, logger.info)
+        log_func(event_type, hook=hook_name, **(data or {}))
+    except Exception:
+        pass  # Never raise
+
+
+# Fire-and-forget logging: log_event only enqueues, one daemon thread drains
+# the queue in batches so file I/O stays off the hook's critical path.
+LOG_QUEUE_MAXSIZE = 1024
+LOG_BATCH_MAX = 32
+_log_queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_MAXSIZE)
+_log_worker: threading.Thread | None = None
+_log_worker_lock = threading.Lock()
+_log_dropped = 0
+
+
+def _log_worker_loop():
+    """Drain queued events in batches until the None sentinel arrives."""
+    while True:
+        batch = [_log_queue.get()]
+        try:
+            while len(batch) < LOG_BATCH_MAX:
+                batch.append(_log_queue.get_nowait())
+        except queue.Empty:
+            pass
+        for event in batch:
+            if event is None:
+                return
+            _emit(*event)
+
+
+def _ensure_log_worker():
+    """Start the log worker thread on first use."""
+    global _log_worker
+    with _log_worker_lock:
+        if _log_worker is None:
+            _log_worker = threading.Thread(target=_log_worker_loop, name="log-writer", daemon=True)
+            _log_worker.start()
+
+
+def flush_log_queue(timeout: float = 2.0):
+    """Stop the log worker after it writes queued events (runs at exit).
+
+    Events the worker couldn't reach within timeout are written inline.
+    """
+    global _log_worker, _log_dropped
+    with _log_worker_lock:
+        worker, _log_worker = _log_worker, None
+    if worker is not None:
+        try:
+            _log_queue.put(None, timeout=timeout)
+            worker.join(timeout)
+        except queue.Full:
+            pass
+    while True:
+        try:
+            event = _log_queue.get_nowait()
+        except queue.Empty:
+            break
+        if event is not None:
+            _emit(*event)
+    if _log_dropped:
+        dropped, _log_dropped = _log_dropped, 0
+        _emit("logging", "log_queue_dropped", {"count": dropped}, "warning")
+
+
+atexit.register(flush_log_queue)
+
+
 def log_event(hook_name: str, event_type: str, data: dict = None, level: str = "info"):
     """
     Log structured event using loguru.
 
+    The event is queued for the background log worker; if the queue is full
+    it is dropped and counted rather than blocking the hook.
+
     Args:
         hook_name: Name of the hook (e.g., "file_protection")
         event_type: Event type (e.g., "blocked", "error")
         data: Additional context data
         level: Log level (debug, info, warning, error)
     """
+    global _log_dropped
     try:
-        log_func = getattr(logger, level, logger.info)
-        log_func(event_type, hook=hook_name, **(data or {}))
+        _ensure_log_worker()
+        _log_queue.put_nowait((hook_name, event_type, dict(data) if data else None, level))
+    except queue.Full:
+        _log_dropped += 1
     except Exception:
         pass  # Never raise
 
@@ -97,6 +97,23 @@ def count_tokens_accurate(text: str) -> int:
     return estimate_tokens(text, accurate=True)
 
 
+def count_tokens_batch(texts: list[str]) -> int:
+    """
+    Total token count for many strings in one tokenizer call.
+
+    Uses tiktoken's batch encoder so per-call overhead is paid once. Unlike
+    count_tokens_accurate, special tokens such as <|endoftext|> are
+    deliberately counted as plain text instead of raising. Falls back to
+    character estimation.
+    """
+    if not texts:
+        return 0
+    encoder = _get_encoder()
+    if encoder:
+        return sum(map(len, encoder.encode_ordinary_batch(texts)))
+    return sum(len(text) // CHARS_PER_TOKEN for text in texts)
+
+
 def get_timestamp() -> str:
     """Return ISO format timestamp for consistent logging."""
     return datetime.now().isoformat()
@@ -4,7 +4,6 @@ Session-aware state management and transcript backup.
 Uses cache abstraction for automatic TTL expiration and LRU eviction.
 """
 import hashlib
-import json
 import os
 import threading
 import time
@@ -12,6 +11,8 @@ from datetime import datetime
 from pathlib import Path
 from typing import Callable
 
+from hooks.config import fast_json_loads
+
 from .cache import create_ttl_cache, create_lru_cache
 from .io import safe_load_json, atomic_write_json, file_lock
 from .logging import DATA_DIR, log_event
@@ -70,12 +71,9 @@ def get_session_id(ctx: dict = None, transcript_path: str = None) -> str:
 def get_session_state() -> dict:
     """Get current session state."""
     try:
-        if SESSION_STATE_FILE.exists():
-            with open(SESSION_STATE_FILE) as f:
-                return json.load(f)
+        return fast_json_loads(SESSION_STATE_FILE.read_bytes())
     except Exception:
-        pass
-    return {}
+        return {}
 
 
 def _get_session_state_file(session_id: str) -> Path:
@@ -165,12 +163,14 @@ def cleanup_old_sessions(max_age_secs: int = SESSION_STATE_MAX_AGE):
     now = time.time()
     cutoff = now - max_age_secs
 
-    for state_file in SESSION_STATE_DIR.glob("*.json"):
-        try:
-            if state_file.stat().st_mtime < cutoff:
-                state_file.unlink()
-        except (IOError, OSError):
-            pass
+    # *.jsonl: per-namespace state journals (HookState.append_delta)
+    for pattern in ("*.json", "*.jsonl"):
+        for state_file in SESSION_STATE_DIR.glob(pattern):
+            try:
+                if state_file.stat().st_mtime < cutoff:
+                    state_file.unlink()
+            except (IOError, OSError):
+                pass
 
 
 def load_state_with_expiry(
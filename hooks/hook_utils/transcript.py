@@ -41,6 +41,9 @@ TECH_PATTERNS = {
     r"\.github/workflows": "GitHub Actions",
 }
 
+# Compiled once; analyze_tool_usage tests every file path against all of them
+_TECH_REGEXES = [(re.compile(pattern), tech) for pattern, tech in TECH_PATTERNS.items()]
+
 
 def iter_transcript(
     path: str | Path,
@@ -188,8 +191,8 @@ def analyze_tool_usage(path: str | Path) -> dict[str, Any]:
             files_created.add(file_path)
 
         if file_path:
-            for pattern, tech in TECH_PATTERNS.items():
-                if re.search(pattern, file_path):
+            for regex, tech in _TECH_REGEXES:
+                if regex.search(file_path):
                     technologies.add(tech)
 
         content = str(entry.get("content", ""))
@@ -9,6 +9,9 @@ from hooks.handlers.tool_analytics import (
     _batch_extract_pattern as extract_pattern,
     _batch_find_similar_edits as find_similar_edits,
     _batch_suggest_command as suggest_batch_command,
+    _batch_ensure_indexes as ensure_indexes,
+    _batch_find_similar_writes as find_similar_writes,
+    _batch_common_dir as common_dir,
 )
 
 
@@ -101,6 +104,46 @@ class TestFindSimilarEdits:
         similar = find_similar_edits(current, [])
         assert len(similar) == 0
 
+    def test_length_window_uses_index(self):
+        """Should match by old_len within 20 via the persisted index."""
+        state = {"edits": [
+            {"file": "a.py", "pattern": extract_pattern("x" * 40 + "a", "y")},
+            {"file": "b.py", "pattern": extract_pattern("x" * 40 + "bbbbbbbbbbbbbbbbbbbbbbbbb", "z")},
+            {"file": "c.py", "pattern": extract_pattern("x" * 40 + "c" * 5, "w")},
+        ], "writes": []}
+        ensure_indexes(state)
+        current = {"pattern": extract_pattern("x" * 40 + "d", "v")}
+        similar = find_similar_edits(current, state["edits"], state["edit_index"])
+        assert [e["file"] for e in similar] == ["a.py", "c.py"]
+
+
+class TestEnsureIndexes:
+    """Tests for indexing state saved without sequence numbers."""
+
+    def test_legacy_state_gets_indexes(self):
+        """Should assign seqs and build indexes for old state."""
+        state = {
+            "edits": [{"file": "a.py", "pattern": extract_pattern("foo", "bar")}],
+            "writes": [{"file": "a.py", "extension": ".py", "size": 100}],
+        }
+        ensure_indexes(state)
+        assert state["edit_seq"] == 1
+        assert state["edits"][0]["seq"] == 0
+        assert state["write_seq"] == 1
+        assert state["write_buckets"] == {".py|0": [0]}
+
+    def test_similar_writes_neighbouring_buckets(self):
+        """Should find writes across adjacent size bands."""
+        state = {"edits": [], "writes": [
+            {"file": "a.py", "extension": ".py", "size": 480},
+            {"file": "b.py", "extension": ".py", "size": 1200},
+            {"file": "c.js", "extension": ".js", "size": 520},
+        ]}
+        ensure_indexes(state)
+        current = {"extension": ".py", "size": 520}
+        similar = find_similar_writes(current, state["writes"], state["write_buckets"])
+        assert [w["file"] for w in similar] == ["a.py"]
+
 
 class TestGetFileExtension:
     """Tests for file extension extraction."""
@@ -126,6 +169,27 @@ class TestGetFileExtension:
         assert get_file_extension("file.test.js") == ".js"
 
 
+class TestCommonDir:
+    """Tests for the running-prefix common directory."""
+
+    def test_matches_commonpath(self):
+        """Should agree with os.path.commonpath."""
+        import os
+        cases = [
+            ["/project/src/a.py", "/project/src/b.py", "/project/lib/c.py"],
+            ["/project/src/a.py", "/project/src/a.py"],
+            ["/project/src/", "/project/srcx/b.py"],
+            ["src/a.py", "src/b/c.py"],
+        ]
+        for paths in cases:
+            assert common_dir(paths) == os.path.commonpath(paths)
+
+    def test_mixed_absolute_relative_raises(self):
+        """Should raise like commonpath for mixed path kinds."""
+        with pytest.raises(ValueError):
+            common_dir(["/project/a.py", "b.py"])
+
+
 class TestSuggestBatchCommand:
     """Tests for batch command suggestion."""
 
@@ -139,7 +139,6 @@ class TestThresholdConfig:
         assert config.max_cache_entries == 30
         assert config.max_continuations == 3
         assert config.min_notify_duration == 30
-        assert config.stats_flush_interval == 10
         assert config.permission_approval_threshold == 3
         assert config.tool_failure_threshold == 2
 
@@ -166,7 +165,6 @@ class TestThresholdConfig:
         assert config.MAX_CACHE_ENTRIES == config.max_cache_entries
         assert config.MAX_CONTINUATIONS == config.max_continuations
         assert config.MIN_NOTIFY_DURATION == config.min_notify_duration
-        assert config.STATS_FLUSH_INTERVAL == config.stats_flush_interval
         assert config.PERMISSION_APPROVAL_THRESHOLD == config.permission_approval_threshold
         assert config.TOOL_FAILURE_THRESHOLD == config.tool_failure_threshold
 
@@ -478,6 +476,25 @@ class TestDangerousCommands:
         patterns = DangerousCommands.get_warnings()
         assert any(p.search("git reset --hard") for p, r in patterns)
 
+    def test_combined_matches_same_commands(self):
+        """Combined pre-screen agrees with the individual pattern list."""
+        commands = ["rm -rf /", "git push --force", "ls -la", "echo hi", ":(){ :|:& };:"]
+        for get_list, get_combined in (
+            (DangerousCommands.get_blocked, DangerousCommands.get_blocked_combined),
+            (DangerousCommands.get_warnings, DangerousCommands.get_warnings_combined),
+        ):
+            combined = get_combined()
+            assert combined is not None
+            for cmd in commands:
+                expected = any(p.search(cmd) for p, _ in get_list())
+                assert (combined.search(cmd) is not None) == expected
+
+    def test_combined_compiler_falls_back_on_error(self):
+        """Patterns that cannot be joined yield None instead of raising."""
+        from hooks.config import _make_combined_compiler
+        assert _make_combined_compiler([r"(?P<a>x)", r"(?P<a>y)"])() is None
+        assert _make_combined_compiler([])() is None
+
 
 # =============================================================================
 # StateSaver Tests
@@ -13,6 +13,7 @@ from hooks.handlers.context_manager import (
     update_cache,
 )
 from hooks.hook_utils import count_tokens_accurate as count_tokens
+from hooks.hook_utils import count_tokens_batch
 
 
 class TestTokenCounting:
@@ -38,6 +39,12 @@ def hello():
         tokens = count_tokens(code)
         assert tokens > 0
 
+    def test_count_tokens_batch_matches_individual(self):
+        """Batch count should equal the sum of individual counts."""
+        texts = ["Hello world", "", "def f():\n    return 1\n", "x" * 37]
+        assert count_tokens_batch(texts) == sum(count_tokens(t) for t in texts)
+        assert count_tokens_batch([]) == 0
+
 
 class TestThresholds:
     """Tests for token thresholds."""
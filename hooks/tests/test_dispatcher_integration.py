@@ -5,7 +5,7 @@ Tests end-to-end dispatcher behavior with mocked handlers.
 import json
 import os
 import sys
-from io import StringIO
+from io import BytesIO, TextIOWrapper
 from pathlib import Path
 from unittest.mock import patch, MagicMock
 
@@ -255,7 +255,7 @@ class TestDispatcherEndToEnd:
         ctx = {"tool_name": "Glob", "tool_input": {"pattern": "*.py"}}
 
         # Mock stdin
-        monkeypatch.setattr('sys.stdin', StringIO(json.dumps(ctx)))
+        monkeypatch.setattr('sys.stdin', TextIOWrapper(BytesIO(json.dumps(ctx).encode())))
 
         dispatcher = PreToolDispatcher()
         dispatcher._validated = True  # Skip validation
@@ -268,7 +268,7 @@ class TestDispatcherEndToEnd:
 
     def test_invalid_json_graceful_exit(self, monkeypatch):
         """Invalid JSON input should exit with error code (not crash)."""
-        monkeypatch.setattr('sys.stdin', StringIO("not valid json"))
+        monkeypatch.setattr('sys.stdin', TextIOWrapper(BytesIO(b"not valid json")))
 
         dispatcher = PreToolDispatcher()
         dispatcher._validated = True
@@ -279,6 +279,30 @@ class TestDispatcherEndToEnd:
         # Exit code 1 signals parse error (not 0 which would mask failures)
         assert exc_info.value.code == 1
 
+    def test_unrouted_tool_skips_parse(self, monkeypatch, capsys):
+        """Payloads naming only unrouted tools exit before JSON parsing."""
+        payload = b'{"tool_name": "NoSuchTool", "tool_input": {}}'
+        monkeypatch.setattr('sys.stdin', TextIOWrapper(BytesIO(payload)))
+
+        dispatcher = PreToolDispatcher()
+        dispatcher._validated = True
+
+        with patch('hooks.dispatchers.base.fast_json_loads') as loads:
+            with pytest.raises(SystemExit) as exc_info:
+                dispatcher.run()
+
+        assert exc_info.value.code == 0
+        loads.assert_not_called()
+        assert capsys.readouterr().out == ""
+
+    def test_routes_payload(self):
+        """Pre-parse check only rejects payloads that name no routed tool."""
+        dispatcher = PreToolDispatcher()
+        assert dispatcher.routes_payload(b'{"tool_name": "Bash"}')
+        assert not dispatcher.routes_payload(b'{"tool_name": "NoSuchTool"}')
+        # No tool_name at all: fall through to the full parse
+        assert dispatcher.routes_payload(b"not valid json")
+
 
 class TestHandlerValidation:
     """Tests for handler import validation."""
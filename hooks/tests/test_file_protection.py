@@ -5,7 +5,7 @@ from pathlib import Path
 import pytest
 
 from hooks.config import ProtectedFiles
-from hooks.hook_sdk import Patterns
+from hooks.hook_sdk import Patterns, PatternSet
 from hooks.hook_utils import expand_path
 
 
@@ -95,6 +95,45 @@ class TestPatternsMatchGlob:
         result = Patterns.matches_glob("test.py", patterns)
         assert result == "*.py"
 
+    def test_accepts_pattern_set(self):
+        """A prebuilt PatternSet matches like the list it came from."""
+        patterns = PatternSet.build(["*.js", ".env", "src/*.py"])
+        assert Patterns.matches_glob("/home/user/.env", patterns) == ".env"
+        assert Patterns.matches_glob("src/app.py", patterns) == "src/*.py"
+        assert Patterns.matches_glob("README.md", patterns) is None
+
+    def test_literal_and_glob_order_preserved(self):
+        """The first pattern in list order wins, whether literal or glob."""
+        assert Patterns.matches_glob("src/.env", [".env", "src/*"]) == ".env"
+        assert Patterns.matches_glob("src/.env", ["src/*", ".env"]) == "src/*"
+        assert Patterns.matches_glob("a+b/c", ["a+b"]) == "a+b"
+
+    def test_first_wildcard_match_wins_within_group(self):
+        """Several wildcard patterns matching: the earliest listed is reported."""
+        assert Patterns.matches_glob("/p/ab.py", ["*.py", "a*"]) == "*.py"
+        assert Patterns.matches_glob("/p/ab.py", ["a*", "*.py"]) == "a*"
+        assert Patterns.matches_glob("src/ab.py", ["src/*", "*/ab.py", "ab.py"]) == "src/*"
+        assert Patterns.matches_glob("src/ab.py", ["ab.py", "src/*"]) == "ab.py"
+
+    def test_pattern_set_build_cached(self):
+        """Equal pattern lists share one PatternSet."""
+        assert PatternSet.build(["*.py", "*.js"]) is PatternSet.build(("*.py", "*.js"))
+
+    def test_basename_patterns_match_path_or_filename(self):
+        """Patterns without a slash match the filename or the whole path."""
+        assert Patterns.matches_glob("/home/user/app.env", ["*.env"]) == "*.env"
+        assert Patterns.matches_glob("/build/x/app.py", ["*build*"]) == "*build*"
+        assert Patterns.matches_glob("/home/secret/x.txt", ["*secret*"]) == "*secret*"
+        assert Patterns.matches_glob("/home/x/app.py", ["app.*"]) == "app.*"
+        assert Patterns.matches_glob("/a/build.log", ["*build*"]) == "*build*"
+        assert Patterns.matches_glob("/repo/src/a.py", ["*/src/*.py"]) == "*/src/*.py"
+
+    def test_dotdot_collapsed_before_matching(self):
+        """Paths are normalized (and the result reused) before matching."""
+        for _ in range(2):
+            assert Patterns.matches_glob("src/../secrets/key.pem", ["secrets/*"]) == "secrets/*"
+            assert Patterns.matches_glob("secrets/../src/app.py", ["secrets/*"]) is None
+
 
 class TestExpandPath:
     """Tests for path expansion utility."""
@@ -148,6 +148,21 @@ class TestHookHandler(TestCase):
         self.assertEqual(result["hookSpecificOutput"]["permissionDecision"], "allow")
         self.assertEqual(result["hookSpecificOutput"]["permissionDecisionReason"], "Test reason")
 
+    def test_allow_to_json_matches_encoder(self):
+        """to_json() template output is byte-identical to encoding the dict."""
+        from hooks.config import fast_json_dumps
+        for reason in ("Test reason", 'quote " and \\ slash', "unicode \u2603\n", ""):
+            result = Response.allow(reason)
+            self.assertEqual(Response.to_json(result), fast_json_dumps(result))
+
+    def test_to_json_other_results(self):
+        """Non-allow results are encoded normally."""
+        from hooks.config import fast_json_dumps, fast_json_loads
+        for result in (Response.deny("no"), Response.message("hi"),
+                       {"hookSpecificOutput": {**Response.allow("x")["hookSpecificOutput"], "extra": 1}}):
+            self.assertEqual(fast_json_loads(Response.to_json(result)), result)
+            self.assertEqual(Response.to_json(result), fast_json_dumps(result))
+
     def test_deny_method(self):
         """deny() returns proper response structure."""
         handler = HookHandler()
@@ -321,7 +336,8 @@ class TestStatefulHandler(TestCase):
             session_id="session-123",
             max_entries=100,
             items_key="items",
-            time_key="ts"
+            time_key="ts",
+            now=None
         )
 
     def test_handle_loads_and_saves_state(self):
@@ -351,6 +367,29 @@ class TestStatefulHandler(TestCase):
         saved_state = handler.save_state.call_args[0][1]
         self.assertEqual(saved_state["count"], 1)
 
+    def test_handle_reads_clock_once(self):
+        """handle() shares one clock read between TTL check and save stamp."""
+        class TestHandler(StatefulHandler):
+            namespace = "test_clock"
+
+            def process(self, ctx, state):
+                return None
+
+        handler = TestHandler()
+        handler._hook_state.load = MagicMock(return_value={})
+        handler._hook_state.save = MagicMock(return_value=True)
+
+        ctx = MagicMock()
+        ctx.session_id = "session-123"
+
+        with patch("hooks.hook_sdk.time.time", return_value=1000.0) as mock_time:
+            handler.handle(ctx)
+
+        mock_time.assert_called_once()
+        self.assertEqual(handler._hook_state.load.call_args.kwargs["now"], 1000.0)
+        self.assertEqual(handler._hook_state.save.call_args.kwargs["now"], 1000.0)
+        self.assertIsNone(handler._now)
+
     def test_handle_returns_process_result(self):
         """handle() returns whatever process() returns."""
         class TestHandler(StatefulHandler):
@@ -553,3 +592,179 @@ class TestEdgeCases(TestCase):
             raw = {"tool_name": tool}
             ctx = handler._create_context(raw)
             self.assertTrue(handler.applies(ctx))
+
+
+# =============================================================================
+# HookState TTL Tests
+# =============================================================================
+
+class TestHookStateLoad(TestCase):
+    """Tests for HookState.load() TTL handling."""
+
+    def _load(self, state, **kwargs):
+        from hooks.hook_sdk import HookState
+        hs = HookState("ttl_test", use_session=False, max_age_secs=kwargs.pop("instance_ttl", None))
+        with patch("hooks.hook_sdk.read_state", return_value=state), \
+                patch("hooks.hook_sdk.time.time", return_value=1000.0) as clock:
+            result = hs.load(default={"fresh": True}, **kwargs)
+        return result, clock
+
+    def test_no_ttl_skips_clock(self):
+        """Without a TTL, state is returned as-is and time is never read."""
+        state = {"_updated": 0, "x": 1}
+        result, clock = self._load(state)
+        self.assertIs(result, state)
+        clock.assert_not_called()
+
+    def test_expired_returns_default_copy(self):
+        """State older than the TTL is replaced by a copy of the default."""
+        result, _ = self._load({"_updated": 100.0}, instance_ttl=60)
+        self.assertEqual(result, {"fresh": True})
+
+    def test_per_call_ttl_overrides_instance(self):
+        """max_age_secs passed to load() wins over the instance TTL."""
+        state = {"_updated": 900.0}
+        result, _ = self._load(state, instance_ttl=60, max_age_secs=3600)
+        self.assertIs(result, state)
+
+
+class TestHookStatePruning(TestCase):
+    """Tests for HookState.save_with_pruning()."""
+
+    def test_keeps_newest_entries_in_order(self):
+        """Only the max_entries newest items survive, newest first."""
+        from hooks.hook_sdk import HookState
+        hs = HookState("prune_test", use_session=False)
+        data = {"reads": {f"f{i}": {"_time": t} for i, t in enumerate([5, 1, 9, 3, 9, 7])}}
+        with patch("hooks.hook_sdk.write_state", return_value=True) as write:
+            self.assertTrue(hs.save_with_pruning(data, max_entries=3, items_key="reads"))
+        self.assertEqual(list(data["reads"]), ["f2", "f4", "f5"])
+        write.assert_called_once_with("prune_test", data)
+
+
+# =============================================================================
+# HookState Journal Tests
+# =============================================================================
+
+class TestHookStateJournal(TestCase):
+    """Tests for HookState's append-only session journal."""
+
+    def setUp(self):
+        import tempfile
+        from pathlib import Path
+        import hooks.hook_utils.session as session_module
+        self._tmp = tempfile.TemporaryDirectory()
+        self.session_dir = Path(self._tmp.name)
+        patcher = patch.object(session_module, "SESSION_STATE_DIR", self.session_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self._tmp.cleanup)
+        session_module._session_cache.clear()
+        self.addCleanup(session_module._session_cache.clear)
+
+    @staticmethod
+    def _apply(state, delta):
+        state.setdefault("items", []).append(delta["v"])
+
+    def _record(self, hs, state, value):
+        delta = {"v": value}
+        self._apply(state, delta)
+        hs.append_delta("s1", delta, live_entries=len(state["items"]))
+
+    def test_replay_in_new_process(self):
+        """A fresh HookState rebuilds state from snapshot plus journal."""
+        from hooks.hook_sdk import HookState
+        hs = HookState("journal_test", use_session=True)
+        state = hs.load_journal("s1", {"items": []}, self._apply)
+        for i in range(3):
+            self._record(hs, state, i)
+
+        self.assertTrue((self.session_dir / "s1.journal_test.jsonl").exists())
+        fresh = HookState("journal_test", use_session=True)
+        self.assertEqual(fresh.load_journal("s1", {"items": []}, self._apply)["items"], [0, 1, 2])
+
+    def test_mirror_reused_until_journal_changes(self):
+        """Loads reuse the in-memory state until another writer appends."""
+        from hooks.hook_sdk import HookState
+        hs = HookState("journal_test", use_session=True)
+        state = hs.load_journal("s1", {"items": []}, self._apply)
+        self._record(hs, state, "a")
+        self.assertIs(hs.load_journal("s1", {"items": []}, self._apply), state)
+
+        other = HookState("journal_test", use_session=True)
+        other_state = other.load_journal("s1", {"items": []}, self._apply)
+        self._record(other, other_state, "b")
+        reloaded = hs.load_journal("s1", {"items": []}, self._apply)
+        self.assertIsNot(reloaded, state)
+        self.assertEqual(reloaded["items"], ["a", "b"])
+
+    def test_compacts_when_journal_outgrows_live_entries(self):
+        """Journal folds into the snapshot once it holds mostly dead entries."""
+        from hooks.hook_sdk import HookState
+        hs = HookState("journal_test", use_session=True)
+        state = hs.load_journal("s1", {"items": []}, self._apply)
+        for i in range(5):
+            delta = {"v": i}
+            self._apply(state, delta)
+            state["items"] = state["items"][-1:]
+            hs.append_delta("s1", delta, live_entries=1)
+
+        self.assertFalse((self.session_dir / "s1.journal_test.jsonl").exists())
+        fresh = HookState("journal_test", use_session=True)
+        self.assertEqual(fresh.load_journal("s1", {"items": []}, self._apply)["items"], [4])
+
+    def test_compact_keeps_deltas_appended_by_another_process(self):
+        """Compaction gives up instead of dropping a concurrent append."""
+        from hooks.hook_sdk import HookState
+        hs = HookState("journal_test", use_session=True)
+        state = hs.load_journal("s1", {"items": []}, self._apply)
+        self._record(hs, state, "a")
+
+        other = HookState("journal_test", use_session=True)
+        other_state = other.load_journal("s1", {"items": []}, self._apply)
+        self._record(other, other_state, "b")
+
+        self.assertFalse(hs.compact("s1", state))
+        self.assertTrue((self.session_dir / "s1.journal_test.jsonl").exists())
+        fresh = HookState("journal_test", use_session=True)
+        self.assertEqual(fresh.load_journal("s1", {"items": []}, self._apply)["items"], ["a", "b"])
+
+    def test_append_waiting_on_compaction_reaches_new_journal(self):
+        """An append blocked by compaction's lock isn't written to the unlinked file."""
+        import fcntl
+        import threading
+        from hooks.hook_sdk import HookState
+        hs = HookState("journal_test", use_session=True)
+        state = hs.load_journal("s1", {"items": []}, self._apply)
+        self._record(hs, state, "a")
+        path = self.session_dir / "s1.journal_test.jsonl"
+
+        other = HookState("journal_test", use_session=True)
+        with open(path, "ab") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            appender = threading.Thread(target=other.append_delta, args=("s1", {"v": "b"}))
+            appender.start()
+            time.sleep(0.1)
+            # Finish a compaction of the state holding "a"
+            hs.save({"items": ["a"]}, "s1")
+            path.unlink()
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        appender.join(5)
+
+        fresh = HookState("journal_test", use_session=True)
+        self.assertEqual(fresh.load_journal("s1", {"items": []}, self._apply)["items"], ["a", "b"])
+
+    def test_expired_state_resets_snapshot_and_journal(self):
+        """Expired state returns the default and is not replayed again."""
+        from hooks.hook_sdk import HookState
+        hs = HookState("journal_test", use_session=True, max_age_secs=60)
+        state = hs.load_journal("s1", {"items": []}, self._apply)
+        self._record(hs, state, "old")
+
+        with patch("hooks.hook_sdk.time.time", return_value=time.time() + 120):
+            fresh = HookState("journal_test", use_session=True, max_age_secs=60)
+            expired = fresh.load_journal("s1", {"items": []}, self._apply)
+        self.assertEqual(expired["items"], [])
+        self._record(fresh, expired, "new")
+        again = HookState("journal_test", use_session=True, max_age_secs=60)
+        self.assertEqual(again.load_journal("s1", {"items": []}, self._apply)["items"], ["new"])
@@ -1,15 +1,26 @@
 """Tests for hierarchical_rules module."""
+import os
 import sys
 from pathlib import Path
+from unittest.mock import patch
 
 import pytest
 
+from hooks.handlers import hierarchical_rules
 from hooks.handlers.hierarchical_rules import (
     parse_frontmatter,
 )
 from hooks.hook_sdk import Patterns
 
 
+@pytest.fixture(autouse=True)
+def isolated_dir_index(tmp_path, monkeypatch):
+    """Keep the on-disk rule index out of the real data directory."""
+    monkeypatch.setattr(hierarchical_rules, "HIERARCHY_INDEX_FILE", tmp_path / "hierarchy_index.json")
+    monkeypatch.setattr(hierarchical_rules, "_dir_index", None)
+    monkeypatch.setattr(hierarchical_rules, "_dir_index_dirty", False)
+
+
 class TestParseFrontmatter:
     """Tests for YAML frontmatter parsing."""
 
@@ -69,6 +80,28 @@ class TestMatchesPathPattern:
         assert Patterns.matches_path_pattern("lib/file.ts", "{src,lib}/*.ts") is True
         assert Patterns.matches_path_pattern("other/file.ts", "{src,lib}/*.ts") is False
 
+    def test_nested_brace_expansion(self):
+        """Brace groups may nest; unbalanced braces stay literal."""
+        pattern = "{src,lib/{a,b}}/*.ts"
+        assert Patterns.matches_path_pattern("src/file.ts", pattern) is True
+        assert Patterns.matches_path_pattern("lib/b/file.ts", pattern) is True
+        assert Patterns.matches_path_pattern("lib/c/file.ts", pattern) is False
+        assert Patterns.matches_path_pattern("{a/x.ts", "{a/*.ts") is True
+        assert Patterns.matches_path_pattern("[{]x", "[{]x") is False
+        assert Patterns.matches_path_pattern("{x", "[{]x") is True
+
+    def test_regex_metacharacters_literal(self):
+        """Regex metacharacters in patterns should match literally."""
+        assert Patterns.matches_path_pattern("a+b (1).ts", "a+b (1).ts") is True
+        assert Patterns.matches_path_pattern("aab (1).ts", "a+b (1).ts") is False
+
+    def test_question_mark_and_class(self):
+        """? and [!x] should behave like glob wildcards within a segment."""
+        assert Patterns.matches_path_pattern("f1.ts", "f?.ts") is True
+        assert Patterns.matches_path_pattern("f/.ts", "f?.ts") is False
+        assert Patterns.matches_path_pattern("b.ts", "[!a].ts") is True
+        assert Patterns.matches_path_pattern("a.ts", "[!a].ts") is False
+
 
 class TestPatternCaching:
     """Tests for pattern compilation caching."""
@@ -99,3 +132,227 @@ class TestPatternCaching:
         info = Patterns.compile_pattern.cache_info()
         assert info.misses == 3
         assert info.currsize == 3
+
+
+class TestScanRuleFiles:
+    """Tests for per-directory rule file discovery."""
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        hierarchical_rules._dir_rule_files.clear()
+        yield
+        hierarchical_rules._dir_rule_files.clear()
+
+    def test_claude_md_then_sorted_rules(self, tmp_path):
+        """CLAUDE.md comes first, then visible .claude/rules/*.md sorted by name."""
+        (tmp_path / "CLAUDE.md").write_text("root")
+        rules = tmp_path / ".claude" / "rules"
+        rules.mkdir(parents=True)
+        for name in ("b.md", "a.md", ".hidden.md", "notes.txt"):
+            (rules / name).write_text(name)
+
+        files = hierarchical_rules._scan_rule_files(str(tmp_path))
+        assert [Path(f).name for f in files] == ["CLAUDE.md", "a.md", "b.md"]
+
+    def test_empty_directory_cached(self, tmp_path):
+        """Directories without rules are cached as empty."""
+        assert hierarchical_rules._scan_rule_files(str(tmp_path)) == ()
+        (tmp_path / "CLAUDE.md").write_text("added later")
+        assert hierarchical_rules._scan_rule_files(str(tmp_path)) == ()
+
+
+def _clear_rule_caches():
+    for cache in (hierarchical_rules._dir_rule_files, hierarchical_rules._hierarchy_cache,
+                  hierarchical_rules._rule_contents, hierarchical_rules._rule_paths):
+        cache.clear()
+
+
+class TestFindClaudeFiles:
+    """Tests for walking up the directory tree."""
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        _clear_rule_caches()
+        yield
+        _clear_rule_caches()
+
+    def test_closest_first_and_stops_at_root(self, tmp_path):
+        """Rules are collected closest-first, not above stop_at."""
+        (tmp_path / "CLAUDE.md").write_text("outer")
+        project = tmp_path / "project"
+        nested = project / "src" / "api"
+        nested.mkdir(parents=True)
+        (project / "CLAUDE.md").write_text("project")
+        (nested / "CLAUDE.md").write_text("api")
+
+        results = hierarchical_rules.find_claude_files(str(nested), str(project))
+        assert [content for _, content in results] == ["api", "project"]
+        assert results[0][0] == str(nested.resolve())
+
+    def test_sibling_with_shared_prefix_not_walked(self, tmp_path):
+        """A directory that merely shares stop_at's name prefix is outside it."""
+        project = tmp_path / "project"
+        sibling = tmp_path / "project-other"
+        project.mkdir()
+        sibling.mkdir()
+        (sibling / "CLAUDE.md").write_text("sibling")
+
+        assert hierarchical_rules.find_claude_files(str(sibling), str(project)) == []
+
+    def test_root_stop_walks_all_ancestors(self, tmp_path):
+        (tmp_path / "CLAUDE.md").write_text("top")
+        nested = tmp_path / "a" / "b"
+        nested.mkdir(parents=True)
+
+        results = hierarchical_rules.find_claude_files(str(nested), None)
+        assert (str(tmp_path.resolve()), "top") in results
+
+    def test_second_call_is_cached(self, tmp_path):
+        (tmp_path / "CLAUDE.md").write_text("# Rules")
+        first = hierarchical_rules.find_claude_files(str(tmp_path), str(tmp_path))
+        with patch.object(hierarchical_rules, "_walk_rule_files",
+                          side_effect=AssertionError("rewalked")), \
+             patch("builtins.open", side_effect=AssertionError("reread")):
+            second = hierarchical_rules.find_claude_files(str(tmp_path), str(tmp_path))
+        assert first == second == [(str(tmp_path), "# Rules")]
+
+    def test_edited_rule_reread(self, tmp_path):
+        """Cached content is dropped as soon as the file's mtime changes."""
+        rule = tmp_path / "CLAUDE.md"
+        rule.write_text("old")
+        assert hierarchical_rules.find_claude_files(str(tmp_path), str(tmp_path))[0][1] == "old"
+
+        rule.write_text("new")
+        st = rule.stat()
+        os.utime(rule, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+        assert hierarchical_rules.find_claude_files(str(tmp_path), str(tmp_path))[0][1] == "new"
+
+
+class TestGetApplicableRules:
+    """Tests for paths filtering in get_applicable_rules."""
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        _clear_rule_caches()
+        yield
+        _clear_rule_caches()
+
+    def test_rejected_rule_body_not_read(self, tmp_path):
+        """A `paths` pattern in the file head that rejects the target skips the full read."""
+        (tmp_path / "CLAUDE.md").write_text(
+            "---\npaths: docs/**\n---\n" + "- body line\n" * 500
+        )
+        (tmp_path / "src").mkdir()
+
+        with patch.object(hierarchical_rules, "_read_rule_file",
+                          side_effect=AssertionError("read in full")):
+            rules = hierarchical_rules.get_applicable_rules(
+                str(tmp_path / "src" / "app.py"), str(tmp_path))
+        assert rules == []
+
+    def test_matching_rule_returned(self, tmp_path):
+        (tmp_path / "CLAUDE.md").write_text("---\npaths: src/*.py\n---\n- Use types\n")
+        (tmp_path / "src").mkdir()
+
+        rules = hierarchical_rules.get_applicable_rules(
+            str(tmp_path / "src" / "app.py"), str(tmp_path))
+        assert [r["content"] for r in rules] == ["- Use types\n"]
+
+    def test_frontmatter_longer_than_peek(self, tmp_path):
+        """`paths` beyond the peeked head is still honoured from the full parse."""
+        filler = "".join(f"key{i}: value\n" for i in range(200))
+        (tmp_path / "CLAUDE.md").write_text(
+            "---\n" + filler + "paths: docs/**\n---\n- body\n"
+        )
+        (tmp_path / "src").mkdir()
+
+        rule_file = str(tmp_path / "CLAUDE.md")
+        mtime_ns = hierarchical_rules._rule_mtime(rule_file)
+        assert hierarchical_rules._peek_paths_pattern(rule_file, mtime_ns) == ""
+        rules = hierarchical_rules.get_applicable_rules(
+            str(tmp_path / "src" / "app.py"), str(tmp_path))
+        assert rules == []
+
+    def test_early_stop_leaves_parents_unscanned(self, tmp_path):
+        """Stopping after the first rule never scans the directories above it."""
+        nested = tmp_path / "a" / "b"
+        nested.mkdir(parents=True)
+        for directory in (tmp_path, tmp_path / "a", nested):
+            (directory / "CLAUDE.md").write_text("- rule")
+
+        scanned = []
+        real_scan = hierarchical_rules._scan_rule_files
+
+        def recording_scan(directory):
+            scanned.append(directory)
+            return real_scan(directory)
+
+        with patch.object(hierarchical_rules, "_scan_rule_files", recording_scan):
+            first = next(hierarchical_rules.iter_applicable_rules(
+                str(nested / "f.py"), str(tmp_path)))
+        assert first["source"] == str(nested.resolve())
+        assert scanned == [str(nested.resolve())]
+        assert len(hierarchical_rules.get_applicable_rules(
+            str(nested / "f.py"), str(tmp_path))) == 3
+
+    def test_undecodable_rule_skipped(self, tmp_path):
+        (tmp_path / "CLAUDE.md").write_bytes(b"- rule \xff\xfe\n")
+        assert hierarchical_rules.find_claude_files(str(tmp_path), str(tmp_path)) == []
+
+
+class TestDirIndex:
+    """Tests for the on-disk rule file index."""
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        _clear_rule_caches()
+        yield
+        _clear_rule_caches()
+
+    def _new_process(self, monkeypatch):
+        """Simulate a fresh hook process: empty memory caches, index reloaded."""
+        _clear_rule_caches()
+        monkeypatch.setattr(hierarchical_rules, "_dir_index", None)
+
+    def test_index_reused_across_processes(self, tmp_path, monkeypatch):
+        project = tmp_path / "project"
+        project.mkdir()
+        (project / "CLAUDE.md").write_text("- rule")
+        first = hierarchical_rules._scan_rule_files(str(project))
+        hierarchical_rules.flush_dir_index()
+        assert hierarchical_rules.HIERARCHY_INDEX_FILE.exists()
+
+        self._new_process(monkeypatch)
+        with patch.object(hierarchical_rules, "_list_rule_files",
+                          side_effect=AssertionError("rescanned")):
+            assert hierarchical_rules._scan_rule_files(str(project)) == first
+
+    def test_new_rule_file_invalidates_entry(self, tmp_path, monkeypatch):
+        project = tmp_path / "project"
+        project.mkdir()
+        assert hierarchical_rules._scan_rule_files(str(project)) == ()
+        hierarchical_rules.flush_dir_index()
+
+        rules = project / ".claude" / "rules"
+        rules.mkdir(parents=True)
+        (rules / "a.md").write_text("- a")
+        (project / "CLAUDE.md").write_text("- root")
+        st = project.stat()
+        os.utime(project, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+        self._new_process(monkeypatch)
+        files = hierarchical_rules._scan_rule_files(str(project))
+        assert [Path(f).name for f in files] == ["CLAUDE.md", "a.md"]
+
+    def test_flush_trims_to_maxsize(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(hierarchical_rules, "Limits",
+                            type("L", (), {"HIERARCHY_INDEX_MAXSIZE": 2}))
+        dirs = []
+        for name in ("a", "b", "c"):
+            (tmp_path / name).mkdir()
+            dirs.append(str(tmp_path / name))
+            hierarchical_rules._scan_rule_files(dirs[-1])
+        hierarchical_rules.flush_dir_index()
+
+        self._new_process(monkeypatch)
+        assert list(hierarchical_rules._get_dir_index()) == dirs[1:]
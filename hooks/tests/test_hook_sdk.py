@@ -1,4 +1,6 @@
 """Tests for hook_sdk module."""
+import io
+import json
 import sys
 import threading
 import time
@@ -7,7 +9,10 @@ from unittest.mock import patch, MagicMock
 
 import pytest
 
-from hooks.hook_sdk import detect_event, RateLimiter, EventType
+from hooks.hook_sdk import (
+    detect_event, RateLimiter, EventType, BaseContext, PreToolUseContext, PostToolUseContext,
+    dispatch_handler, run_standalone, write_response,
+)
 
 
 class TestDetectEvent:
@@ -58,10 +63,136 @@ class TestDetectEvent:
         ctx = {"event": "Stop"}
         assert detect_event(ctx) == "Stop"
 
+    def test_post_tool_use_takes_precedence_over_event(self):
+        """Tool response wins over an explicit event field."""
+        ctx = {"event": "Stop", "tool_response": "output"}
+        assert detect_event(ctx) == "PostToolUse"
+
+    def test_non_string_event_ignored(self):
+        """Unhashable or unknown event values fall through to the default."""
+        assert detect_event({"event": ["Stop"]}) == "PreToolUse"
+        assert detect_event({"event": "Unknown", "user_prompt": "hi"}) == "UserPromptSubmit"
+
+
+class TestContexts:
+    """Tests for context wrappers."""
+
+    def test_tool_input_wrapped_once(self):
+        ctx = PreToolUseContext({"tool_name": "Read", "tool_input": {"file_path": "/a.py"}})
+        assert ctx.tool_input is ctx.tool_input
+        assert ctx.tool_input.file_path == "/a.py"
+        assert ctx.tool_input.get("missing") is None
+
+    def test_unknown_fields_not_attributes(self):
+        """Unknown fields go through get(); attribute typos raise."""
+        ctx = PostToolUseContext({"tool_input": {"url": "https://x"}, "extra": 1})
+        assert ctx.tool_input.url == "https://x"
+        assert ctx.tool_input.subagent_type == ""
+        assert ctx.get("extra") == 1
+        with pytest.raises(AttributeError):
+            ctx.extra
+        with pytest.raises(AttributeError):
+            ctx.tool_result.missing
+
+    def test_post_tool_result_prefers_tool_response(self):
+        ctx = PostToolUseContext({"tool_response": {"exit_code": 1}, "tool_result": {"exit_code": 0}})
+        assert ctx.tool_result is ctx.tool_result
+        assert ctx.tool_result.success is False
+        assert ctx.tool_input.raw == {}
+
+    def test_hot_fields_are_plain_attributes(self):
+        """tool_name, file_path and command are slots, not properties."""
+        ctx = PreToolUseContext({"tool_name": "Bash", "tool_input": {"command": "ls"}})
+        assert ctx.tool_name == "Bash"
+        assert ctx.tool_input.command == "ls"
+        assert ctx.tool_input.file_path == ""
+        assert not isinstance(vars(PreToolUseContext).get("tool_name"), property)
+        assert not isinstance(vars(type(ctx.tool_input)).get("command"), property)
+        assert ctx.is_bash
+
+    def test_default_construction(self):
+        """Contexts built without raw get an empty dict and empty wrappers."""
+        ctx = PostToolUseContext()
+        assert ctx.raw == {}
+        assert ctx.tool_input.raw == {}
+        assert ctx.tool_result.success is True
+        assert PreToolUseContext().raw is not PreToolUseContext().raw
+
+    def test_contexts_use_slots(self):
+        ctx = PreToolUseContext({"cwd": "/project"})
+        assert not hasattr(ctx, "__dict__")
+        assert ctx.cwd == "/project"
+        assert ctx == PreToolUseContext({"cwd": "/project"})
+
+
+class TestDispatchHandler:
+    """Tests for the dispatch_handler decorator."""
+
+    @pytest.mark.parametrize("event, expected", [
+        ("PreToolUse", PreToolUseContext),
+        ("PostToolUse", PostToolUseContext),
+        ("Stop", BaseContext),
+    ])
+    def test_context_type_by_event(self, event, expected):
+        handler = dispatch_handler("test", event=event)(lambda ctx: {"ctx": ctx})
+        ctx = handler({"tool_name": "Read"})["ctx"]
+        assert type(ctx) is expected
+        assert ctx.raw == {"tool_name": "Read"}
+
+    def test_handler_errors_return_none(self):
+        def boom(ctx):
+            raise ValueError("boom")
+        with patch("hooks.hook_sdk.log_event") as log:
+            assert dispatch_handler("test")(boom)({}) is None
+        log.assert_called_once()
+
+
+class TestRunStandalone:
+    """Tests for the standalone entry point."""
+
+    def _run(self, monkeypatch, capsys, payload: bytes, handler):
+        monkeypatch.setattr(sys, "stdin", io.TextIOWrapper(io.BytesIO(payload)))
+        with pytest.raises(SystemExit) as exc:
+            run_standalone(handler)
+        assert exc.value.code == 0
+        return capsys.readouterr().out
+
+    def test_result_written_as_json(self, monkeypatch, capsys):
+        out = self._run(monkeypatch, capsys, b'{"tool_name": "Bash"}',
+                        lambda raw: {"message": raw["tool_name"]})
+        assert json.loads(out) == {"message": "Bash"}
+
+    def test_write_response_single_flushed_write(self, monkeypatch):
+        """The JSON line goes out in one write, after earlier text output."""
+        raw = io.BytesIO()
+        writes = []
+        original_write = raw.write
+        monkeypatch.setattr(raw, "write", lambda b: writes.append(bytes(b)) or original_write(b))
+        out = io.TextIOWrapper(raw, write_through=False)
+        monkeypatch.setattr(sys, "stdout", out)
+        print("note")
+        write_response({"message": "done"})
+        assert writes == [b"note\n", b'{"message":"done"}\n']
+
+    def test_invalid_input_exits_silently(self, monkeypatch, capsys):
+        out = self._run(monkeypatch, capsys, b"not json", lambda raw: {"message": "x"})
+        assert out == ""
+
 
 class TestRateLimiter:
     """Tests for thread-safe RateLimiter with state persistence."""
 
+    @pytest.fixture(autouse=True)
+    def clear_windows(self):
+        """Drop in-memory window state so nothing is flushed to real state."""
+        RateLimiter._windows.clear()
+        RateLimiter._dirty.clear()
+        RateLimiter._pending_ops = 0
+        yield
+        RateLimiter._windows.clear()
+        RateLimiter._dirty.clear()
+        RateLimiter._pending_ops = 0
+
     def test_rate_limiter_allows_within_limit(self, tmp_path):
         """Should allow requests within rate limit."""
         with patch('hooks.hook_sdk.read_state', return_value={"timestamps": []}):
@@ -91,3 +222,73 @@ class TestRateLimiter:
             with patch('hooks.hook_sdk.write_state'):
                 limiter = RateLimiter("test4", max_count=2, window_secs=1)
                 assert limiter.consume() is True  # Old timestamps expired
+
+    def test_rate_limiters_have_independent_locks(self):
+        """Unrelated limiters don't share a lock."""
+        a = RateLimiter("lock-a", max_count=1, window_secs=1)
+        b = RateLimiter("lock-b", max_count=1, window_secs=1)
+        assert a._lock is not b._lock
+
+    def test_same_key_limiters_share_lock(self):
+        """Limiters guarding the same state key share one lock."""
+        a = RateLimiter("lock-shared", max_count=1, window_secs=1)
+        b = RateLimiter("lock-shared", max_count=5, window_secs=10)
+        assert a._lock is b._lock
+
+    def test_check_does_not_take_lock(self):
+        """check() is a lock-free read."""
+        limiter = RateLimiter("lockfree", max_count=1, window_secs=1)
+        with patch('hooks.hook_sdk.read_state', return_value={"timestamps": []}):
+            with limiter._lock:
+                assert limiter.check() is True
+
+    def test_zero_window_never_limits(self):
+        """A zero-second window counts nothing, so actions are always allowed."""
+        with patch('hooks.hook_sdk.read_state', return_value={}), \
+             patch('hooks.hook_sdk.write_state'):
+            limiter = RateLimiter("zero", max_count=1, window_secs=0)
+            for _ in range(3):
+                assert limiter.consume() is True
+            assert limiter.check() is True
+
+    def test_bucketed_window_blocks_then_expires(self):
+        """Counts live in fixed buckets and expire as the window slides."""
+        store = {}
+        clock = [1000.0]
+        with patch('hooks.hook_sdk.read_state', side_effect=lambda k, d=None: store.get(k, d)), \
+             patch('hooks.hook_sdk.write_state', side_effect=lambda k, v: store.__setitem__(k, v)), \
+             patch('hooks.hook_sdk.time.time', side_effect=lambda: clock[0]):
+            limiter = RateLimiter("buckets", max_count=2, window_secs=10)
+            assert limiter.consume() is True
+            clock[0] += 3
+            assert limiter.consume() is True
+            assert limiter.consume() is False
+            assert limiter.check() is False
+
+            assert RateLimiter.flush() == 1
+            state = store[limiter.state_key]
+            assert len(state["buckets"]) == RateLimiter.BUCKETS
+            assert sum(state["buckets"]) == 2
+
+            clock[0] += 8  # First consume has left the window, second hasn't
+            assert limiter.consume() is True
+            assert limiter.consume() is False
+
+            clock[0] += 20  # Everything expired
+            assert limiter.check() is True
+            limiter.reset()
+            assert sum(store[limiter.state_key]["buckets"]) == 0
+
+    def test_consume_batches_writes(self):
+        """consume() keeps counts in memory and writes in batches."""
+        store = {}
+        with patch('hooks.hook_sdk.read_state', side_effect=lambda k, d=None: store.get(k, d)), \
+             patch('hooks.hook_sdk.write_state', side_effect=lambda k, v: store.__setitem__(k, v)) as write:
+            RateLimiter._last_flush = time.time()
+            limiter = RateLimiter("batched", max_count=100, window_secs=60)
+            for _ in range(RateLimiter.FLUSH_EVERY - 1):
+                assert limiter.consume() is True
+            assert write.call_count == 0
+            assert limiter.consume() is True
+            assert write.call_count == 1
+            assert sum(store[limiter.state_key]["buckets"]) == RateLimiter.FLUSH_EVERY
@@ -16,6 +16,7 @@ from hooks.hook_utils import (
     read_state, write_state,
     get_session_id, read_session_state, write_session_state,
     is_hook_disabled, record_usage,
+    iter_lines_bytes, iter_jsonl,
 )
 import hooks.hook_utils.hooks as hooks_module
 
@@ -59,6 +60,19 @@ class TestIO:
         content = json.loads(test_file.read_text())
         assert content == {"hello": "world"}
 
+    def test_iter_lines_bytes_spans_chunks(self):
+        """iter_lines_bytes should rejoin lines split across chunk reads."""
+        import io
+        data = b'{"a": 1}\n\n{"b": "long value"}\ntail'
+        lines = list(iter_lines_bytes(io.BytesIO(data), bufsize=4))
+        assert lines == [b'{"a": 1}', b"", b'{"b": "long value"}', b"tail"]
+
+    def test_iter_jsonl_skips_blank_and_invalid(self, tmp_path):
+        """iter_jsonl should skip blank and malformed lines."""
+        test_file = tmp_path / "test.jsonl"
+        test_file.write_text('{"a": 1}\n\nnot json\n{"b": 2}')
+        assert list(iter_jsonl(test_file)) == [{"a": 1}, {"b": 2}]
+
 
 class TestState:
     """Tests for hook_utils.state module."""
@@ -94,6 +108,17 @@ class TestSession:
             session_id = get_session_id()
             assert session_id == "default"
 
+    def test_get_session_state_reads_file(self, tmp_path, monkeypatch):
+        """get_session_state should parse the file, or return {} if unusable."""
+        import hooks.hook_utils.session as session_module
+        state_file = tmp_path / "session-state.json"
+        monkeypatch.setattr(session_module, "SESSION_STATE_FILE", state_file)
+        assert session_module.get_session_state() == {}
+        state_file.write_text('{"active": true}')
+        assert session_module.get_session_state() == {"active": True}
+        state_file.write_text("{not json")
+        assert session_module.get_session_state() == {}
+
 
 class TestHooks:
     """Tests for hook_utils.hooks module."""
@@ -140,3 +165,50 @@ class TestGracefulMain:
         with pytest.raises(SystemExit) as exc_info:
             failing_func()
         assert exc_info.value.code == 0
+
+
+class TestLogQueue:
+    """Tests for the background log_event queue."""
+
+    def test_events_written_on_flush(self):
+        """Queued events reach loguru by the time the queue is flushed."""
+        import hooks.hook_utils.logging as logging_module
+        with patch.object(logging_module, "_emit") as mock_emit:
+            log_event("test_hook", "queued", {"n": 1})
+            logging_module.flush_log_queue()
+        mock_emit.assert_any_call("test_hook", "queued", {"n": 1}, "info")
+
+    def test_full_queue_drops_and_reports(self):
+        """A full queue drops events and reports the count on flush."""
+        import queue
+        import hooks.hook_utils.logging as logging_module
+        logging_module.flush_log_queue()
+        with patch.object(logging_module, "_log_queue", queue.Queue(maxsize=1)), \
+             patch.object(logging_module, "_ensure_log_worker"), \
+             patch.object(logging_module, "_emit") as mock_emit:
+            log_event("test_hook", "first")
+            log_event("test_hook", "second")
+            logging_module.flush_log_queue()
+        mock_emit.assert_any_call("test_hook", "first", None, "info")
+        mock_emit.assert_any_call("logging", "log_queue_dropped", {"count": 1}, "warning")
+
+
+class TestTranscript:
+    """Tests for hook_utils.transcript module."""
+
+    def test_analyze_tool_usage_detects_technologies(self, tmp_path):
+        """analyze_tool_usage should tag technologies from file paths."""
+        from hooks.hook_utils.transcript import analyze_tool_usage
+        transcript = tmp_path / "transcript.jsonl"
+        entries = [
+            {"tool_name": "Edit", "tool_input": {"file_path": "/p/app.py"}},
+            {"tool_name": "Write", "tool_input": {"file_path": "/p/web/index.tsx"}},
+            {"tool_name": "Read", "tool_input": {"file_path": "/p/Cargo.toml"}},
+        ]
+        transcript.write_text("\n".join(json.dumps(e) for e in entries) + "\n")
+
+        result = analyze_tool_usage(transcript)
+
+        assert sorted(result["technologies"]) == ["Python", "Rust", "TypeScript"]
+        assert result["files_modified"] == ["/p/app.py"]
+        assert result["tools_used"] == {"Edit": 1, "Write": 1, "Read": 1}
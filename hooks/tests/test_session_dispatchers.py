@@ -33,6 +33,7 @@ from hooks.handlers.transcript_converter import (
     convert_transcript,
     find_transcript_files,
 )
+from hooks.handlers import transcript_converter
 
 
 class TestDetectProjectType(TestCase):
@@ -765,6 +766,14 @@ class TestConvertTranscript(TestCase):
         import shutil
         shutil.rmtree(self.temp_dir, ignore_errors=True)
 
+    def _load_output(self, result):
+        """Return (meta dict, message list) for a converted session."""
+        with open(result.with_suffix(".meta.json")) as f:
+            meta = json.load(f)
+        with open(result) as f:
+            messages = [json.loads(line) for line in f]
+        return meta, messages
+
     def test_basic_conversion(self):
         # Create transcript
         transcript_dir = Path(self.temp_dir) / "session123"
@@ -777,13 +786,13 @@ class TestConvertTranscript(TestCase):
         result = convert_transcript(transcript, self.output_dir, "overwrite")
 
         self.assertTrue(result.exists())
+        self.assertEqual(result.name, "session123.jsonl")
 
-        with open(result) as f:
-            data = json.load(f)
+        meta, messages = self._load_output(result)
 
-        self.assertEqual(data["session_id"], "session123")
-        self.assertEqual(data["message_count"], 1)
-        self.assertEqual(data["messages"][0]["content"], "Hello")
+        self.assertEqual(meta["session_id"], "session123")
+        self.assertEqual(meta["message_count"], 1)
+        self.assertEqual(messages[0]["content"], "Hello")
 
     def test_append_mode(self):
         # Create transcript
@@ -804,11 +813,11 @@ class TestConvertTranscript(TestCase):
         # Second conversion (append)
         result2 = convert_transcript(transcript, self.output_dir, "append")
 
-        with open(result2) as f:
-            data = json.load(f)
+        meta, messages = self._load_output(result2)
 
         # Should have both messages
-        self.assertEqual(data["message_count"], 2)
+        self.assertEqual(meta["message_count"], 2)
+        self.assertEqual(len(messages), 2)
 
     def test_deduplicate_timestamps(self):
         # Create transcript
@@ -829,11 +838,94 @@ class TestConvertTranscript(TestCase):
         # Second conversion should deduplicate
         result2 = convert_transcript(transcript, self.output_dir, "append")
 
-        with open(result2) as f:
-            data = json.load(f)
+        meta, messages = self._load_output(result2)
 
         # Should deduplicate by timestamp (only first message kept)
-        self.assertEqual(data["message_count"], 1)
+        self.assertEqual(meta["message_count"], 1)
+        self.assertEqual(messages[0]["content"], "Hello")
+
+
+    def test_append_resumes_from_last_offset(self):
+        transcript_dir = Path(self.temp_dir) / "session123"
+        transcript_dir.mkdir()
+        transcript = transcript_dir / "transcript.jsonl"
+
+        with open(transcript, "w") as f:
+            f.write('{"type": "user", "content": "First", "timestamp": "2024-01-01T00:00:00"}\n')
+
+        result1 = convert_transcript(transcript, self.output_dir, "append")
+        first_offset = self._load_output(result1)[0]["last_offset"]
+        self.assertEqual(first_offset, transcript.stat().st_size)
+
+        with open(transcript, "a") as f:
+            f.write('{"type": "user", "content": "Second", "timestamp": "2024-01-01T00:01:00"}\n')
+
+        with patch("hooks.handlers.transcript_converter._parse_jsonl_from",
+                   wraps=transcript_converter._parse_jsonl_from) as mock_parse:
+            result2 = convert_transcript(transcript, self.output_dir, "append")
+        mock_parse.assert_called_once_with(transcript, first_offset)
+
+        meta, messages = self._load_output(result2)
+        self.assertEqual([m["content"] for m in messages], ["First", "Second"])
+        self.assertEqual(meta["last_offset"], transcript.stat().st_size)
+
+
+    def test_append_does_not_rewrite_existing_messages(self):
+        transcript_dir = Path(self.temp_dir) / "session123"
+        transcript_dir.mkdir()
+        transcript = transcript_dir / "transcript.jsonl"
+
+        with open(transcript, "w") as f:
+            f.write('{"type": "user", "content": "First", "timestamp": "2024-01-01T00:00:00"}\n')
+        result = convert_transcript(transcript, self.output_dir, "append")
+        first_bytes = result.read_bytes()
+
+        with open(transcript, "a") as f:
+            f.write('{"type": "user", "content": "Second", "timestamp": "2024-01-01T00:01:00"}\n')
+        convert_transcript(transcript, self.output_dir, "append")
+
+        self.assertTrue(result.read_bytes().startswith(first_bytes))
+        self.assertEqual(len(result.read_bytes().splitlines()), 2)
+
+
+class TestRunConverter(TestCase):
+    """Tests for run_converter function."""
+
+    def setUp(self):
+        self.temp_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        import shutil
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _make_transcript(self, *parts):
+        transcript = self.temp_dir.joinpath(*parts, "transcript.jsonl")
+        transcript.parent.mkdir(parents=True)
+        transcript.write_text('{"type": "user", "content": "Hi", "timestamp": "%s"}\n' % "/".join(parts))
+        return transcript
+
+    def test_disabled_by_default(self):
+        with patch.dict(os.environ, {"CLAUDE_TRANSCRIPT_CONVERT": "false"}):
+            self.assertEqual(transcript_converter.run_converter(), [])
+
+    def test_converts_sessions_in_parallel(self):
+        transcripts = [
+            self._make_transcript("a", "session1"),
+            self._make_transcript("a", "session2"),
+            # Same session name under another base: must share a worker
+            self._make_transcript("b", "session1"),
+        ]
+
+        with patch.dict(os.environ, {"CLAUDE_TRANSCRIPT_CONVERT": "true", "CLAUDE_TRANSCRIPT_MODE": "append"}), \
+             patch.object(transcript_converter, "find_transcript_files", return_value=transcripts), \
+             patch.object(Path, "home", return_value=self.temp_dir):
+            converted = transcript_converter.run_converter()
+
+        output_dir = self.temp_dir / ".claude" / "data" / "transcripts"
+        self.assertEqual(sorted(converted), sorted(
+            [str(output_dir / "session1.jsonl")] * 2 + [str(output_dir / "session2.jsonl")]
+        ))
+        self.assertEqual(len((output_dir / "session1.jsonl").read_text().splitlines()), 2)
 
 
 class TestFindTranscriptFiles(TestCase):
@@ -849,6 +941,20 @@ class TestFindTranscriptFiles(TestCase):
         result = find_transcript_files()
         self.assertIsInstance(result, list)
 
+    def test_walker_respects_depth_limit(self):
+        import shutil
+        base = Path(tempfile.mkdtemp())
+        try:
+            for rel in ["proj/sess/transcript.jsonl", "a/b/c/d/transcript.jsonl", "proj/other.jsonl"]:
+                path = base / rel
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_text("")
+
+            found = list(transcript_converter._find_transcripts(base, max_depth=3))
+            self.assertEqual(found, [base / "proj" / "sess" / "transcript.jsonl"])
+        finally:
+            shutil.rmtree(base, ignore_errors=True)
+
 
 if __name__ == "__main__":
     main()
@@ -6,6 +6,7 @@ Tests for consolidated tool tracking, token monitoring, and failure detection.
 
 import sys
 import time
+import struct
 import tempfile
 import json
 from pathlib import Path
@@ -24,13 +25,19 @@ from hooks.handlers.tool_analytics import (
     save_daily_stats,
     load_tracker_state,
     save_tracker_state,
+    prune_token_snapshots,
+    count_errors_warnings,
+    extract_build_errors,
+    detect_build_tool,
     track_tool_analytics,
+    _analyze_result_once,
     get_error_patterns,
     TOOL_ALTERNATIVES,
     FAILURE_THRESHOLD,
     OUTPUT_WARNING_THRESHOLD,
     OUTPUT_CRITICAL_THRESHOLD,
     DAILY_WARNING_THRESHOLD,
+    CHARS_PER_TOKEN,
 )
 from hooks.hook_sdk import PostToolUseContext
 
@@ -183,6 +190,54 @@ class TestGetDailyLogPath(TestCase):
         path = get_daily_log_path()
         self.assertIn("tracking", str(path))
 
+    def test_date_refreshes_after_midnight(self):
+        """Cached date string is recomputed once its midnight has passed."""
+        from hooks.handlers import tool_analytics
+        with patch.dict(tool_analytics._today_cache, {"until": 0.0, "str": "1999-01-01"}):
+            self.assertEqual(tool_analytics._today_str(), datetime.now().strftime("%Y-%m-%d"))
+            self.assertGreater(tool_analytics._today_cache["until"], time.time())
+
+
+class TestPruneTokenSnapshots(TestCase):
+    """Tests for prune_token_snapshots."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmpdir.name) / "token-snapshots.bin"
+        patcher = patch("hooks.handlers.tool_analytics.TOKEN_SNAPSHOTS_FILE", self.path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.tmpdir.cleanup)
+
+    @staticmethod
+    def _records(timestamps):
+        return b"".join(struct.pack("<QQQ", ts, ts * 10, 1) for ts in timestamps)
+
+    def test_keeps_entries_at_or_after_cutoff(self):
+        """Entries older than the cutoff are dropped, the tail is kept intact."""
+        self.path.write_bytes(self._records([100, 200, 300, 400]))
+        prune_token_snapshots(300)
+        self.assertEqual(self.path.read_bytes(), self._records([300, 400]))
+
+    def test_all_entries_expired(self):
+        """File is emptied when every entry is older than the cutoff."""
+        self.path.write_bytes(self._records([100, 200]))
+        prune_token_snapshots(1000)
+        self.assertEqual(self.path.read_bytes(), b"")
+
+    def test_nothing_to_prune(self):
+        """File is left untouched when the first entry is recent."""
+        self.path.write_bytes(self._records([500, 600]))
+        before = self.path.read_bytes()
+        prune_token_snapshots(100)
+        self.assertEqual(self.path.read_bytes(), before)
+
+    def test_drops_trailing_partial_record(self):
+        """A torn final record is discarded so appends stay aligned."""
+        self.path.write_bytes(self._records([500, 600]) + b"\x01\x02")
+        prune_token_snapshots(100)
+        self.assertEqual(self.path.read_bytes(), self._records([500, 600]))
+
 
 class TestLoadSaveTrackerState(TestCase):
     """Tests for load_tracker_state and save_tracker_state."""
@@ -215,17 +270,32 @@ class TestLoadSaveTrackerState(TestCase):
         self.assertIn("last_update", state)
         mock_write.assert_called_once()
 
+    @patch("hooks.handlers.tool_analytics.write_session_state")
+    @patch("hooks.handlers.tool_analytics.read_session_state")
+    def test_recent_errors_ring_buffer_roundtrip(self, mock_read, mock_write):
+        """recent_errors is a bounded deque in memory and a list on disk."""
+        from collections import deque
+        mock_read.return_value = {
+            "failures": {"Edit": {"count": 1, "recent_errors": [{"msg": "x"}] * 12}},
+            "last_update": time.time(),
+        }
+        state = load_tracker_state("test-session")
+        recent = state["failures"]["Edit"]["recent_errors"]
+        self.assertIsInstance(recent, deque)
+        self.assertEqual(len(recent), 10)
+
+        save_tracker_state("test-session", state)
+        saved = mock_write.call_args[0][1]
+        self.assertIsInstance(saved["failures"]["Edit"]["recent_errors"], list)
+
 
 class TestLoadSaveDailyStats(TestCase):
     """Tests for load_daily_stats and save_daily_stats."""
 
     def test_load_daily_stats_default(self):
         """Loading daily stats returns default structure."""
-        # Clear cache first
-        from hooks.handlers.tool_analytics import _daily_stats_cache
-        _daily_stats_cache.clear()
-
-        with patch("hooks.handlers.tool_analytics.safe_load_json") as mock_load:
+        with patch("hooks.handlers.tool_analytics._daily_stats", None), \
+             patch("hooks.handlers.tool_analytics.safe_load_json") as mock_load:
             mock_load.return_value = {
                 "date": datetime.now().strftime("%Y-%m-%d"),
                 "total_tokens": 0,
@@ -238,9 +308,27 @@ class TestLoadSaveDailyStats(TestCase):
             self.assertEqual(stats["tool_calls"], 0)
             self.assertIsInstance(stats["by_tool"], dict)
 
+    def test_load_daily_stats_by_tool_counter(self):
+        """Per-tool totals load as a Counter for in-place increments."""
+        from collections import Counter
+
+        with patch("hooks.handlers.tool_analytics._daily_stats", None), \
+             patch("hooks.handlers.tool_analytics.safe_load_json") as mock_load:
+            mock_load.return_value = {
+                "date": datetime.now().strftime("%Y-%m-%d"),
+                "total_tokens": 30,
+                "tool_calls": 2,
+                "by_tool": {"Read": 10, "Bash": 20},
+                "sessions": 0,
+            }
+            stats = load_daily_stats()
+            self.assertIsInstance(stats["by_tool"], Counter)
+            self.assertEqual(stats["by_tool"].most_common(1), [("Bash", 20)])
+
+    @patch("hooks.handlers.tool_analytics._daily_stats", None)
     @patch("hooks.handlers.tool_analytics.safe_load_json")
     def test_load_daily_stats_cached(self, mock_load):
-        """Cached daily stats avoid file I/O."""
+        """Today's stats stay resident after the first load."""
         mock_load.return_value = {
             "date": datetime.now().strftime("%Y-%m-%d"),
             "total_tokens": 1000,
@@ -248,25 +336,55 @@ class TestLoadSaveDailyStats(TestCase):
             "by_tool": {},
             "sessions": 1,
         }
-        # First load - cache miss
         stats1 = load_daily_stats()
-        # Second load - cache hit (mock shouldn't be called again)
         stats2 = load_daily_stats()
-        self.assertEqual(stats1["total_tokens"], stats2["total_tokens"])
+        self.assertIs(stats1, stats2)
+        mock_load.assert_called_once()
+
+    @patch("hooks.handlers.tool_analytics.safe_save_json")
+    @patch("hooks.handlers.tool_analytics.safe_load_json")
+    def test_load_daily_stats_date_rollover(self, mock_load, mock_save):
+        """A new day flushes the old stats and reloads from disk."""
+        from hooks.handlers import tool_analytics
+        yesterday = {"date": "1999-12-31", "total_tokens": 5, "tool_calls": 1, "by_tool": {}}
+        mock_load.side_effect = lambda path, default: default
+        with patch.object(tool_analytics, "_daily_stats", yesterday), \
+             patch.object(tool_analytics, "_stats_pending", yesterday):
+            stats = load_daily_stats()
+        self.assertEqual(stats["date"], datetime.now().strftime("%Y-%m-%d"))
+        self.assertEqual(stats["total_tokens"], 0)
+        self.assertTrue(str(mock_save.call_args[0][0]).endswith("tokens-1999-12-31.json"))
 
     @patch("hooks.handlers.tool_analytics.safe_save_json")
     def test_save_daily_stats_batching(self, mock_save):
-        """Daily stats are only saved periodically based on flush interval."""
-        from hooks.handlers.tool_analytics import Thresholds
+        """Daily stats written recently are held in memory until the next flush."""
+        from hooks.handlers import tool_analytics
         stats = {
             "date": datetime.now().strftime("%Y-%m-%d"),
             "total_tokens": 1000,
-            "tool_calls": Thresholds.STATS_FLUSH_INTERVAL - 1,  # Not a flush interval
+            "tool_calls": 9,
             "by_tool": {},
             "sessions": 1,
         }
-        save_daily_stats(stats, force=False)
-        mock_save.assert_not_called()
+        with patch.object(tool_analytics, "_stats_last_flush", time.time()), \
+             patch.object(tool_analytics, "_stats_pending", None):
+            save_daily_stats(stats, force=False)
+            mock_save.assert_not_called()
+            self.assertIs(tool_analytics._stats_pending, stats)
+
+            tool_analytics.flush_daily_stats()
+            mock_save.assert_called_once()
+            self.assertIsNone(tool_analytics._stats_pending)
+
+    @patch("hooks.handlers.tool_analytics.safe_save_json")
+    def test_save_daily_stats_flushes_when_due(self, mock_save):
+        """Stats are written once the flush interval has elapsed."""
+        from hooks.handlers import tool_analytics
+        stats = {"date": "2024-01-02", "total_tokens": 1, "tool_calls": 1, "by_tool": {}}
+        with patch.object(tool_analytics, "_stats_last_flush", 0.0):
+            save_daily_stats(stats, force=False)
+        mock_save.assert_called_once()
+        self.assertTrue(str(mock_save.call_args[0][0]).endswith("tokens-2024-01-02.json"))
 
     @patch("hooks.handlers.tool_analytics.safe_save_json")
     def test_save_daily_stats_force(self, mock_save):
@@ -386,10 +504,6 @@ class TestTrackTokens(TestCase):
 
     def test_warns_on_threshold(self):
         """Token tracking warns when threshold is exceeded."""
-        # Clear cache first
-        from hooks.handlers.tool_analytics import _daily_stats_cache
-        _daily_stats_cache.clear()
-
         with patch("hooks.handlers.tool_analytics.load_daily_stats") as mock_load, \
              patch("hooks.handlers.tool_analytics.save_daily_stats") as mock_save:
             # Set up stats that exceed threshold and will trigger warning
@@ -517,25 +631,96 @@ class TestCheckOutputSize(TestCase):
         self.assertEqual(len(messages), 0)
 
 
+class TestAnalyzeResultOnce(TestCase):
+    """Tests for the shared single-pass result summary."""
+
+    def test_bash_result_fields(self):
+        """Dict results expose error, size, output and exit code together."""
+        raw = {"stdout": "out", "stderr": "err", "exit_code": "2", "is_error": True}
+        result = _analyze_result_once(raw)
+        self.assertTrue(result.is_error)
+        self.assertEqual(result.output, "out\nerr")
+        self.assertEqual(result.exit_code, 2)
+        self.assertEqual(result.estimated_tokens, result.content_size // CHARS_PER_TOKEN)
+
+    def test_string_result(self):
+        """String results have no build output or exit code."""
+        result = _analyze_result_once("x" * 100)
+        self.assertFalse(result.is_error)
+        self.assertEqual(result.content_size, 100)
+        self.assertEqual(result.output, "")
+        self.assertIsNone(result.exit_code)
+
+
+class TestCountErrorsWarnings(TestCase):
+    """Tests for count_errors_warnings."""
+
+    def test_counts_markers(self):
+        """error:/warning: markers are tallied case-insensitively."""
+        output = "foo.c:1: error: x\nfoo.c:2: Warning: y\nfoo.c:3: ERROR[E1]: z"
+        self.assertEqual(count_errors_warnings(output), (2, 1))
+
+    def test_summary_count_wins_when_larger(self):
+        """An 'N errors' summary raises the count, and its marker still counts."""
+        self.assertEqual(count_errors_warnings("a error: b\n7 errors generated"), (7, 0))
+        self.assertEqual(count_errors_warnings("1 error: x\nerror: y\nerror: z"), (3, 0))
+
+    def test_first_summary_only(self):
+        """Only the first summary line is considered."""
+        self.assertEqual(count_errors_warnings("2 errors\n9 errors"), (2, 0))
+
+
+class TestDetectBuildTool(TestCase):
+    """Tests for detect_build_tool."""
+
+    def test_priority_follows_tool_order(self):
+        """Earlier tools win when a command mentions several."""
+        self.assertEqual(detect_build_tool("make && cargo build", ""), "rust")
+        self.assertEqual(detect_build_tool("python -m pip install x && npm i", ""), "npm")
+        self.assertEqual(detect_build_tool("python3 setup.py build", ""), "python")
+        self.assertEqual(detect_build_tool("./gradlew build", ""), "java")
+
+    def test_output_fallbacks(self):
+        """Output is sniffed only when the command names no earlier tool."""
+        self.assertEqual(detect_build_tool("make", "TypeScript error"), "typescript")
+        self.assertEqual(detect_build_tool("./build.sh", "error[E0308]"), "rust")
+        self.assertEqual(detect_build_tool("./build.sh", "ok"), "make")
+
+
+class TestExtractBuildErrors(TestCase):
+    """Tests for extract_build_errors."""
+
+    def test_pattern_and_generic_errors(self):
+        """Tool patterns capture matches; other error lines are kept once."""
+        output = "main.c:3: error: expected ';'\nlinking\nError in step 2\nnote: error here"
+        errors = extract_build_errors(output, "gcc_clang")
+        self.assertEqual(len(errors), 2)
+        self.assertEqual(errors[0]["match"], "error: expected ';'")
+        self.assertEqual(errors[1], {"line": "Error in step 2", "match": None})
+
+    def test_unknown_tool_uses_make_patterns(self):
+        """Unknown tools fall back to make patterns."""
+        errors = extract_build_errors("make: *** [all] Error 2", "unknown")
+        self.assertEqual(errors[0]["match"], "make: *** [all] Error 2")
+
+
 class TestTrackToolAnalytics(TestCase):
     """Tests for track_tool_analytics combined handler."""
 
 
-    @patch("hooks.handlers.tool_analytics.track_success")
-    @patch("hooks.handlers.tool_analytics.track_tokens")
-    @patch("hooks.handlers.tool_analytics.check_output_size")
-    def test_limits_messages_to_three(self, mock_size, mock_tokens, mock_success):
+    def test_limits_messages_to_three(self):
         """Combined handler limits output to 3 messages."""
-        mock_success.return_value = ["msg1", "msg2"]
-        mock_tokens.return_value = ["msg3"]
-        mock_size.return_value = ["msg4", "msg5"]
+        mock_success = MagicMock(return_value=["msg1", "msg2"])
+        mock_tokens = MagicMock(return_value=["msg3"])
+        mock_size = MagicMock(return_value=["msg4", "msg5"])
 
         raw = {
             "tool_name": "Read",
             "tool_input": {"file_path": "test.txt"},
             "tool_result": {"content": "test"}
         }
-        result = track_tool_analytics(raw)
+        with patch("hooks.handlers.tool_analytics._DEFAULT_ANALYTICS", (mock_success, mock_tokens, mock_size)):
+            result = track_tool_analytics(raw)
 
         self.assertIsNotNone(result)
         msg = result["hookSpecificOutput"]["message"]
@@ -543,6 +728,15 @@ class TestTrackToolAnalytics(TestCase):
         parts = msg.split(" | ")
         self.assertEqual(len(parts), 3)
 
+    def test_tool_specific_analyses(self):
+        """Build analysis runs only for Bash, batch detection only for Edit/Write."""
+        from hooks.handlers.tool_analytics import _ANALYTICS_BY_TOOL, _DEFAULT_ANALYTICS, analyze_build, detect_batch
+        self.assertIn(analyze_build, _ANALYTICS_BY_TOOL["Bash"])
+        self.assertIn(detect_batch, _ANALYTICS_BY_TOOL["Edit"])
+        self.assertIn(detect_batch, _ANALYTICS_BY_TOOL["Write"])
+        self.assertNotIn(analyze_build, _DEFAULT_ANALYTICS)
+        self.assertNotIn(detect_batch, _DEFAULT_ANALYTICS)
+
 
 
 if __name__ == "__main__":
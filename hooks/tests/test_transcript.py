@@ -21,6 +21,7 @@ from hooks.handlers.context_manager import (
     _count_tokens_in_entry,
     get_transcript_size,
     get_session_summary,
+    estimate_transcript_size,
 )
 
 
@@ -260,6 +261,54 @@ class TestCountTokensInEntry(TestCase):
         count = _count_tokens_in_entry(entry)
         self.assertEqual(count, 0)
 
+    def test_ignores_non_string_text(self):
+        """Null or non-string 'text' values count as zero tokens."""
+        entry = {
+            "content": [
+                {"type": "text", "text": None},
+                {"type": "text", "text": 42},
+                {"type": "text", "text": "hello"},
+            ]
+        }
+        count = _count_tokens_in_entry(entry)
+        self.assertEqual(count, _count_tokens_in_entry({"content": "hello"}))
+
+
+class TestEstimateTranscriptSize(TestCase):
+    """Tests for size-based transcript estimates."""
+
+    @patch("hooks.handlers.context_manager.load_cache", return_value={})
+    def test_default_coefficients(self, _):
+        """Uncalibrated estimates use ~4 bytes/token under 160KB."""
+        self.assertEqual(estimate_transcript_size(40000), (10000, 80))
+        self.assertIsNone(estimate_transcript_size(200 * 1024))
+
+    @patch("hooks.handlers.context_manager.load_cache")
+    def test_learned_coefficients(self, mock_load):
+        """Learned coefficients raise the limit to 512KB."""
+        mock_load.return_value = {"coefficients": {
+            "bytes_per_token": 8.0, "bytes_per_message": 1000.0,
+        }}
+        self.assertEqual(estimate_transcript_size(200 * 1024), (25600, 204))
+        self.assertIsNone(estimate_transcript_size(512 * 1024))
+
+    @patch("hooks.handlers.context_manager.save_cache")
+    @patch("hooks.handlers.context_manager.load_cache", return_value={})
+    def test_update_cache_learns_from_large_scan(self, _, mock_save):
+        """Counts over a large scan store bytes-per-token/message."""
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".jsonl") as f:
+            path = f.name
+        try:
+            update_cache(path, 50000, 400, 400000)
+            coefficients = mock_save.call_args[0][0]["coefficients"]
+            self.assertEqual(coefficients["bytes_per_token"], 8.0)
+            self.assertEqual(coefficients["bytes_per_message"], 1000.0)
+
+            update_cache(path, 10, 1, 100)
+            self.assertNotIn("coefficients", mock_save.call_args[0][0])
+        finally:
+            Path(path).unlink()
+
 
 class TestGetTranscriptSize(TestCase):
     """Tests for get_transcript_size function."""
@@ -358,6 +407,71 @@ class TestGetTranscriptSize(TestCase):
         finally:
             Path(path).unlink()
 
+    def test_scan_skips_truncated_lines(self):
+        """Truncated lines without content are not counted as messages."""
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".jsonl", mode='w') as f:
+            f.write('{"content": "initial message"}\n')
+            f.flush()
+            initial_offset = f.tell()
+            f.write('{"type": "summary"}\n')
+            f.write('{"type": "summary", "leafUu\n')
+            f.write('not json\n')
+            f.write('{"type": "user", "mess\n')
+            path = f.name
+
+        try:
+            with patch("hooks.handlers.context_manager.get_cached_count") as mock_cache, \
+                 patch("hooks.handlers.context_manager.update_cache"):
+                mock_cache.return_value = (10, 1, initial_offset, True)
+
+                _, messages = get_transcript_size(path)
+
+                self.assertEqual(messages, 2)  # 1 cached + 1 whole line
+        finally:
+            Path(path).unlink()
+
+    def test_full_scan_skips_trailing_partial_line(self):
+        """A line still being written is left for the next incremental scan."""
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".jsonl", mode='w') as f:
+            large_line = '{"content": "' + ('x' * 1000) + '"}\n'
+            for _ in range(200):
+                f.write(large_line)
+            complete_size = f.tell()
+            f.write('{"content": "partial')
+            path = f.name
+
+        try:
+            with patch("hooks.handlers.context_manager.get_cached_count", return_value=None), \
+                 patch("hooks.handlers.context_manager.update_cache") as mock_update:
+                tokens, messages = get_transcript_size(path)
+
+                self.assertEqual(messages, 200)
+                self.assertEqual(mock_update.call_args[0][3], complete_size)
+        finally:
+            Path(path).unlink()
+
+    def test_scan_tolerates_null_text(self):
+        """A content item with "text": null does not abort the scan."""
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".jsonl", mode='w') as f:
+            f.write('{"content": "initial message"}\n')
+            f.flush()
+            initial_offset = f.tell()
+            f.write('{"content": [{"type": "text", "text": null}]}\n')
+            f.write('{"content": "new message"}\n')
+            path = f.name
+
+        try:
+            with patch("hooks.handlers.context_manager.get_cached_count") as mock_cache, \
+                 patch("hooks.handlers.context_manager.update_cache"):
+                mock_cache.return_value = (10, 1, initial_offset, True)
+
+                tokens, messages = get_transcript_size(path)
+
+                self.assertGreater(tokens, 10)
+                self.assertEqual(messages, 3)
+        finally:
+            Path(path).unlink()
+
     def test_handles_invalid_json_lines(self):
         """Skips invalid JSON lines gracefully."""
         with tempfile.NamedTemporaryFile(delete=False, suffix=".jsonl", mode='w') as f:
@@ -470,6 +584,40 @@ class TestGetSessionSummary(TestCase):
         finally:
             Path(path).unlink()
 
+    def test_error_words_outside_content_not_counted(self):
+        """Error words in tool input (not content) don't count as errors."""
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".jsonl", mode='w') as f:
+            f.write(json.dumps({
+                "tool_name": "Edit",
+                "tool_input": {"file_path": "/project/error_handler.py"}
+            }) + '\n')
+            path = f.name
+
+        try:
+            result = get_session_summary(path)
+
+            self.assertNotIn("Errors:", result)
+        finally:
+            Path(path).unlink()
+
+    def test_plain_message_lines_not_decoded(self):
+        """Lines without tool_name or error words are skipped before decoding."""
+        import hooks.handlers.context_manager as cm
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".jsonl", mode='w') as f:
+            f.write(json.dumps({"type": "user", "content": "hello"}) + '\n')
+            f.write(json.dumps({"type": "assistant", "content": "hi there"}) + '\n')
+            f.write(json.dumps({"tool_name": "Read"}) + '\n')
+            path = f.name
+
+        try:
+            with patch.object(cm, "fast_json_loads", wraps=cm.fast_json_loads) as mock_loads:
+                result = get_session_summary(path)
+
+            self.assertIn("Read:1", result)
+            self.assertEqual(mock_loads.call_count, 1)
+        finally:
+            Path(path).unlink()
+
     def test_includes_top_tools(self):
         """Includes top 3 tools by usage."""
         with tempfile.NamedTemporaryFile(delete=False, suffix=".jsonl", mode='w') as f:
@@ -536,6 +684,28 @@ class TestGetSessionSummary(TestCase):
         finally:
             Path(path).unlink()
 
+    def test_scan_tolerates_null_text(self):
+        """A content item with "text": null does not abort the scan."""
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".jsonl", mode='w') as f:
+            f.write('{"content": "initial message"}\n')
+            f.flush()
+            initial_offset = f.tell()
+            f.write('{"content": [{"type": "text", "text": null}]}\n')
+            f.write('{"content": "new message"}\n')
+            path = f.name
+
+        try:
+            with patch("hooks.handlers.context_manager.get_cached_count") as mock_cache, \
+                 patch("hooks.handlers.context_manager.update_cache"):
+                mock_cache.return_value = (10, 1, initial_offset, True)
+
+                tokens, messages = get_transcript_size(path)
+
+                self.assertGreater(tokens, 10)
+                self.assertEqual(messages, 3)
+        finally:
+            Path(path).unlink()
+
     def test_handles_invalid_json_lines(self):
         """Handles invalid JSON lines gracefully."""
         with tempfile.NamedTemporaryFile(delete=False, suffix=".jsonl", mode='w') as f:
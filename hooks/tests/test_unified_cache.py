@@ -9,6 +9,7 @@ from diskcache import Cache
 from hooks.handlers.unified_cache import (
     find_fuzzy_match,
     get_cache_key,
+    get_url_key,
     get_exploration_entry,
     save_exploration_entry,
     get_research_entry,
@@ -19,10 +20,36 @@ from hooks.handlers.unified_cache import (
     handle_research_post,
     CacheConfig,
     CACHE_CONFIGS,
+    CWD_INDEX_KEY,
     _caches,
+    _load_cache_backend,
 )
 
 
+class TestCacheBackend:
+    """Tests for cache backend selection."""
+
+    def test_default_backend_is_diskcache(self):
+        """Without the env var, diskcache is used with no extra options."""
+        with patch.dict("os.environ", {"CLAUDE_CACHE_BACKEND": ""}):
+            assert _load_cache_backend() == (Cache, {})
+
+    def test_rs_backend_uses_file_locking(self):
+        """CLAUDE_CACHE_BACKEND=rs picks diskcache_rs with file locking on."""
+        fake_module = MagicMock()
+        with patch.dict("os.environ", {"CLAUDE_CACHE_BACKEND": "rs"}), \
+             patch.dict("sys.modules", {"diskcache_rs": fake_module}):
+            cache_cls, options = _load_cache_backend()
+        assert cache_cls is fake_module.Cache
+        assert options == {"use_file_locking": True}
+
+    def test_rs_backend_falls_back_when_missing(self):
+        """A failed diskcache_rs import falls back to diskcache."""
+        with patch.dict("os.environ", {"CLAUDE_CACHE_BACKEND": "rs"}), \
+             patch.dict("sys.modules", {"diskcache_rs": None}):
+            assert _load_cache_backend() == (Cache, {})
+
+
 class TestCacheKey:
     """Tests for cache key generation."""
 
@@ -45,10 +72,17 @@ class TestCacheKey:
         assert key1 != key2
 
     def test_cache_key_length(self):
-        """Cache key should be 16 chars (truncated MD5)."""
+        """Cache key should be 16 hex chars (8-byte BLAKE2b digest)."""
         key = get_cache_key("any content")
         assert len(key) == 16
 
+    def test_url_key_case_sensitive(self):
+        """URL keys should preserve case (URL paths are case-sensitive)."""
+        key1 = get_url_key("https://example.com/Docs")
+        key2 = get_url_key("https://example.com/docs")
+        assert key1 != key2
+        assert len(key1) == 16
+
 
 @pytest.fixture
 def test_cache(tmp_path):
@@ -84,9 +118,12 @@ def mock_caches(tmp_path):
     }
 
     with patch.dict('hooks.handlers.unified_cache._caches', mock_caches, clear=True):
-        with patch.dict('hooks.handlers.unified_cache._cwd_index', {}, clear=True):
+        with patch.dict('hooks.handlers.unified_cache._cwd_index', {}, clear=True), \
+             patch('hooks.handlers.unified_cache._index_built', False):
             with patch('hooks.handlers.unified_cache._get_cache', side_effect=lambda name: mock_caches.get(name)):
-                with patch('hooks.handlers.unified_cache._get_stats_cache', return_value=stats_cache):
+                with patch('hooks.handlers.unified_cache._get_stats_cache', return_value=stats_cache), \
+                     patch.dict('hooks.handlers.unified_cache._pending_stats', {}, clear=True), \
+                     patch('hooks.handlers.unified_cache._pending_stat_count', 0):
                     yield mock_caches
 
     exploration_cache.close()
@@ -137,7 +174,7 @@ class TestResearchCache:
     def test_save_and_get_entry(self, mock_caches, research_config):
         """Should save and retrieve research entry."""
         url = "https://example.com/docs"
-        cache_key = get_cache_key(url)
+        cache_key = get_url_key(url)
         entry = {
             "url": url,
             "summary": "Documentation content",
@@ -206,6 +243,81 @@ class TestFuzzyMatch:
         assert result is None
 
 
+    def test_fuzzy_match_reads_only_matched_entry(self, mock_caches, exploration_config):
+        """Scoring should use the in-memory index; only the winner is read from disk."""
+        now = time.time()
+        for i, prompt in enumerate(["find config files", "list test modules", "search docs"]):
+            save_exploration_entry(f"key{i}", {
+                "prompt": prompt,
+                "summary": f"Result {i}",
+                "cwd": "/project",
+                "timestamp": now - 60,
+                "subagent": "Explore"
+            }, exploration_config)
+
+        # Index already warm (built this process), so only the winner is read
+        with patch('hooks.handlers.unified_cache._index_built', True), \
+             patch.object(mock_caches["exploration"], "get", wraps=mock_caches["exploration"].get) as mock_get:
+            result = find_fuzzy_match("find configuration files", "/project", exploration_config)
+        assert result["summary"] == "Result 0"
+        mock_get.assert_called_once_with("key0")
+
+    def test_fuzzy_match_warm_starts_index_from_disk(self, mock_caches, exploration_config):
+        """Entries saved by an earlier process are found via the persisted index."""
+        for i, prompt in enumerate(["find config files", "list test modules", "search docs"]):
+            save_exploration_entry(f"key{i}", {
+                "prompt": prompt,
+                "summary": f"Result {i}",
+                "cwd": "/project",
+                "timestamp": time.time() - 60,
+                "subagent": "Explore"
+            }, exploration_config)
+
+        # New process: empty in-memory index, entries only on disk. Warm start
+        # reads the index key, not every entry (each get refreshes LRU order)
+        with patch.dict('hooks.handlers.unified_cache._cwd_index', {}, clear=True), \
+             patch.object(mock_caches["exploration"], "get", wraps=mock_caches["exploration"].get) as mock_get:
+            result = find_fuzzy_match("find configuration files", "/project", exploration_config)
+        assert result is not None
+        assert result["summary"] == "Result 0"
+        assert [c.args[0] for c in mock_get.call_args_list] == [CWD_INDEX_KEY, "key0"]
+
+    def test_persisted_index_drops_expired_keys(self, mock_caches, exploration_config):
+        """Saving prunes expired keys from the persisted index."""
+        save_exploration_entry("old", {
+            "prompt": "old query",
+            "cwd": "/old",
+            "timestamp": time.time() - exploration_config.ttl_seconds - 100,
+        }, exploration_config)
+        save_exploration_entry("new", {
+            "prompt": "new query",
+            "cwd": "/project",
+            "timestamp": time.time(),
+        }, exploration_config)
+
+        stored = mock_caches["exploration"].get(CWD_INDEX_KEY)
+        assert list(stored) == ["/project"]
+        assert list(stored["/project"]) == ["new"]
+
+    def test_fuzzy_match_skips_impossible_lengths(self, mock_caches, exploration_config):
+        """Candidates too short to reach the threshold should never be scored."""
+        now = time.time()
+
+        entry = {
+            "prompt": "find",
+            "summary": "Short",
+            "cwd": "/project",
+            "timestamp": now - 60,
+            "subagent": "Explore"
+        }
+        save_exploration_entry("key1", entry, exploration_config)
+
+        with patch("hooks.handlers.unified_cache.process.extractOne") as mock_extract:
+            result = find_fuzzy_match("find configuration files in project", "/project", exploration_config)
+        assert result is None
+        mock_extract.assert_not_called()
+
+
 class TestExplorationHandlers:
     """Tests for exploration pre/post handlers."""
 
@@ -271,6 +383,43 @@ class TestResearchHandlers:
         assert result is None
 
 
+    def test_research_post_stores_summary_prefix(self, mock_caches):
+        """Should store only the leading RESEARCH_SUMMARY_CHARS of the page."""
+        from hooks.handlers.unified_cache import RESEARCH_SUMMARY_CHARS
+        url = "https://example.com/docs"
+        ctx = {
+            "tool_name": "WebFetch",
+            "tool_input": {"url": url},
+            "tool_result": {"content": "a" * RESEARCH_SUMMARY_CHARS + "b" * 100}
+        }
+        handle_research_post(ctx)
+
+        entry = mock_caches["research"].get(get_url_key(url))
+        assert entry["summary"] == "a" * RESEARCH_SUMMARY_CHARS
+
+
+class TestStats:
+    """Tests for buffered stat updates."""
+
+    def test_stats_buffered_until_flush(self, mock_caches):
+        """Stat increments should stay in memory until flushed."""
+        from hooks.handlers.unified_cache import _update_stat, flush_stats
+        _update_stat("exploration", "hits")
+        _update_stat("exploration", "hits")
+        assert mock_caches["stats"].get("exploration:hits") is None
+
+        flush_stats()
+        assert mock_caches["stats"].get("exploration:hits") == 2
+
+    def test_stats_flush_after_threshold(self, mock_caches):
+        """Reaching STATS_FLUSH_EVERY updates should flush automatically."""
+        from hooks.handlers.unified_cache import _update_stat, STATS_FLUSH_EVERY
+        mock_caches["stats"].set("research:misses", 5)
+        for _ in range(STATS_FLUSH_EVERY):
+            _update_stat("research", "misses")
+        assert mock_caches["stats"].get("research:misses") == 5 + STATS_FLUSH_EVERY
+
+
 class TestCacheConfig:
     """Tests for CacheConfig dataclass."""
 
@@ -1,4 +1,6 @@
 """Tests for handlers/viewer.py"""
+import os
+import time
 from pathlib import Path
 from unittest.mock import patch
 
@@ -20,3 +22,53 @@ class TestViewer:
         with patch.object(viewer, 'is_viewer_running', return_value=True):
             result = viewer.maybe_start_viewer()
             assert result is None
+
+    def test_is_viewer_running_caches_pid_by_mtime(self, tmp_path):
+        from hooks.handlers import viewer
+        pid_file = tmp_path / "viewer.pid"
+        pid_file.write_text(str(os.getpid()))
+        with patch.object(viewer, 'PID_FILE', pid_file), \
+             patch.object(viewer, '_pid_cache', None):
+            assert viewer.is_viewer_running() is True
+            with patch('builtins.open', side_effect=AssertionError("re-read")):
+                assert viewer.is_viewer_running() is True
+
+    def test_is_viewer_running_stale_pid_removed(self, tmp_path):
+        from hooks.handlers import viewer
+        pid_file = tmp_path / "viewer.pid"
+        pid_file.write_text("not-a-pid")
+        with patch.object(viewer, 'PID_FILE', pid_file), \
+             patch.object(viewer, '_pid_cache', None):
+            assert viewer.is_viewer_running() is False
+        assert not pid_file.exists()
+
+    def test_maybe_start_viewer_rate_limited_by_marker_mtime(self, tmp_path):
+        from hooks.handlers import viewer
+        with patch.object(viewer, 'DATA_DIR', tmp_path), \
+             patch.object(viewer, 'is_viewer_running', return_value=True) as running:
+            viewer.maybe_start_viewer()
+            assert (tmp_path / ".viewer_checked").exists()
+            viewer.maybe_start_viewer()
+            assert running.call_count == 1
+
+    def test_start_viewer_spawns_daemon(self, tmp_path):
+        from hooks.handlers import viewer
+        script = tmp_path / "session-viewer.py"
+        marker = tmp_path / "started"
+        script.write_text(f"#!/bin/sh\necho \"$@\" > {marker}\necho noise\necho err >&2\n")
+        script.chmod(0o755)
+        with patch.object(viewer, 'VIEWER_SCRIPT', script):
+            result = viewer.start_viewer()
+        assert result == f"Session viewer: http://localhost:{viewer.DEFAULT_PORT}"
+        for _ in range(100):
+            if marker.exists() and marker.read_text():
+                break
+            time.sleep(0.02)
+        assert marker.read_text().strip() == "--daemon start"
+
+    def test_start_viewer_not_executable(self, tmp_path):
+        from hooks.handlers import viewer
+        script = tmp_path / "session-viewer.py"
+        script.write_text("")
+        with patch.object(viewer, 'VIEWER_SCRIPT', script):
+            assert viewer.start_viewer() is None
@@ -207,29 +207,25 @@ if [[ "$total_tokens" -gt 0 ]]; then
     # Calculate token rates like Linux load averages (1m, 5m, 15m)
     # Read from hook-generated snapshots file
     tok_rate_display=""
-    snapshot_file="$HOME/.claude/data/token-snapshots.jsonl"
+    snapshot_file="$HOME/.claude/data/token-snapshots.bin"
     now=$(date +%s)
 
     if [[ -f "$snapshot_file" ]]; then
         # Calculate rates from snapshots using awk
-        tok_rate_display=$(awk -v now="$now" -v total="$total_tokens" '
+        # Records are little-endian uint64 triples (ts, total tokens, output tokens);
+        # od prints them as decimal numbers, regrouped into triples below
+        tok_rate_display=$(od -An -v -t u8 "$snapshot_file" | awk -v now="$now" -v total="$total_tokens" '
             BEGIN {
-                FS = "[,:}]"
                 # Target times for 1m, 5m, 15m ago
                 t1 = now - 60; t5 = now - 300; t15 = now - 900
                 # Closest entries
                 ts1 = 0; tok1 = 0; diff1 = 99999
                 ts5 = 0; tok5 = 0; diff5 = 99999
                 ts15 = 0; tok15 = 0; diff15 = 99999
+                n = 0
             }
-            {
-                # Parse: {"ts":123,"in":456,"out":789}
-                ts = 0; tok = 0
-                for (i = 1; i <= NF; i++) {
-                    if ($i ~ /ts/) ts = $(i+1)
-                    if ($i ~ /in/) tok = $(i+1)
-                }
-                if (ts == 0) next
+            function consider(ts, tok) {
+                if (ts == 0) return
 
                 # Find closest to each target
                 d1 = (ts > t1) ? ts - t1 : t1 - ts
@@ -241,6 +237,13 @@ if [[ "$total_tokens" -gt 0 ]]; then
                 d15 = (ts > t15) ? ts - t15 : t15 - ts
                 if (d15 < diff15) { diff15 = d15; ts15 = ts; tok15 = tok }
             }
+            {
+                for (i = 1; i <= NF; i++) {
+                    rec[n % 3] = $i
+                    n++
+                    if (n % 3 == 0) consider(rec[0], rec[1])
+                }
+            }
             END {
                 # Calculate rates (tokens per minute)
                 r1 = r5 = r15 = 0
@@ -278,7 +281,7 @@ if [[ "$total_tokens" -gt 0 ]]; then
                     printf " %s,%s,%s", s1, s5, s15
                 }
             }
-        ' "$snapshot_file")
+        ')
     fi
 
     # Fallback to session average if no snapshot data